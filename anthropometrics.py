@@ -0,0 +1,55 @@
+import numpy as np
+
+# 앱 공용 BMI/BMR 계산 — 모든 함수는 스칼라와 배열(몸무게 이력, 사용자 목록)을 똑같이 받는다.
+# 배열끼리는 numpy 브로드캐스트(예: 몸무게 배열 + 키 하나), 값이 없거나 0 이하인 칸은 NaN.
+
+MALE = {"male", "m", "남", "남성", "man"}
+
+# BMR 공식: (남성 계수, 여성 계수) — 각 계수 = (상수, 체중kg, 키cm, 나이)
+BMR_FORMULAS = {
+    "mifflin": ((5.0, 10.0, 6.25, -5.0), (-161.0, 10.0, 6.25, -5.0)),              # Mifflin-St Jeor
+    "harris": ((88.362, 13.397, 4.799, -5.677), (447.593, 9.247, 3.098, -4.330)),  # Harris-Benedict (개정)
+}
+DEFAULT_FORMULA = "mifflin"
+
+
+def _arr(x) -> np.ndarray:
+    # None/빈 문자열/숫자가 아닌 값 → NaN, 0 이하 → NaN
+    try:
+        a = np.asarray(x, dtype="float64")
+    except (TypeError, ValueError):  # 숫자가 아닌 값이 섞인 경우만 값 단위 변환
+        o = np.asarray(x, dtype=object)
+        a = np.array([_num(v) for v in o.ravel()], dtype="float64").reshape(o.shape)
+    return np.where(a > 0, a, np.nan)
+
+
+def _num(v) -> float:
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _out(a: np.ndarray):
+    # 입력이 모두 스칼라면 float 하나로
+    return a.item() if a.ndim == 0 else a
+
+
+def is_male(sex) -> np.ndarray:
+    s = np.asarray(sex, dtype=object)
+    return np.vectorize(lambda v: str(v).strip().lower() in MALE, otypes=[bool])(s) if s.size else s.astype(bool)
+
+
+def bmi(weight_kg, height_cm):
+    """체중(kg) / 키(m)² — 소수 둘째 자리."""
+    w, h = _arr(weight_kg), _arr(height_cm) / 100.0
+    return _out(np.round(w / (h * h), 2))
+
+
+def bmr(weight_kg, height_cm, age, sex, formula: str = DEFAULT_FORMULA):
+    """기초대사량(kcal/일). formula = "mifflin" | "harris". 남/녀 계수는 sex 배열로 행마다 선택."""
+    (m0, mw, mh, ma), (f0, fw, fh, fa) = BMR_FORMULAS[formula]
+    w, h, a = _arr(weight_kg), _arr(height_cm), _arr(age)
+    male = is_male(sex)
+    out = np.where(male, m0 + mw * w + mh * h + ma * a, f0 + fw * w + fh * h + fa * a)
+    return _out(np.round(out, 2))
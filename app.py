@@ -1,10 +1,17 @@
 
 import json
+import os
 from datetime import date, datetime
 from typing import List, Dict, Optional
 
 import gradio as gr
 
+import anthropometrics
+import jsonio
+from ingredient_store import IngredientStore
+from recipe_catalog import current_catalog
+from recipe_index import top_k
+
 # --------------------
 # Simple JSON "storage"
 # --------------------
@@ -12,18 +19,17 @@ PROFILE_PATH = "profile.json"
 INGREDIENTS_PATH = "ingredients.json"
 LOGS_PATH = "logs.json"
 
+# Writes are locked + atomic (tmp -> fsync -> rename); a corrupt file is moved aside
+# as <name>.corrupt-<time> instead of being silently replaced by the default.
 def _load(path: str, default):
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return default
-    except json.JSONDecodeError:
-        return default
+    return jsonio.load_json(path, default)
 
 def _save(path: str, data):
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    jsonio.save_json(path, data)
+
+def _update(path: str, fn, default):
+    # read-modify-write under the file lock so concurrent requests don't drop each other's changes
+    return jsonio.update_json(path, fn, default)
 
 # Initialize files if missing
 if not os.path.exists(PROFILE_PATH):
@@ -37,12 +43,9 @@ if not os.path.exists(LOGS_PATH):
 # Helpers
 # --------------------
 def calc_bmr(sex: str, weight_kg: float, height_cm: float, age: int) -> int:
-    # Mifflin-St Jeor
-    if sex.lower() in ["male", "m", "남", "남성"]:
-        bmr = 10*weight_kg + 6.25*height_cm - 5*age + 5
-    else:
-        bmr = 10*weight_kg + 6.25*height_cm - 5*age - 161
-    return int(round(bmr))
+    # Mifflin-St Jeor (shared with the other apps via anthropometrics); 0 if an input is missing
+    bmr = anthropometrics.bmr(weight_kg, height_cm, age, sex, formula="mifflin")
+    return 0 if bmr != bmr else int(round(bmr))
 
 def add_profile(sex, weight, height, age, goal_cal, allergies_text, conditions_text):
     bmr = calc_bmr(sex, weight, height, age)
@@ -66,118 +69,101 @@ def list_profile():
     prof = _load(PROFILE_PATH, {})
     return json.dumps(prof, ensure_ascii=False, indent=2)
 
+# Fridge inventory keyed by normalized name (case/width/whitespace-insensitive). Each entry
+# is a lot (same name + expiry + base unit); adding the same lot again bumps its quantity.
+# Changes go to an append-only journal next to ingredients.json, compacted every 200 ops,
+# so add/remove don't rewrite the whole file. Other processes' writes are picked up by refresh().
+STORE = IngredientStore(INGREDIENTS_PATH)
+
+def _inv_json(data=None):
+    return json.dumps(STORE.lots() if data is None else data, ensure_ascii=False, indent=2)
+
 def add_ingredient(name, quantity, unit, expires_on):
-    data = _load(INGREDIENTS_PATH, [])
-    item = {
-        "name": name.strip(),
-        "quantity": float(quantity) if quantity else 0.0,
-        "unit": unit.strip(),
-        "expires_on": expires_on if expires_on else None,
-        "added_at": datetime.now().isoformat(timespec="seconds"),
-    }
-    if not item["name"]:
-        return "❗이름은 필수입니다.", json.dumps(data, ensure_ascii=False, indent=2)
-    data.append(item)
-    _save(INGREDIENTS_PATH, data)
-    return "✅ 재료 추가!", json.dumps(data, ensure_ascii=False, indent=2)
+    if not (name or "").strip():
+        STORE.refresh()
+        return "❗이름은 필수입니다.", _inv_json()
+    lot = STORE.add(name, quantity, unit, expires_on or None)
+    return f"✅ 재료 추가! ({lot['name']} {lot['quantity']:g}{lot['unit']})", _inv_json()
 
 def remove_ingredient(name):
-    data = _load(INGREDIENTS_PATH, [])
-    new_data = [i for i in data if i.get("name","").lower() != name.strip().lower()]
-    _save(INGREDIENTS_PATH, new_data)
-    return f"🗑️ '{name}' 삭제(이름 일치 항목).", json.dumps(new_data, ensure_ascii=False, indent=2)
+    n = STORE.remove(name)
+    return f"🗑️ '{name}' 삭제({n}개 항목).", _inv_json()
 
 def clear_ingredients():
-    _save(INGREDIENTS_PATH, [])
+    STORE.clear()
     return "🧹 재료 목록 초기화.", "[]"
 
 def list_ingredients():
-    data = _load(INGREDIENTS_PATH, [])
-    # sort by expiry soonest first
-    def sort_key(i):
-        ex = i.get("expires_on")
-        try:
-            return datetime.fromisoformat(ex) if ex else datetime.max
-        except Exception:
-            return datetime.max
-    data = sorted(data, key=sort_key)
-    return json.dumps(data, ensure_ascii=False, indent=2)
-
-# Very simple rules for "recommendations"
-# You can enrich later with nutrition, tags, embeddings, etc.
-RULES = [
-    {
-        "name": "아보카도 에그볼",
-        "need": ["아보카도", "계란"],
-        "avoid_any": [],
-        "kcal": 420,
-        "desc": "아보카도와 삶은 계란, 소금 한 꼬집, 올리브오일로 간단하게."
-    },
-    {
-        "name": "토마토 모짜렐라 샐러드",
-        "need": ["토마토", "모짜렐라"],
-        "avoid_any": ["유당불내증"],
-        "kcal": 350,
-        "desc": "토마토+모짜렐라+올리브오일. 바질이 있다면 더 좋아요."
-    },
-    {
-        "name": "관찰레 스크램블 라이스",
-        "need": ["관찰레", "계란", "밥"],
-        "avoid_any": ["저탄수"],
-        "kcal": 650,
-        "desc": "관찰레와 계란을 스크램블로, 밥과 함께 한 그릇."
-    },
-    {
-        "name": "요거트&복숭아 볼",
-        "need": ["요거트", "복숭아"],
-        "avoid_any": ["유당불내증"],
-        "kcal": 300,
-        "desc": "무가당 요거트에 복숭아 다이스를 올려 상큼하게."
-    },
-]
+    # expiry soonest first (undated/invalid last), straight from the store's expiry index
+    STORE.refresh()
+    return _inv_json(STORE.lots(by_expiry=True))
+
+def expiring_ingredients(days):
+    STORE.refresh()
+    days = int(days or 0)
+    out = {
+        "expired": STORE.expired(),
+        f"within_{days}_days": STORE.expiring(days),
+    }
+    return _inv_json(out)
+
+def ingredient_totals():
+    # per-name totals in base units (g / ml / 개), lot count and earliest expiry
+    STORE.refresh()
+    return _inv_json(STORE.summary())
+
+# Recipes live in an external catalog (JSON list or CSV, see recipe_catalog.py).
+# Parsed once into interned arrays, cached next to the file as memory-mapped .npy arrays
+# + a meta.json (.<file>.cache/<hash>-v<format>/, no pickle); the ingredient index is
+# rebuilt only when the file changes.
+RECIPES_PATH = os.environ.get("FRIDGEGENIE_RECIPES", "recipes.json")
+TOP_K = 5          # best pick + alternatives shown in the detail view
+EXPIRING_DAYS = 3  # ingredients expiring within this many days boost recipes that use them
+
+def _expiring_names() -> set:
+    return STORE.expiring_names(EXPIRING_DAYS)
 
 def recommend():
     prof = _load(PROFILE_PATH, {})
-    inv = _load(INGREDIENTS_PATH, [])
-    have = {i["name"] for i in inv}
+    STORE.refresh()
+    have = STORE.names()
     allergies = set(prof.get("allergies", []))
     conditions = set(prof.get("conditions", []))
     avoid_keys = allergies | conditions
 
-    candidates = []
-    for r in RULES:
-        if not set(r["need"]).issubset(have):
-            continue
-        if any(x in avoid_keys for x in r["avoid_any"]):
-            continue
-        # crude goal_cal proximity score
-        goal = prof.get("goal_cal", 1800)
-        score = abs(goal/3 - r["kcal"])  # assume ~1식
-        candidates.append((score, r))
-
-    if not candidates:
+    catalog = current_catalog(RECIPES_PATH)
+    ids = catalog.index.complete(have, avoid_keys)
+    if not len(ids):
         return "😿 조건에 맞는 추천이 없어요. 재료를 더 추가해보세요.", ""
 
-    candidates.sort(key=lambda x: x[0])
-    best = candidates[0][1]
+    # composite score (kcal proximity to goal_cal/3 ~ 1식, coverage, expiring-soon boost), top-k only
+    goal = prof.get("goal_cal", 1800)
+    expiring = _expiring_names()
+    top, scores = top_k(catalog.index, ids, 1.0, goal/3, expiring, k=TOP_K)
+    best = catalog.recipe(top[0])
 
     # log selection
-    logs = _load(LOGS_PATH, [])
-    logs.append({
+    _update(LOGS_PATH, lambda logs: logs.append({
         "date": datetime.now().date().isoformat(),
         "chosen_recipe": best["name"],
         "kcal": best["kcal"],
-    })
-    _save(LOGS_PATH, logs)
+    }), [])
 
     detail = {
         "recipe": best["name"],
         "kcal": best["kcal"],
         "desc": best["desc"],
         "used": best["need"],
+        "expiring_used": [n for n in best["need"] if n in expiring],
+        "score": round(float(scores[0]), 3),
         "profile_goal_cal": prof.get("goal_cal", 1800),
+        "alternatives": [
+            {"recipe": catalog.names[i], "kcal": catalog.recipe(i)["kcal"], "score": round(float(s), 3)}
+            for i, s in zip(top[1:], scores[1:])
+        ],
     }
-    return f"🍽️ 오늘의 추천: {best['name']}", json.dumps(detail, ensure_ascii=False, indent=2)
+    more = f" (대안 {len(top) - 1}개)" if len(top) > 1 else ""
+    return f"🍽️ 오늘의 추천: {best['name']}{more}", json.dumps(detail, ensure_ascii=False, indent=2)
 
 def show_logs():
     logs = _load(LOGS_PATH, [])
@@ -220,6 +206,9 @@ with gr.Blocks(title="FridgeGenie (MVP)") as demo:
         del_btn.click(remove_ingredient, [del_name], [gr.Markdown(), inv_view])
         clear_btn.click(clear_ingredients, [], [gr.Markdown(), inv_view])
         gr.Button("재료 불러오기").click(list_ingredients, [], [inv_view])
+        exp_days = gr.Number(value=3, label="유통기한 임박 기준(일)", precision=0)
+        gr.Button("만료/임박 재료 보기").click(expiring_ingredients, [exp_days], [inv_view])
+        gr.Button("재료별 합계").click(ingredient_totals, [], [inv_view])
 
     with gr.Tab("3) 추천"):
         rec_btn = gr.Button("오늘의 추천 뽑기")
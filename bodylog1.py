@@ -1,53 +1,29 @@
-import json
+import copy
+import time
 from io import BytesIO
 from pathlib import Path
-from typing import Dict, Any, List, Tuple
-from datetime import datetime, date, time, timedelta
+from typing import Dict, Any, List
+from datetime import datetime, date, timedelta
 
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import streamlit as st
-from matplotlib.backends.backend_pdf import PdfPages
+
+from anthropometrics import bmi
+from bodylog_meta import DEFAULT_CONFIG, METRIC_META, PLOT_META
+from bodylog_columns import entry_values, series, flag_bits, decode_flags, thresholds_key
+from bodylog_report import ReportJobs, shade_thresholds, thin_series
+from bodylog_store import JournalStore
+from bodylog_sqlite import open_backend
+from bodylog_import import detect_format, import_file
+from jsonio import CorruptFile, load_json as _load_json, quarantine, update_json
 
 # ---------------- Paths & Defaults ----------------
 DATA_FILE   = Path("bodylog_plus.json")
 CONFIG_FILE = Path("bodylog_plus_config.json")
 PROFILE_FILE= Path("bodylog_plus_profile.json")
 
-DEFAULT_CONFIG = {
-    "metrics": ["bp", "hr", "temp", "sugar"],  # 기본 노출 항목
-    "thresholds": {
-        "bp_sys_hi": 140, "bp_dia_hi": 90,
-        "bp_sys_very": 180, "bp_dia_very": 120,
-        "hr_lo": 50, "hr_hi": 120,
-        "temp_hi": 38.5,
-        "sugar_hi": 180, "sugar_very": 240, "sugar_lo": 60,
-        "spo2_lo": 92,
-        "rr_lo": 10, "rr_hi": 24,
-    }
-}
-
-METRIC_META = {
-    "bp":     {"label": "혈압(수축/이완)", "type": "text",  "placeholder": "120/80", "unit": "mmHg"},
-    "hr":     {"label": "심박수(bpm)",     "type": "int",   "unit": "bpm"},
-    "temp":   {"label": "체온(°C)",        "type": "float", "step": 0.1, "unit": "°C"},
-    "sugar":  {"label": "혈당(mg/dL)",     "type": "float", "step": 0.1, "unit": "mg/dL"},
-    "spo2":   {"label": "SpO₂(%)",         "type": "int",   "unit": "%"},
-    "rr":     {"label": "호흡수(RR)",      "type": "int",   "unit": "/min"},
-    "weight": {"label": "체중(kg)",        "type": "float", "step": 0.1, "unit": "kg"},
-    "waist":  {"label": "허리둘레(cm)",    "type": "float", "step": 0.1, "unit": "cm"},
-    "bmi":    {"label": "BMI(kg/m²)",      "type": "float", "step": 0.1, "unit": "kg/m²"},
-}
-
-# 그래프 표시용 라벨/단위 (혈압은 분리지표 사용)
-PLOT_META = {
-    "hr": ("심박수(bpm)", "bpm"), "temp": ("체온(°C)", "°C"), "sugar": ("혈당(mg/dL)", "mg/dL"),
-    "spo2": ("SpO₂(%)", "%"), "rr": ("호흡수(/min)", "/min"),
-    "weight": ("체중(kg)", "kg"), "bmi": ("BMI(kg/m²)", "kg/m²"),
-    "bp_sys": ("수축기(mmHg)", "mmHg"), "bp_dia": ("이완기(mmHg)", "mmHg"),
-}
-
 def make_plot_options(active_metrics: List[str]) -> List[str]:
     opts = []
     for m in active_metrics:
@@ -59,52 +35,25 @@ def make_plot_options(active_metrics: List[str]) -> List[str]:
     return [x for x in opts if not (x in seen or seen.add(x))]
 
 # ---------------- IO helpers ----------------
+# 쓰기는 잠금 + 원자적 교체(jsonio). 깨진 파일은 보관해 두고 경고 후 기본값
 def load_json(path: Path, default):
+    # 파일이 없을 때도 default 사본을 돌려줌 — 모듈 공용 기본값(DEFAULT_CONFIG 등)을 세션에서 고치지 않게
     try:
-        return json.loads(path.read_text(encoding="utf-8"))
-    except Exception:
-        return default
+        return _load_json(path, copy.deepcopy(default), strict=True)
+    except CorruptFile:
+        backup = quarantine(path)
+        st.warning(f"{path.name} 파일이 손상되어 {backup.name} 로 보관하고 기본값을 사용합니다.")
+        return copy.deepcopy(default)
 
-def save_json(path: Path, data):
-    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+def save_json(path: Path, changes: Dict[str, Any], default):
+    # 바꾼 키만 최신 파일에 병합 → 다른 세션이 저장한 다른 설정을 덮어쓰지 않음
+    return update_json(path, lambda cur: {**cur, **changes}, default)
 
 # ---------------- Logic helpers ----------------
-def parse_bp(bp_str: str) -> Tuple[int | None, int | None]:
-    try:
-        s, d = bp_str.split("/")
-        return int(s.strip()), int(d.strip())
-    except Exception:
-        return None, None
-
 def abnormal_flags(row: Dict[str, Any], thr: Dict[str, Any]) -> str:
-    flags: List[str] = []
-    # 혈압
-    if "bp" in row:
-        s, d = parse_bp(str(row.get("bp", "")))
-        if s and d:
-            if s >= thr["bp_sys_very"] or d >= thr["bp_dia_very"]:
-                flags.append("혈압 매우 높음")
-            elif s >= thr["bp_sys_hi"] or d >= thr["bp_dia_hi"]:
-                flags.append("혈압 높음")
-    # 심박
-    if isinstance(row.get("hr"), (int, float)) and (row["hr"] < thr["hr_lo"] or row["hr"] > thr["hr_hi"]):
-        flags.append("심박 비정상")
-    # 체온
-    if isinstance(row.get("temp"), (int, float)) and row["temp"] >= thr["temp_hi"]:
-        flags.append("고열")
-    # 혈당
-    if isinstance(row.get("sugar"), (int, float)):
-        if row["sugar"] >= thr["sugar_very"] or row["sugar"] <= thr["sugar_lo"]:
-            flags.append("혈당 위험")
-        elif row["sugar"] >= thr["sugar_hi"]:
-            flags.append("혈당 높음")
-    # SpO2
-    if isinstance(row.get("spo2"), (int, float)) and row["spo2"] < thr["spo2_lo"]:
-        flags.append("저산소")
-    # 호흡수
-    if isinstance(row.get("rr"), (int, float)) and (row["rr"] < thr["rr_lo"] or row["rr"] > thr["rr_hi"]):
-        flags.append("호흡수 이상")
-    return ", ".join(flags)
+    # 단건도 일괄 엔진(flag_bits)으로 평가해 경고 규칙을 한 곳에서만 관리
+    cols = {k: np.array([v]) for k, v in entry_values(row).items()}
+    return decode_flags(int(flag_bits(cols, thr)[0]))
 
 # (선택) 경고음
 def make_beep_wav(seconds=0.35, freq=880, rate=44100):
@@ -171,24 +120,56 @@ div[data-baseweb="select"] * {{ font-size:20px!important; }}
 st.title("📝 바디로그 PLUS — 선택형 지표/경고/그래프/PDF 리포트")
 
 # ---------------- Load DB & migrate IDs (하나만) ----------------
-DB       = load_json(DATA_FILE,   {"entries": []})
+# 기록은 저장소(프로세스당 1개, 세션 간 공유)로 관리 — 백엔드는 설정의 storage 항목(json/sqlite)
+@st.cache_resource
+def open_store(path: Path, backend: str, sqlite_path: str) -> JournalStore:
+    return open_backend({"backend": backend, "sqlite_path": sqlite_path}, path)
+
+@st.cache_resource
+def report_jobs() -> ReportJobs:
+    return ReportJobs()
+
 CFG      = load_json(CONFIG_FILE, DEFAULT_CONFIG)
 PROFILE  = load_json(PROFILE_FILE, {"height_cm": None})
-
-from uuid import uuid4
-def migrate_ids(db: dict) -> int:
-    changed = 0
-    for e in db.get("entries", []):
-        if "id" not in e:
-            e["id"] = uuid4().hex
-            changed += 1
-    if changed:
-        save_json(DATA_FILE, db)
-    return changed
-
-migrated = migrate_ids(DB)
-if migrated:
-    st.toast(f"기존 기록 {migrated}건에 ID 부여 완료")
+STORAGE  = {**DEFAULT_CONFIG["storage"], **CFG.get("storage", {})}
+try:
+    STORE = open_store(DATA_FILE, STORAGE["backend"], STORAGE["sqlite_path"])
+except CorruptFile as e:
+    st.error(f"기록 파일을 읽을 수 없습니다: {e}. 파일을 복구하거나 백업에서 되돌린 뒤 다시 실행하세요.")
+    st.stop()
+JOBS     = report_jobs()
+STORE.refresh()  # 다른 프로세스가 바꾼 경우에만 다시 읽음 (JSON: mtime/size, SQLite: data_version)
+
+# id 없는 예전 기록은 저장소가 로드 시 id 부여 후 스냅샷으로 다시 씀
+if STORE.migrated and not st.session_state.get("_migrated_toast"):
+    st.session_state["_migrated_toast"] = True
+    st.toast(f"기존 기록 {STORE.migrated}건에 ID 부여 완료")
+
+# ---------------- 표 페이지 (서버 측 페이지 나누기) ----------------
+# 표에는 현재 페이지 행만 만들어 보냄. 페이지 위치는 시각 cursor 스택으로 세션에 보관
+PAGE_SIZES = [50, 100, 200, 500]
+
+def paged(name: str, start: datetime | None, end: datetime | None, thr=None, keyword: str = "") -> Dict[str, Any]:
+    size = st.session_state.get(f"_pgsize_{name}", PAGE_SIZES[0])
+    key = f"_pg_{name}"
+    sig = (start, end, size, keyword)
+    if st.session_state.get(key, {}).get("sig") != sig:
+        st.session_state[key] = {"sig": sig, "cursors": [None]}  # 조건이 바뀌면 첫 페이지로
+    cursors = st.session_state[key]["cursors"]
+    pg = STORE.page(start, end, size, cursors[-1], thr, keyword)
+
+    c1, c2, c3, c4 = st.columns([1, 1, 3, 1])
+    if c1.button("◀ 이전", key=f"{key}_prev", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+    if c2.button("다음 ▶", key=f"{key}_next", disabled=pg["next"] is None):
+        cursors.append(pg["next"])
+        st.rerun()
+    total = f" / 전체 {pg['total']:,}건" if pg["total"] is not None else ""
+    c3.caption(f"{len(cursors)}쪽 · {len(pg['rows'])}건 표시{total}")
+    c4.selectbox("쪽당", PAGE_SIZES, key=f"_pgsize_{name}", label_visibility="collapsed")
+    pg["page"] = len(cursors)
+    return pg
 
 # ---------------- Sidebar: 설정 ----------------
 with st.sidebar:
@@ -211,16 +192,15 @@ with st.sidebar:
         bmi_on   = st.checkbox("BMI(kg/m²)", value=("bmi" in default_checked))
 
     if st.button("저장(지표 설정)"):
-        CFG["metrics"] = [k for k, v in {
+        CFG = save_json(CONFIG_FILE, {"metrics": [k for k, v in {
             "bp": bp_on, "hr": hr_on, "temp": temp_on, "sugar": sugar_on,
             "spo2": spo2_on, "rr": rr_on, "weight": weight_on, "waist": waist_on, "bmi": bmi_on
-        }.items() if v]
-        save_json(CONFIG_FILE, CFG)
+        }.items() if v]}, DEFAULT_CONFIG)
         st.success("지표 설정 저장 완료")
 
     st.markdown("---")
     st.subheader("🔔 임계치 설정")
-    thr = CFG.get("thresholds", DEFAULT_CONFIG["thresholds"])
+    thr = {**DEFAULT_CONFIG["thresholds"], **CFG.get("thresholds", {})}
     c1, c2 = st.columns(2)
     with c1:
         thr["bp_sys_hi"] = st.number_input("수축기 고혈압 ≥", value=int(thr["bp_sys_hi"]))
@@ -236,17 +216,22 @@ with st.sidebar:
         thr["rr_lo"]     = st.number_input("호흡수 낮음 <",    value=int(thr["rr_lo"]))
         thr["rr_hi"]     = st.number_input("호흡수 높음 >",    value=int(thr["rr_hi"]))
     if st.button("저장(임계치)"):
-        CFG["thresholds"] = thr
-        save_json(CONFIG_FILE, CFG)
+        CFG = save_json(CONFIG_FILE, {"thresholds": thr}, DEFAULT_CONFIG)
         st.success("임계치 저장 완료")
 
     st.markdown("---")
     st.subheader("👤 프로필 (BMI 계산)")
     height_cm = st.number_input("키(cm)", min_value=0.0, step=0.1, value=float(PROFILE.get("height_cm") or 0.0))
     if st.button("프로필 저장"):
-        PROFILE["height_cm"] = height_cm if height_cm > 0 else None
-        save_json(PROFILE_FILE, PROFILE)
+        PROFILE = save_json(PROFILE_FILE, {"height_cm": height_cm if height_cm > 0 else None}, {"height_cm": None})
         st.success("프로필 저장 완료")
+    if PROFILE.get("height_cm") and st.button("기존 기록 BMI 채우기", help="체중만 있고 BMI가 없는 기록에 현재 키로 BMI를 계산해 넣습니다"):
+        # 체중 이력 전체를 배열 한 번으로 계산 → 저널 한 줄(put_many)로 저장
+        todo = [e for e in STORE.entries() if "bmi" not in e and isinstance(e.get("weight"), (int, float))]
+        vals = bmi([e["weight"] for e in todo], PROFILE["height_cm"]) if todo else []
+        filled = [{**e, "bmi": float(v)} for e, v in zip(todo, vals) if v == v]
+        STORE.append_many(filled)
+        st.success(f"BMI {len(filled):,}건 채움")
 
 # ---------------- 입력 폼 ----------------
 st.markdown("### 📥 오늘의 지표 입력 (단위 포함)")
@@ -318,16 +303,14 @@ if submitted:
 
     # BMI 자동 계산
     if PROFILE.get("height_cm") and ("weight" in entry) and ("bmi" in active_metrics) and ("bmi" not in entry):
-        h_m = float(PROFILE["height_cm"]) / 100
-        if h_m > 0:
-            entry["bmi"] = round(float(entry["weight"]) / (h_m ** 2), 2)
+        v = bmi(entry["weight"], PROFILE["height_cm"])
+        if v == v:
+            entry["bmi"] = v
 
     if memo.strip():
         entry["memo"] = memo.strip()
 
-    DB.setdefault("entries", []).append(entry)
-    DB["entries"].sort(key=lambda x: x["ts"], reverse=True)
-    save_json(DATA_FILE, DB)
+    STORE.append(entry)
 
     flags = abnormal_flags(entry, CFG["thresholds"]) or None
     if flags:
@@ -339,6 +322,23 @@ if submitted:
     else:
         st.success("기록 저장 완료!")
 
+# ---------------- 가져오기 (기기 내보내기 파일) ----------------
+with st.expander("📤 기록 가져오기 (CSV / JSON Lines)"):
+    st.caption("열 이름은 ts(또는 date+time), hr, bp 또는 sys/dia, temp, sugar … / 단위는 'temp(°F)'처럼 괄호나 temp_unit 열로 표시")
+    up = st.file_uploader("기기 내보내기 파일", type=["csv", "jsonl", "ndjson"])
+    if up is not None and st.button("가져오기", type="primary"):
+        try:
+            with st.spinner("가져오는 중…"):
+                res = import_file(STORE, up, detect_format(up.name), CFG["thresholds"])
+        except Exception as e:
+            # 청크마다 저장하므로 실패 전까지의 기록은 들어가 있음 — 같은 파일을 다시 가져오면 그 부분은 중복으로 건너뜀
+            st.error(f"가져오기 실패: {e} — 그 전까지 읽은 기록은 저장되었습니다. 문제를 고친 뒤 다시 가져오면 중복은 건너뜁니다.")
+        else:
+            st.success(f"{res['rows']:,}행 → {res['imported']:,}건 추가 (중복 {res['duplicates']:,} · 건너뜀 {res['skipped']:,}) "
+                       f"— {res['secs']:.1f}초, {res['rows_per_sec']:,.0f}행/초")
+            if res["flagged"]:
+                st.warning("가져온 기록 중 경고: " + ", ".join(f"{k} {v}건" for k, v in res["flagged"].items()))
+
 st.markdown("---")
 
 # ---------------- 조회 & 그래프 ----------------
@@ -366,22 +366,15 @@ else:
     start_dt = datetime.combine(start_d, datetime.min.time())
     end_dt   = datetime.combine(end_d, datetime.max.time())
 
-# 표
+# 표 (최신순 페이지 단위 — 경고 플래그는 임계치별로 전체 기록을 한 번에 계산해 둔 비트마스크에서)
+PAGE = paged("view", start_dt, end_dt, CFG["thresholds"], kw)
 rows: List[Dict[str, Any]] = []
-for r in DB.get("entries", []):
-    try:
-        ts = datetime.fromisoformat(r["ts"])
-    except Exception:
-        continue
-    if not (start_dt <= ts <= end_dt):
-        continue
-    if kw and kw not in r.get("memo", ""):
-        continue
+for ts, r, bits in zip(PAGE["dts"], PAGE["rows"], PAGE["flags"]):
     row = {"날짜": ts.strftime("%Y-%m-%d %H:%M")}
     for m in METRIC_META:
         if m in r:
             row[METRIC_META[m]["label"]] = r[m]
-    row["경고"] = abnormal_flags(r, CFG["thresholds"])
+    row["경고"] = decode_flags(int(bits))
     if "memo" in r:
         row["메모"] = r["memo"]
     rows.append(row)
@@ -392,62 +385,23 @@ if rows:
 else:
     st.info("조회 기간에 해당하는 기록이 없습니다")
 
-# 그래프
-series_x, series_y = [], []
+# 그래프 (컬럼 배열에서 바로 추출, 혈압은 bp_sys/bp_dia 컬럼)
+series_x, series_y = series(STORE.columns(start_dt, end_dt), metric_for_plot)
 
-def _parse_bp(bp):
-    try:
-        s, d = str(bp).split("/")
-        return int(s.strip()), int(d.strip())
-    except Exception:
-        return None, None
-
-for r in DB.get("entries", []):
-    try:
-        ts = datetime.fromisoformat(r["ts"])
-    except Exception:
-        continue
-    if not (start_dt <= ts <= end_dt):
-        continue
-
-    if metric_for_plot in ("bp_sys", "bp_dia"):
-        if "bp" in r:
-            s, d = _parse_bp(r["bp"])
-            val = s if metric_for_plot == "bp_sys" else d
-            if isinstance(val, (int, float)):
-                series_x.append(ts); series_y.append(float(val))
-    else:
-        v = r.get(metric_for_plot)
-        if isinstance(v, (int, float)):
-            series_x.append(ts); series_y.append(float(v))
-
-if series_x:
+if len(series_x):
     fig, ax = plt.subplots(figsize=(7.5, 3.5))
-    ax.plot(series_x, series_y, marker="o")
+    # 점이 그래프 폭보다 많으면 다운샘플링 (짧은 기간으로 좁혀 원본 확인 가능)
+    raw = st.checkbox("원본 데이터 모두 표시", value=False, help="기간을 좁혀 확대해 볼 때 사용")
+    if not raw:
+        n_raw = len(series_x)
+        series_x, series_y = thin_series(series_x, series_y, metric_for_plot, CFG["thresholds"],
+                                         int(fig.get_figwidth() * fig.dpi))
+        if len(series_x) < n_raw:
+            st.caption(f"{n_raw:,}개 중 {len(series_x):,}개 지점 표시 (임계치 경계 통과 지점 보존)")
+    ax.plot(series_x, series_y, marker="o" if len(series_x) <= 200 else None)
     title, unit = PLOT_META.get(metric_for_plot, (metric_for_plot, ""))
     ax.set_title(title); ax.set_ylabel(unit); ax.grid(True, alpha=0.3)
-    thr = CFG["thresholds"]; ymin, ymax = ax.get_ylim()
-
-    if metric_for_plot == "hr":
-        ax.axhspan(thr["hr_hi"], ymax, alpha=0.08)
-        ax.axhspan(ymin, thr["hr_lo"], alpha=0.08)
-    elif metric_for_plot == "temp":
-        ax.axhspan(thr["temp_hi"], ymax, alpha=0.08)
-    elif metric_for_plot == "sugar":
-        ax.axhspan(thr["sugar_very"], ymax, alpha=0.08)
-        ax.axhspan(thr["sugar_hi"], thr["sugar_very"], alpha=0.08)
-        ax.axhspan(ymin, thr["sugar_lo"], alpha=0.08)
-    elif metric_for_plot == "spo2":
-        ax.axhspan(ymin, thr["spo2_lo"], alpha=0.08)
-    elif metric_for_plot == "rr":
-        ax.axhspan(thr["rr_hi"], ymax, alpha=0.08)
-        ax.axhspan(ymin, thr["rr_lo"], alpha=0.08)
-    elif metric_for_plot == "bp_sys":
-        ax.axhspan(thr["bp_sys_very"], ymax, alpha=0.08)
-        ax.axhspan(thr["bp_sys_hi"], thr["bp_sys_very"], alpha=0.08)
-    elif metric_for_plot == "bp_dia":
-        ax.axhspan(thr["bp_dia_very"], ymax, alpha=0.08)
-        ax.axhspan(thr["bp_dia_hi"], thr["bp_dia_very"], alpha=0.08)
+    shade_thresholds(ax, metric_for_plot, CFG["thresholds"])
 
     st.pyplot(fig)
 
@@ -455,19 +409,32 @@ st.markdown("---")
 
 # ---------------- 기록 삭제 (선택/기간/전체) ----------------
 st.markdown("### 🗑️ 기록 삭제")
+
+def report_delete(d):
+    # 삭제 결과와 되돌리기용 tombstone은 이 세션에만 남김 (STORE는 모든 세션이 공유)
+    st.session_state["_del_msg"] = f"{d['count']}건 삭제 완료 ({d['secs']*1000:.0f} ms)"
+    if d["count"]:
+        st.session_state["_del_undo"] = d
+
+if st.session_state.get("_del_msg"):
+    st.success(st.session_state.pop("_del_msg"))
+_undo = st.session_state.get("_del_undo")
+if _undo:
+    if st.button(f"↩️ 마지막 삭제 되돌리기 ({_undo['count']}건)"):
+        n_undo = STORE.undo_delete(st.session_state.pop("_del_undo"))
+        st.session_state["_del_msg"] = f"{n_undo}건 복원 완료"
+        st.rerun()
+
 tab_sel, tab_rng, tab_all = st.tabs(["선택 삭제", "기간 삭제", "전체 삭제"])
 
 with tab_sel:
-    _now = datetime.now()
-    _start = _now - timedelta(days=30)
+    _start = datetime.combine(date.today() - timedelta(days=30), datetime.min.time())
+    # 선택은 id 집합으로 세션에 보관 → 페이지를 넘겨도 유지 (그 사이 지워진 id는 제외)
+    sel: set = st.session_state.setdefault("_del_sel", set())
+    sel.intersection_update([i for i in sel if i in STORE])
+    _pg = paged("del", _start, None)
     _rows = []
-    for r in DB.get("entries", []):
-        try:
-            ts = datetime.fromisoformat(r["ts"])
-        except Exception:
-            continue
-        if ts < _start:
-            continue
+    for ts, r in zip(_pg["dts"], _pg["rows"]):
         row = {"id": r.get("id"), "기록시각": ts.strftime("%Y-%m-%d %H:%M")}
         for m in ["bp","hr","temp","sugar","spo2","rr","weight","bmi"]:
             if m in r: row[METRIC_META[m]["label"]] = r[m]
@@ -476,19 +443,19 @@ with tab_sel:
 
     if _rows:
         df_edit = pd.DataFrame(_rows)
-        df_edit.insert(0, "삭제", False)
+        df_edit.insert(0, "삭제", df_edit["id"].isin(sel))
         edited = st.data_editor(
             df_edit, use_container_width=True, height=420,
             column_config={"삭제": st.column_config.CheckboxColumn(),
                            "id": st.column_config.TextColumn("id", width="small")},
-            hide_index=True,
+            hide_index=True, key=f"del_editor_{_pg['page']}",
         )
-        ids_to_del = edited.loc[edited["삭제"]==True, "id"].dropna().tolist()
-        if st.button("선택 항목 삭제", type="primary", disabled=(len(ids_to_del)==0)):
-            before = len(DB["entries"])
-            DB["entries"] = [e for e in DB["entries"] if e.get("id") not in ids_to_del]
-            save_json(DATA_FILE, DB)
-            st.success(f"{len(ids_to_del)}건 삭제 완료")
+        for _id, on in zip(edited["id"], edited["삭제"]):
+            (sel.add if on else sel.discard)(_id)
+        if st.button(f"선택 항목 삭제 ({len(sel)}건)", type="primary", disabled=(len(sel)==0)):
+            res = STORE.delete(sel)
+            sel.clear()
+            report_delete(res)
             st.rerun()
     else:
         st.info("최근 30일 내 표시할 기록이 없습니다.")
@@ -502,30 +469,19 @@ with tab_rng:
     del_start_dt = datetime.combine(del_start, datetime.min.time())
     del_end_dt   = datetime.combine(del_end,   datetime.max.time())
 
-    cand = []
-    for e in DB.get("entries", []):
-        try:
-            ts = datetime.fromisoformat(e["ts"])
-        except Exception:
-            continue
-        if del_start_dt <= ts <= del_end_dt:
-            cand.append(e)
-    st.write(f"삭제 대상 미리보기: **{len(cand)}건**")
+    n_rng = len(STORE.range(del_start_dt, del_end_dt))
+    st.write(f"삭제 대상 미리보기: **{n_rng}건**")
 
     confirm_rng = st.checkbox("정말 삭제하겠습니다(기간 삭제)")
     if st.button("기간 내 모두 삭제", type="primary", disabled=not confirm_rng):
-        DB["entries"] = [e for e in DB["entries"] if e not in cand]
-        save_json(DATA_FILE, DB)
-        st.success(f"{len(cand)}건 삭제 완료")
+        report_delete(STORE.delete_range(del_start_dt, del_end_dt))
         st.rerun()
 
 with tab_all:
-    st.error("⚠️ 주의: 전체 삭제는 되돌릴 수 없습니다.")
+    st.error("⚠️ 주의: 되돌리기는 마지막 삭제 1회만, 앱이 실행 중일 때만 가능합니다.")
     confirm_text = st.text_input("확인 문구로 DELETE 를 입력하세요", value="")
     if st.button("모든 기록 삭제", type="primary", disabled=(confirm_text.strip()!="DELETE")):
-        DB["entries"] = []
-        save_json(DATA_FILE, DB)
-        st.success("모든 기록을 삭제했습니다.")
+        report_delete(STORE.clear())
         st.rerun()
 
 # ---------------- PDF ----------------
@@ -535,48 +491,28 @@ span_days = 7 if report_span == "최근 7일" else 30
 rep_start = date.today() - timedelta(days=span_days-1)
 rep_end   = date.today()
 
+# 렌더링은 프로세스 풀에서, 결과는 (기간, 데이터 버전, 임계치) 키로 캐시 → 같은 리포트는 즉시 다운로드
+rep_key = (rep_start, rep_end, STORE.version, thresholds_key(CFG["thresholds"]))
+job = JOBS.get(rep_key)
 if st.button("PDF 생성"):
-    xs, hr_v, temp_v, sugar_v = [], [], [], []
-    for r in DB.get("entries", []):
-        try:
-            ts = datetime.fromisoformat(r["ts"]).date()
-        except Exception:
-            continue
-        if not (rep_start <= ts <= rep_end):
-            continue
-        xs.append(ts)
-        hr_v.append(r.get("hr")); temp_v.append(r.get("temp")); sugar_v.append(r.get("sugar"))
-
-    pdf_io = BytesIO()
-    with PdfPages(pdf_io) as pdf:
-        # 요약
-        fig = plt.figure(figsize=(8.27, 11.69)); plt.axis('off')
-        lines = [ "바디로그 리포트",
-                  f"기간: {rep_start.isoformat()} ~ {rep_end.isoformat()}","" ]
-        def stat_line(name, arr):
-            vals = [float(v) for v in arr if isinstance(v, (int, float))]
-            return f"- {name}: 평균 {np.mean(vals):.1f}, 최솟값 {np.min(vals):.1f}, 최댓값 {np.max(vals):.1f}" if vals else f"- {name}: 데이터 없음"
-        lines += [stat_line("심박수(bpm)", hr_v), stat_line("체온(°C)", temp_v), stat_line("혈당(mg/dL)", sugar_v)]
-        plt.text(0.1, 0.9, "\n".join(lines), fontsize=14, va='top'); pdf.savefig(fig); plt.close(fig)
-
-        def plot_series(dates, vals, title, unit, shade_cb=None):
-            fig, ax = plt.subplots(figsize=(8.27, 4))
-            dd, vv = [], []
-            for d, v in zip(dates, vals):
-                if isinstance(v, (int, float)): dd.append(d); vv.append(float(v))
-            if dd:
-                ax.plot(dd, vv, marker='o'); ax.set_title(title); ax.set_ylabel(unit); ax.grid(True, alpha=0.3)
-                if shade_cb: shade_cb(ax)
-            else:
-                ax.text(0.5,0.5,'데이터 없음', ha='center', va='center'); ax.set_axis_off()
-            pdf.savefig(fig); plt.close(fig)
-
-        thr = CFG["thresholds"]
-        plot_series(xs, hr_v,   "심박수(bpm)", "bpm", lambda ax: (ax.axhspan(thr["hr_hi"], ax.get_ylim()[1], alpha=0.08), ax.axhspan(ax.get_ylim()[0], thr["hr_lo"], alpha=0.08)))
-        plot_series(xs, temp_v, "체온(°C)",    "°C",  lambda ax: ax.axhspan(thr["temp_hi"], ax.get_ylim()[1], alpha=0.08))
-        plot_series(xs, sugar_v,"혈당(mg/dL)","mg/dL",lambda ax: (ax.axhspan(thr["sugar_very"], ax.get_ylim()[1], alpha=0.08), ax.axhspan(thr["sugar_hi"], thr["sugar_very"], alpha=0.08), ax.axhspan(ax.get_ylim()[0], thr["sugar_lo"], alpha=0.08)))
-    pdf_io.seek(0)
-    st.download_button("PDF 다운로드", data=pdf_io.getvalue(), file_name=f"bodylog_report_{rep_start.isoformat()}_{rep_end.isoformat()}.pdf", mime="application/pdf")
+    rep_cols = STORE.columns(datetime.combine(rep_start, datetime.min.time()),
+                             datetime.combine(rep_end, datetime.max.time()))
+    job = JOBS.submit(rep_key, rep_cols, STORE.summary(rep_start, rep_end), rep_start, rep_end, CFG["thresholds"])
+
+if job is not None:
+    if not job.done():
+        with st.status("PDF 생성 중…") as status:
+            t0 = time.perf_counter()
+            while not job.done():
+                time.sleep(0.2)
+                status.update(label=f"PDF 생성 중… {time.perf_counter() - t0:.1f}초")
+            status.update(label=f"PDF 생성 완료 ({time.perf_counter() - t0:.1f}초)", state="complete")
+    try:
+        pdf_bytes = job.result()
+    except Exception as e:
+        st.error(f"PDF 생성 중 오류: {e}")
+    else:
+        st.download_button("PDF 다운로드", data=pdf_bytes, file_name=f"bodylog_report_{rep_start.isoformat()}_{rep_end.isoformat()}.pdf", mime="application/pdf")
 
 # ---------------- Footer ----------------
 st.markdown("---")
@@ -1,40 +1,87 @@
 import streamlit as st
 import json
-import os
+import threading
 from datetime import datetime, date, timedelta
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
-# 데이터 파일 경로
+from downsample import downsample, max_points_for
+from jsonio import CorruptFile, load_json, quarantine, update_json
+from rollup import Rollup
+from vital_store import PartitionedStore, RetentionJob
+
+# 데이터 경로 (월별 파티션 폴더, 예전 단일 파일은 처음 실행 시 자동 이전)
 DATA_FILE = "vital_data.json"
+DATA_DIR = "vital_data"
+CONFIG_FILE = "vital_config.json"
+DEFAULT_CONFIG = {
+    "retention_days": 730,          # 2년치 데이터만 유지
+    "retention_interval_hours": 24,  # 정리 작업 주기
+}
+
+# 차트 가로 픽셀 가정값 (wide 레이아웃) → 트레이스당 점 개수 상한
+CHART_WIDTH_PX = 1200
+
+@st.cache_resource
+def open_store():
+    return PartitionedStore(DATA_DIR, legacy=DATA_FILE)
+
+STORE = open_store()
+
+# 설정 로드/저장 (잠금 + 원자적 쓰기, 바꾼 키만 병합해 다른 세션의 저장을 덮어쓰지 않음)
+def load_config():
+    try:
+        return {**DEFAULT_CONFIG, **load_json(CONFIG_FILE, {}, strict=True)}
+    except CorruptFile:
+        backup = quarantine(CONFIG_FILE)
+        st.warning(f"설정 파일이 손상되어 {backup.name} 로 보관하고 기본값을 사용합니다.")
+        return dict(DEFAULT_CONFIG)
+
+def save_config(changes):
+    return {**DEFAULT_CONFIG, **update_json(CONFIG_FILE, lambda cur: {**cur, **changes}, {})}
 
-# 데이터 로드 함수
+CFG = load_config()
+
+# 보관 기간 정리는 백그라운드 주기 작업 (지난 달 파티션은 파일째 삭제)
+@st.cache_resource
+def retention_job():
+    return RetentionJob(STORE, CFG["retention_days"], CFG["retention_interval_hours"])
+
+RETENTION = retention_job()
+
+# 데이터 로드 함수 (전체 — 내려받기/집계 재구성용)
 def load_data():
-    if os.path.exists(DATA_FILE):
-        try:
-            with open(DATA_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return {}
-    return {}
+    return STORE.load_all()
 
-# 데이터 저장 함수
-def save_data(data):
-    # 2년치 데이터만 유지 (730일)
-    cutoff_date = (datetime.now() - timedelta(days=730)).strftime('%Y-%m-%d')
-    filtered_data = {k: v for k, v in data.items() if k >= cutoff_date}
-    
-    with open(DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(filtered_data, f, ensure_ascii=False, indent=2)
+# 일별/주별 집계 (프로세스 공유, 파일이 밖에서 바뀌면 재구성)
+ROLLUP_COLUMNS = {
+    "systolic": "수축기혈압", "diastolic": "이완기혈압", "pulse": "맥박",
+    "temperature": "체온", "blood_sugar": "혈당", "spo2": "SPO2",
+}
+
+@st.cache_resource
+def _rollup_holder():
+    return {"sig": (), "rollup": None, "lock": threading.Lock()}
 
-# 바이탈 데이터 입력 함수
+def _day_entries(day):
+    return STORE.load_range(day, day).get(day.strftime('%Y-%m-%d'), [])
+
+def get_rollup():
+    h = _rollup_holder()
+    with h["lock"]:
+        sig = STORE.signature()
+        if h["sig"] != sig:
+            r = Rollup(ROLLUP_COLUMNS, source=_day_entries)
+            for date_str, entries in load_data().items():
+                day = datetime.strptime(date_str, '%Y-%m-%d').date()
+                for entry in entries:
+                    r.add(day, entry)
+            h["rollup"], h["sig"] = r, sig
+        return h["rollup"]
+
+# 바이탈 데이터 입력 함수 (해당 달 파티션 하나만 다시 씀)
 def add_vital_data(date_str, time_str, systolic, diastolic, pulse, temperature, blood_sugar, spo2):
-    data = load_data()
-    
-    if date_str not in data:
-        data[date_str] = []
-    
     vital_entry = {
         "time": time_str,
         "systolic": systolic,
@@ -46,23 +93,20 @@ def add_vital_data(date_str, time_str, systolic, diastolic, pulse, temperature,
         "timestamp": datetime.now().isoformat()
     }
     
-    data[date_str].append(vital_entry)
-    save_data(data)
+    before, after = STORE.add(date_str, vital_entry)
+
+    # 집계가 쓰기 직전 상태였으면 새 기록 1건만 반영 (전체 재집계 없음).
+    # 그 사이 다른 프로세스가 썼으면 signature를 그대로 두어 다음 조회에서 재구성되게 한다.
+    h = _rollup_holder()
+    with h["lock"]:
+        if h["rollup"] is not None and h["sig"] == before:
+            h["rollup"].add(datetime.strptime(date_str, '%Y-%m-%d').date(), vital_entry)
+            h["sig"] = after
     return True
 
-# 데이터 조회 함수
+# 데이터 조회 함수 (기간과 겹치는 달 파티션만 읽음)
 def get_data_range(start_date, end_date):
-    data = load_data()
-    result = {}
-    
-    current_date = start_date
-    while current_date <= end_date:
-        date_str = current_date.strftime('%Y-%m-%d')
-        if date_str in data:
-            result[date_str] = data[date_str]
-        current_date += timedelta(days=1)
-    
-    return result
+    return STORE.load_range(start_date, end_date)
 
 # DataFrame 변환 함수
 def data_to_dataframe(data):
@@ -83,6 +127,15 @@ def data_to_dataframe(data):
     
     return pd.DataFrame(rows)
 
+# 차트용 다운샘플링 (트레이스별로 폭에 맞게 점 수 제한)
+def thin(df, col, raw=False):
+    if raw or len(df) <= max_points_for(CHART_WIDTH_PX):
+        return df
+    sub = df[df[col].notna()]
+    idx = downsample(sub['datetime'].values.astype('int64'), sub[col].to_numpy(dtype=float),
+                     max_points_for(CHART_WIDTH_PX))
+    return sub.iloc[idx]
+
 # Streamlit 앱 시작
 st.set_page_config(page_title="바이탈 입력 로그", page_icon="🏥", layout="wide")
 
@@ -165,25 +218,27 @@ elif menu == "📊 데이터 조회":
     if data:
         df = data_to_dataframe(data)
         
-        # 통계 정보
+        # 통계 정보 (일별 집계에서 O(일수)로 계산)
         if not df.empty:
+            summary = get_rollup().summary(start_date, end_date)
+            avg = lambda k: summary[k]["mean"] if k in summary else float("nan")
             st.subheader("📈 통계 요약")
             col1, col2, col3, col4 = st.columns(4)
             
             with col1:
                 st.metric("총 측정 횟수", len(df))
-                st.metric("평균 수축기혈압", f"{df['수축기혈압'].mean():.1f}")
+                st.metric("평균 수축기혈압", f"{avg('systolic'):.1f}")
             
             with col2:
-                st.metric("평균 맥박", f"{df['맥박'].mean():.1f}")
-                st.metric("평균 이완기혈압", f"{df['이완기혈압'].mean():.1f}")
+                st.metric("평균 맥박", f"{avg('pulse'):.1f}")
+                st.metric("평균 이완기혈압", f"{avg('diastolic'):.1f}")
             
             with col3:
-                st.metric("평균 체온", f"{df['체온'].mean():.1f}°C")
-                st.metric("평균 혈당", f"{df['혈당'].mean():.1f}")
+                st.metric("평균 체온", f"{avg('temperature'):.1f}°C")
+                st.metric("평균 혈당", f"{avg('blood_sugar'):.1f}")
             
             with col4:
-                st.metric("평균 SPO2", f"{df['SPO2'].mean():.1f}%")
+                st.metric("평균 SPO2", f"{avg('spo2'):.1f}%")
         
         st.subheader("📋 상세 데이터")
         
@@ -221,35 +276,39 @@ elif menu == "📈 차트 분석":
         # 차트 옵션
         chart_option = st.selectbox(
             "차트 선택",
-            ["혈압 추이", "맥박 추이", "체온 추이", "혈당 추이", "SPO2 추이", "전체 비교"]
+            ["혈압 추이", "맥박 추이", "체온 추이", "혈당 추이", "SPO2 추이", "전체 비교", "주간 평균 추이"]
         )
+        raw = st.checkbox("원본 데이터 모두 표시", value=False, help="기간을 좁혀 확대해 볼 때 사용")
+        if not raw and len(df) > max_points_for(CHART_WIDTH_PX):
+            st.caption(f"측정 {len(df):,}건 — 차트는 트레이스당 최대 {max_points_for(CHART_WIDTH_PX):,}개 지점으로 다운샘플링")
         
         if chart_option == "혈압 추이":
             fig = go.Figure()
-            fig.add_trace(go.Scatter(x=df['datetime'], y=df['수축기혈압'], 
+            sys_df, dia_df = thin(df, '수축기혈압', raw), thin(df, '이완기혈압', raw)
+            fig.add_trace(go.Scatter(x=sys_df['datetime'], y=sys_df['수축기혈압'], 
                                    mode='lines+markers', name='수축기혈압', line=dict(color='red')))
-            fig.add_trace(go.Scatter(x=df['datetime'], y=df['이완기혈압'], 
+            fig.add_trace(go.Scatter(x=dia_df['datetime'], y=dia_df['이완기혈압'], 
                                    mode='lines+markers', name='이완기혈압', line=dict(color='blue')))
             fig.update_layout(title="혈압 추이", yaxis_title="mmHg")
             st.plotly_chart(fig, use_container_width=True)
             
         elif chart_option == "맥박 추이":
-            fig = px.line(df, x='datetime', y='맥박', title='맥박 추이', markers=True)
+            fig = px.line(thin(df, '맥박', raw), x='datetime', y='맥박', title='맥박 추이', markers=True)
             fig.update_layout(yaxis_title="bpm")
             st.plotly_chart(fig, use_container_width=True)
             
         elif chart_option == "체온 추이":
-            fig = px.line(df, x='datetime', y='체온', title='체온 추이', markers=True)
+            fig = px.line(thin(df, '체온', raw), x='datetime', y='체온', title='체온 추이', markers=True)
             fig.update_layout(yaxis_title="°C")
             st.plotly_chart(fig, use_container_width=True)
             
         elif chart_option == "혈당 추이":
-            fig = px.line(df, x='datetime', y='혈당', title='혈당 추이', markers=True)
+            fig = px.line(thin(df, '혈당', raw), x='datetime', y='혈당', title='혈당 추이', markers=True)
             fig.update_layout(yaxis_title="mg/dL")
             st.plotly_chart(fig, use_container_width=True)
             
         elif chart_option == "SPO2 추이":
-            fig = px.line(df, x='datetime', y='SPO2', title='SPO2 추이', markers=True)
+            fig = px.line(thin(df, 'SPO2', raw), x='datetime', y='SPO2', title='SPO2 추이', markers=True)
             fig.update_layout(yaxis_title="%")
             st.plotly_chart(fig, use_container_width=True)
             
@@ -264,8 +323,9 @@ elif menu == "📈 차트 분석":
             metrics = ['수축기혈압', '이완기혈압', '맥박', '체온', '혈당', 'SPO2']
             
             for i, metric in enumerate(metrics):
-                fig.add_trace(go.Scatter(x=normalized_df['datetime'], 
-                                       y=normalized_df[f'{metric}_norm'],
+                trace_df = thin(normalized_df, f'{metric}_norm', raw)
+                fig.add_trace(go.Scatter(x=trace_df['datetime'], 
+                                       y=trace_df[f'{metric}_norm'],
                                        mode='lines+markers', 
                                        name=metric, 
                                        line=dict(color=colors[i])))
@@ -273,35 +333,47 @@ elif menu == "📈 차트 분석":
             fig.update_layout(title="전체 바이탈 비교 (정규화된 값)", yaxis_title="정규화된 값 (%)")
             st.plotly_chart(fig, use_container_width=True)
             st.info("💡 모든 지표를 0-100% 범위로 정규화하여 비교 표시합니다.")
+
+        elif chart_option == "주간 평균 추이":
+            # 원본 기록 대신 주별 집계에서 바로 그림
+            weeks = get_rollup().weekly(chart_start_date, chart_end_date)
+            wdf = pd.DataFrame([
+                {'주': wk, **{ROLLUP_COLUMNS[k]: s["mean"] for k, s in stats.items()}}
+                for wk, stats in weeks
+            ])
+            metric = st.selectbox("지표", list(ROLLUP_COLUMNS.values()))
+            if metric in wdf.columns:
+                fig = px.line(wdf, x='주', y=metric, title=f'{metric} 주간 평균 추이', markers=True)
+                st.plotly_chart(fig, use_container_width=True)
+                st.caption("ISO 주(월요일 시작) 단위 평균")
+            else:
+                st.info("해당 기간에 주간 데이터가 없습니다.")
     else:
         st.info("해당 기간에 차트로 표시할 데이터가 없습니다.")
 
 elif menu == "🗃️ 데이터 관리":
     st.header("데이터 관리")
     
-    data = load_data()
-    total_entries = sum(len(entries) for entries in data.values())
+    # 현황은 manifest만으로 계산 (파티션 파일을 열지 않음)
+    stats = STORE.stats()
     
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("📊 저장된 데이터 현황")
-        st.metric("총 저장 일수", len(data))
-        st.metric("총 측정 기록", total_entries)
+        st.metric("총 저장 일수", stats["days"])
+        st.metric("총 측정 기록", stats["entries"])
         
-        if data:
-            dates = list(data.keys())
-            earliest_date = min(dates)
-            latest_date = max(dates)
-            st.metric("가장 오래된 기록", earliest_date)
-            st.metric("가장 최근 기록", latest_date)
+        if stats["days"]:
+            st.metric("가장 오래된 기록", stats["first"])
+            st.metric("가장 최근 기록", stats["last"])
     
     with col2:
         st.subheader("🔧 데이터 관리 도구")
         
         # JSON 다운로드
         if st.button("💾 JSON 파일 다운로드"):
-            json_str = json.dumps(data, ensure_ascii=False, indent=2)
+            json_str = json.dumps(load_data(), ensure_ascii=False, indent=2)
             st.download_button(
                 label="다운로드",
                 data=json_str,
@@ -309,17 +381,31 @@ elif menu == "🗃️ 데이터 관리":
                 mime="application/json"
             )
         
-        # 데이터 정리
-        if st.button("🧹 오래된 데이터 정리 (2년 이상)", type="secondary"):
-            old_count = len(data)
-            save_data(data)  # 2년 필터링이 적용됨
-            new_data = load_data()
-            new_count = len(new_data)
-            removed = old_count - new_count
-            if removed > 0:
-                st.success(f"✅ {removed}일의 오래된 데이터가 정리되었습니다.")
+        # 데이터 정리 (백그라운드 주기 작업 — 설정 및 즉시 실행)
+        st.markdown("**🧹 보관 기간 정리**")
+        rc1, rc2 = st.columns(2)
+        with rc1:
+            keep_days = st.number_input("보관 기간(일)", min_value=30, step=30, value=int(CFG["retention_days"]))
+        with rc2:
+            every_h = st.number_input("정리 주기(시간)", min_value=1, step=1, value=int(CFG["retention_interval_hours"]))
+        if st.button("설정 저장(보관 기간)"):
+            CFG = save_config({"retention_days": int(keep_days), "retention_interval_hours": int(every_h)})
+            RETENTION.configure(CFG["retention_days"], CFG["retention_interval_hours"])
+            st.success("보관 기간 설정 저장 완료 — 정리 작업이 새 설정으로 실행됩니다.")
+
+        if st.button("🧹 지금 정리 실행", type="secondary"):
+            res = RETENTION.run_now()
+            if res.get("error"):
+                st.error(f"정리 중 오류: {res['error']}")
+            elif res["days"] > 0:
+                st.success(f"✅ {res['days']}일({res['entries']}건)의 오래된 데이터가 정리되었습니다. ({res['secs']:.2f}초)")
             else:
                 st.info("정리할 오래된 데이터가 없습니다.")
+        elif RETENTION.last:
+            last = RETENTION.last
+            next_run = RETENTION.next_run.strftime('%Y-%m-%d %H:%M') if RETENTION.next_run else "-"
+            st.caption(f"마지막 정리: {last['ran_at']} — {last['days']}일/{last['entries']}건 삭제, "
+                       f"{last['secs']:.2f}초 (기준일 {last['cutoff']}) · 다음 실행: {next_run}")
         
         # 전체 데이터 삭제 (위험한 작업)
         st.markdown("---")
@@ -332,8 +418,7 @@ elif menu == "🗃️ 데이터 관리":
                 st.session_state.confirm_delete = True
                 st.warning("⚠️ 정말로 모든 데이터를 삭제하시겠습니까? 다시 한 번 버튼을 클릭하세요.")
             else:
-                if os.path.exists(DATA_FILE):
-                    os.remove(DATA_FILE)
+                STORE.clear()
                 st.success("✅ 모든 데이터가 삭제되었습니다.")
                 st.session_state.confirm_delete = False
 
@@ -342,5 +427,5 @@ st.markdown("---")
 st.markdown("**💡 사용법:**")
 st.markdown("- 좌측 메뉴에서 원하는 기능을 선택하세요")
 st.markdown("- 데이터는 자동으로 JSON 형식으로 저장됩니다")
-st.markdown("- 최대 2년치 데이터가 보관되며, 그 이후 데이터는 자동 삭제됩니다")
+st.markdown(f"- 최대 {CFG['retention_days']}일치 데이터가 보관되며, 그 이후 데이터는 주기적으로 자동 삭제됩니다")
 st.markdown("- 차트 분석에서 다양한 시각화를 확인할 수 있습니다")
\ No newline at end of file
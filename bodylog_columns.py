@@ -0,0 +1,153 @@
+from functools import lru_cache
+from typing import Dict, Any, List, Tuple, Iterable
+
+import numpy as np
+
+from bodylog_meta import METRIC_META
+
+# METRIC_META 기준 수치 컬럼 (혈압은 수축/이완 두 컬럼으로 분리)
+COLUMN_KEYS: List[str] = []
+for _m in METRIC_META:
+    COLUMN_KEYS += ["bp_sys", "bp_dia"] if _m == "bp" else [_m]
+
+
+def parse_bp(bp_str: str) -> Tuple[int | None, int | None]:
+    try:
+        s, d = str(bp_str).split("/")
+        return int(s.strip()), int(d.strip())
+    except Exception:
+        return None, None
+
+
+def entry_values(e: Dict[str, Any]) -> Dict[str, float]:
+    # 기록 1건 → 컬럼별 float (없거나 숫자가 아니면 NaN)
+    out = {}
+    for k in COLUMN_KEYS:
+        if k in ("bp_sys", "bp_dia"):
+            continue
+        v = e.get(k)
+        out[k] = float(v) if isinstance(v, (int, float)) else np.nan
+    s, d = parse_bp(e["bp"]) if "bp" in e else (None, None)
+    out["bp_sys"] = float(s) if s else np.nan
+    out["bp_dia"] = float(d) if d else np.nan
+    return out
+
+
+class VitalColumns:
+    """ts(int64, epoch 초) + 지표별 float64 배열. 저장소의 오름차순 행 순서와 1:1로 맞춘다.
+
+    배열은 용량을 두 배씩 늘려 끝에 추가하는 경우 상각 O(1), 중간 삽입/삭제는 memmove 한 번.
+    """
+
+    def __init__(self, keys: Iterable[str] = COLUMN_KEYS, capacity: int = 1024):
+        self.keys = list(keys)
+        self.n = 0
+        self._alloc(capacity)
+
+    def _alloc(self, cap: int):
+        self.ts = np.zeros(cap, dtype=np.int64)
+        self.cols = {k: np.full(cap, np.nan) for k in self.keys}
+
+    def _grow(self, need: int):
+        cap = len(self.ts)
+        if need <= cap:
+            return
+        while cap < need:
+            cap *= 2
+        ts, cols, n = self.ts, self.cols, self.n
+        self._alloc(cap)
+        self.ts[:n] = ts[:n]
+        for k in self.keys:
+            self.cols[k][:n] = cols[k][:n]
+
+    def rebuild(self, ts: List[float], rows: List[Dict[str, Any]]):
+        self.n = 0
+        self._alloc(max(1024, len(rows) * 2))
+        self.n = len(rows)
+        self.ts[:self.n] = np.asarray(ts, dtype=np.int64)
+        for i, e in enumerate(rows):
+            for k, v in entry_values(e).items():
+                self.cols[k][i] = v
+
+    def insert(self, i: int, t: float, values: Dict[str, float]):
+        self._grow(self.n + 1)
+        n = self.n
+        if i < n:
+            self.ts[i + 1:n + 1] = self.ts[i:n]
+            for k in self.keys:
+                self.cols[k][i + 1:n + 1] = self.cols[k][i:n]
+        self.ts[i] = int(t)
+        for k, v in values.items():
+            self.cols[k][i] = v
+        self.n = n + 1
+
+    def remove(self, i: int):
+        n = self.n
+        self.ts[i:n - 1] = self.ts[i + 1:n]
+        for k in self.keys:
+            self.cols[k][i:n - 1] = self.cols[k][i + 1:n]
+            self.cols[k][n - 1] = np.nan
+        self.n = n - 1
+
+    def take(self, keep: List[int]):
+        idx = np.asarray(keep, dtype=np.int64)
+        m = len(idx)
+        self.ts[:m] = self.ts[idx]
+        for k in self.keys:
+            self.cols[k][:m] = self.cols[k][idx]
+            self.cols[k][m:self.n] = np.nan
+        self.n = m
+
+    def slice(self, lo: int, hi: int) -> Dict[str, np.ndarray]:
+        # 복사본을 돌려줌 (다른 세션의 삽입으로 배열이 밀려도 안전)
+        out = {"ts": self.ts[lo:hi].copy()}
+        for k in self.keys:
+            out[k] = self.cols[k][lo:hi].copy()
+        return out
+
+
+def series(cols: Dict[str, np.ndarray], key: str) -> Tuple[np.ndarray, np.ndarray]:
+    # 값이 있는 지점만 (datetime64[s], float) 배열로
+    y = cols[key]
+    ok = ~np.isnan(y)
+    return cols["ts"][ok].astype("datetime64[s]"), y[ok]
+
+
+# ---------------- 경고 플래그 (비트마스크) ----------------
+# 비트 순서 = 표시 순서
+FLAG_LABELS = ["혈압 매우 높음", "혈압 높음", "심박 비정상", "고열", "혈당 위험", "혈당 높음", "저산소", "호흡수 이상"]
+
+
+def thresholds_key(thr: Dict[str, Any]) -> Tuple:
+    return tuple(sorted((k, float(v)) for k, v in thr.items()))
+
+
+def flag_bits(cols: Dict[str, np.ndarray], thr: Dict[str, Any]) -> np.ndarray:
+    """컬럼 배열 전체에 대해 한 번에 임계치 비교 → 기록별 uint16 비트마스크.
+
+    NaN(값 없음)과의 비교는 항상 False라 누락 지표는 자연히 경고 없음.
+    """
+    s, d = cols["bp_sys"], cols["bp_dia"]
+    hr, temp, sugar, spo2, rr = cols["hr"], cols["temp"], cols["sugar"], cols["spo2"], cols["rr"]
+    bp_very = (s >= thr["bp_sys_very"]) | (d >= thr["bp_dia_very"])
+    sugar_risk = (sugar >= thr["sugar_very"]) | (sugar <= thr["sugar_lo"])
+    masks = [
+        bp_very,
+        ~bp_very & ((s >= thr["bp_sys_hi"]) | (d >= thr["bp_dia_hi"])),
+        (hr < thr["hr_lo"]) | (hr > thr["hr_hi"]),
+        temp >= thr["temp_hi"],
+        sugar_risk,
+        ~sugar_risk & (sugar >= thr["sugar_hi"]),
+        spo2 < thr["spo2_lo"],
+        (rr < thr["rr_lo"]) | (rr > thr["rr_hi"]),
+    ]
+    bits = np.zeros(len(s), dtype=np.uint16)
+    for i, m in enumerate(masks):
+        bits |= m.astype(np.uint16) << i
+    return bits
+
+
+@lru_cache(maxsize=256)
+def decode_flags(bits: int) -> str:
+    # 비트마스크 → 기존 표시 문자열 ("혈압 높음, 고열")
+    return ", ".join(label for i, label in enumerate(FLAG_LABELS) if bits >> i & 1)
@@ -0,0 +1,266 @@
+import argparse
+import csv
+import io
+import json
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Tuple, Iterator, IO
+from uuid import uuid4
+
+import numpy as np
+
+from bodylog_columns import COLUMN_KEYS, FLAG_LABELS, entry_values, flag_bits
+from bodylog_meta import DEFAULT_CONFIG, METRIC_META
+
+# 한 번에 정규화/플래그 평가하는 행 수 (메모리 상한)
+CHUNK_ROWS = 5000
+
+# 기기 내보내기 파일의 열 이름 → METRIC_META 키 (소문자, 괄호 단위 제거 후 비교)
+ALIASES = {
+    "ts": ["ts", "timestamp", "datetime", "date_time", "measured_at", "기록시각", "측정시각", "일시"],
+    "date": ["date", "날짜"],
+    "time": ["time", "시간"],
+    "bp": ["bp", "blood_pressure", "혈압"],
+    "bp_sys": ["bp_sys", "sys", "systolic", "수축기"],
+    "bp_dia": ["bp_dia", "dia", "diastolic", "이완기"],
+    "hr": ["hr", "heart_rate", "pulse", "bpm", "심박수", "맥박"],
+    "temp": ["temp", "temperature", "body_temp", "체온"],
+    "sugar": ["sugar", "glucose", "blood_sugar", "bg", "혈당"],
+    "spo2": ["spo2", "sp02", "oxygen", "산소포화도"],
+    "rr": ["rr", "resp", "respiratory_rate", "호흡수"],
+    "weight": ["weight", "체중"],
+    "waist": ["waist", "허리둘레"],
+    "bmi": ["bmi"],
+    "memo": ["memo", "note", "notes", "comment", "메모"],
+}
+for _k, _m in METRIC_META.items():
+    ALIASES.setdefault(_k, []).append(re.sub(r"\(.*?\)", "", _m["label"]).strip().lower())
+_ALIAS = {a: k for k, names in ALIASES.items() for a in names}
+
+# (지표, 입력 단위) → METRIC_META 단위로 바꾸는 함수
+UNIT_CONVERT = {
+    ("temp", "°f"): lambda v: (v - 32) / 1.8, ("temp", "f"): lambda v: (v - 32) / 1.8,
+    ("sugar", "mmol/l"): lambda v: v * 18.0,
+    ("weight", "lb"): lambda v: v * 0.45359237, ("weight", "lbs"): lambda v: v * 0.45359237,
+    ("waist", "in"): lambda v: v * 2.54, ("waist", "inch"): lambda v: v * 2.54,
+}
+
+
+# ---------------- 읽기 (스트리밍) ----------------
+def _text(f: IO) -> IO[str]:
+    # 업로드 파일(바이트) / 열린 텍스트 파일 모두 줄 단위로 읽도록. 디코딩할 수 없는 바이트는 U+FFFD로 바꿔
+    # 그 행만 건너뛴다 (예외로 가져오기 전체가 멈추지 않게)
+    if isinstance(f, io.TextIOBase):
+        return f
+    return io.TextIOWrapper(f, encoding="utf-8-sig", errors="replace", newline="")
+
+
+def _csv_rows(text: IO[str]) -> Iterator[Dict[str, Any] | None]:
+    reader = csv.DictReader(text)
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error:
+            yield None  # NUL 바이트 등 CSV로 읽을 수 없는 줄
+            continue
+        yield None if any("\ufffd" in str(v) for v in row.values()) else row
+
+
+def _jsonl_rows(text: IO[str]) -> Iterator[Dict[str, Any] | None]:
+    for line in text:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:  # JSONDecodeError 포함
+            yield None
+            continue
+        yield row if isinstance(row, dict) and "\ufffd" not in line else None
+
+
+def read_chunks(f: IO, fmt: str, chunk: int = CHUNK_ROWS) -> Iterator[List[Dict[str, Any] | None]]:
+    """CSV / JSON Lines를 chunk행씩 dict 목록으로. 파일 전체를 메모리에 올리지 않는다.
+
+    깨진 줄(JSON 오류, 객체가 아닌 줄, 디코딩 불가 바이트, CSV 오류)은 None으로 넘긴다.
+    """
+    text = _text(f)
+    rows = _csv_rows(text) if fmt == "csv" else _jsonl_rows(text)
+    buf = []
+    for row in rows:
+        buf.append(row)
+        if len(buf) >= chunk:
+            yield buf
+            buf = []
+    if buf:
+        yield buf
+
+
+# ---------------- 정규화 ----------------
+def header_map(fields) -> Dict[str, Tuple[str, str | None]]:
+    """원본 열 이름 → (키, 괄호 안 단위). 알 수 없는 열은 빠짐."""
+    out = {}
+    for f in fields:
+        m = re.match(r"^\s*(.*?)\s*(?:\((.*?)\))?\s*$", str(f))
+        name, unit = m.group(1).lower().replace(" ", "_"), (m.group(2) or "").strip().lower() or None
+        key = _ALIAS.get(name) or _ALIAS.get(name.replace("_", ""))
+        if key:
+            out[f] = (key, unit)
+        elif name.endswith("_unit") and _ALIAS.get(name[:-5]):
+            out[f] = (_ALIAS[name[:-5]] + "_unit", None)
+    return out
+
+
+def _num(v) -> float | None:
+    if v is None or isinstance(v, bool):
+        return None
+    try:
+        v = float(str(v).strip().replace(",", ""))
+    except ValueError:
+        return None
+    return v if v == v else None
+
+
+def _ts(raw: Dict[str, Any]) -> datetime | None:
+    v = raw.get("ts")
+    if v in (None, "") and raw.get("date"):
+        v = f"{raw['date']} {raw.get('time') or '00:00'}"
+    elif v in (None, ""):
+        v = raw.get("time")  # 날짜 없이 time 열 하나에 일시가 들어 있는 경우
+    if v in (None, ""):
+        return None
+    n = _num(v)
+    if n is not None and n > 1e9:  # epoch 초/밀리초
+        return datetime.fromtimestamp(n / 1000 if n > 1e12 else n)
+    try:
+        dt = datetime.fromisoformat(str(v).strip().replace("/", "-"))
+    except ValueError:
+        return None
+    return dt.astimezone().replace(tzinfo=None) if dt.tzinfo else dt
+
+
+def normalize(row: Dict[str, Any], hmap: Dict[str, Tuple[str, str | None]]) -> Dict[str, Any] | None:
+    """원본 1행 → 저장 형식 기록 (ts + METRIC_META 키 + memo). 시각이 없으면 None."""
+    raw, units = {}, {}
+    for f, v in row.items():
+        if f in hmap and v not in (None, ""):
+            key, unit = hmap[f]
+            raw[key] = v
+            if unit:
+                units[key] = unit
+    for key in list(raw):
+        if key.endswith("_unit"):
+            units[key[:-5]] = str(raw.pop(key)).strip().lower()
+    dt = _ts(raw)
+    if dt is None:
+        return None
+    e: Dict[str, Any] = {"ts": dt.isoformat(timespec="seconds")}
+    if "bp" in raw and "/" in str(raw["bp"]):
+        e["bp"] = str(raw["bp"]).replace(" ", "")
+    elif _num(raw.get("bp_sys")) and _num(raw.get("bp_dia")):
+        e["bp"] = f"{int(round(_num(raw['bp_sys'])))}/{int(round(_num(raw['bp_dia'])))}"
+    for k, meta in METRIC_META.items():
+        if k == "bp" or k not in raw:
+            continue
+        v = _num(raw[k])
+        if v is None:
+            continue
+        conv = UNIT_CONVERT.get((k, units.get(k)))
+        if conv:
+            v = conv(v)
+        e[k] = int(round(v)) if meta["type"] == "int" else round(v, 2)
+    if len(e) == 1:
+        return None  # 지표가 하나도 없는 행
+    if raw.get("memo"):
+        e["memo"] = str(raw["memo"]).strip()
+    return e
+
+
+def dedupe_key(e: Dict[str, Any]) -> Tuple:
+    # (시각, 지표 값들) — 같은 측정을 두 번 가져와도 한 건만
+    return (e.get("ts"),) + tuple(
+        e.get(k) if isinstance(e.get(k), (str, type(None))) else round(float(e[k]), 2) for k in METRIC_META)
+
+
+# ---------------- 가져오기 ----------------
+def import_file(store, f: IO, fmt: str, thr: Dict[str, Any], chunk: int = CHUNK_ROWS) -> Dict[str, Any]:
+    """파일 → 정규화/중복 제거/경고 집계 후 청크마다 store에 저장(저널 한 줄) → 결과 요약.
+
+    중복 판정은 기존 기록과 이번 파일 안 모두에 대해 한다. 경고는 청크마다 컬럼 배열로 한 번에 평가.
+    읽는 중 메모리는 청크 하나 + 중복 판정용 키 집합(기존 + 가져온 기록 수에 비례)이다.
+    중간에 멈추면 저장된 청크까지만 들어가고, 같은 파일을 다시 가져오면 그 부분은 중복으로 건너뛴다.
+    """
+    t0 = time.perf_counter()
+    seen = {dedupe_key(e) for e in store.entries()}
+    imported = rows = dup = bad = 0
+    flagged = {label: 0 for label in FLAG_LABELS}
+    hmaps: Dict[Tuple, Dict[str, Tuple[str, str | None]]] = {}
+    for part in read_chunks(f, fmt, chunk):
+        batch = []
+        for row in part:
+            rows += 1
+            if row is None:
+                bad += 1
+                continue
+            fields = tuple(row)
+            hmap = hmaps.get(fields)
+            if hmap is None:
+                hmap = hmaps[fields] = header_map(fields)
+            e = normalize(row, hmap)
+            if e is None:
+                bad += 1
+                continue
+            key = dedupe_key(e)
+            if key in seen:
+                dup += 1
+                continue
+            seen.add(key)
+            e["id"] = uuid4().hex
+            batch.append(e)
+        if batch:
+            vals = [entry_values(e) for e in batch]
+            bits = flag_bits({k: np.array([v[k] for v in vals]) for k in COLUMN_KEYS}, thr)
+            for i, label in enumerate(FLAG_LABELS):
+                flagged[label] += int(np.count_nonzero(bits >> i & 1))
+            imported += store.append_many(batch)
+    secs = time.perf_counter() - t0
+    return {"rows": rows, "imported": imported, "duplicates": dup, "skipped": bad,
+            "flagged": {k: v for k, v in flagged.items() if v}, "secs": secs,
+            "rows_per_sec": rows / secs if secs else 0.0}
+
+
+def detect_format(name: str) -> str:
+    return "jsonl" if name.lower().endswith((".jsonl", ".ndjson")) else "csv"
+
+
+def main(argv: List[str] | None = None):
+    from bodylog_sqlite import open_store_file
+
+    ap = argparse.ArgumentParser(description="기기 내보내기(CSV/JSON Lines) → 바디로그 PLUS 기록 가져오기")
+    ap.add_argument("files", nargs="+")
+    ap.add_argument("--data", default="bodylog_plus.json", help="기록 파일 (.json 또는 .db)")
+    ap.add_argument("--config", default="bodylog_plus_config.json", help="임계치 설정 파일")
+    args = ap.parse_args(argv)
+
+    try:
+        thr = json.loads(Path(args.config).read_text(encoding="utf-8")).get("thresholds")
+    except Exception:
+        thr = None
+    thr = {**DEFAULT_CONFIG["thresholds"], **(thr or {})}
+    store = open_store_file(args.data)
+    for name in args.files:
+        with open(name, "rb") as f:
+            res = import_file(store, f, detect_format(name), thr)
+        print(f"{name}: {res['rows']:,}행 → {res['imported']:,}건 추가, 중복 {res['duplicates']:,}, "
+              f"건너뜀 {res['skipped']:,} ({res['secs']:.1f}초, {res['rows_per_sec']:,.0f}행/초)")
+        if res["flagged"]:
+            print("  경고: " + ", ".join(f"{k} {v}건" for k, v in res["flagged"].items()))
+    store.compact()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,36 @@
+# 바디로그 PLUS 공용 정의 (앱/저장소/리포트가 같이 사용)
+
+DEFAULT_CONFIG = {
+    "metrics": ["bp", "hr", "temp", "sugar"],  # 기본 노출 항목
+    "thresholds": {
+        "bp_sys_hi": 140, "bp_dia_hi": 90,
+        "bp_sys_very": 180, "bp_dia_very": 120,
+        "hr_lo": 50, "hr_hi": 120,
+        "temp_hi": 38.5,
+        "sugar_hi": 180, "sugar_very": 240, "sugar_lo": 60,
+        "spo2_lo": 92,
+        "rr_lo": 10, "rr_hi": 24,
+    },
+    # 기록 저장소: "json"(스냅샷+저널) 또는 "sqlite"(WAL, 처음 열 때 기존 JSON을 옮김)
+    "storage": {"backend": "json", "sqlite_path": "bodylog_plus.db"},
+}
+
+METRIC_META = {
+    "bp":     {"label": "혈압(수축/이완)", "type": "text",  "placeholder": "120/80", "unit": "mmHg"},
+    "hr":     {"label": "심박수(bpm)",     "type": "int",   "unit": "bpm"},
+    "temp":   {"label": "체온(°C)",        "type": "float", "step": 0.1, "unit": "°C"},
+    "sugar":  {"label": "혈당(mg/dL)",     "type": "float", "step": 0.1, "unit": "mg/dL"},
+    "spo2":   {"label": "SpO₂(%)",         "type": "int",   "unit": "%"},
+    "rr":     {"label": "호흡수(RR)",      "type": "int",   "unit": "/min"},
+    "weight": {"label": "체중(kg)",        "type": "float", "step": 0.1, "unit": "kg"},
+    "waist":  {"label": "허리둘레(cm)",    "type": "float", "step": 0.1, "unit": "cm"},
+    "bmi":    {"label": "BMI(kg/m²)",      "type": "float", "step": 0.1, "unit": "kg/m²"},
+}
+
+# 그래프 표시용 라벨/단위 (혈압은 분리지표 사용)
+PLOT_META = {
+    "hr": ("심박수(bpm)", "bpm"), "temp": ("체온(°C)", "°C"), "sugar": ("혈당(mg/dL)", "mg/dL"),
+    "spo2": ("SpO₂(%)", "%"), "rr": ("호흡수(/min)", "/min"),
+    "weight": ("체중(kg)", "kg"), "bmi": ("BMI(kg/m²)", "kg/m²"),
+    "bp_sys": ("수축기(mmHg)", "mmHg"), "bp_dia": ("이완기(mmHg)", "mmHg"),
+}
@@ -0,0 +1,243 @@
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Any, List, Tuple
+
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_pdf import PdfPages
+
+from bodylog_columns import series
+from bodylog_meta import DEFAULT_CONFIG
+from downsample import downsample, max_points_for
+
+# 리포트에 들어가는 그래프 (컬럼, 제목, 단위)
+REPORT_PLOTS = [
+    ("hr",    "심박수(bpm)", "bpm"),
+    ("temp",  "체온(°C)",    "°C"),
+    ("sugar", "혈당(mg/dL)", "mg/dL"),
+]
+
+
+def shade_thresholds(ax, metric: str, thr: Dict[str, Any]):
+    # 임계치 구간 음영 (화면 그래프/PDF 공용)
+    ymin, ymax = ax.get_ylim()
+    if metric == "hr":
+        ax.axhspan(thr["hr_hi"], ymax, alpha=0.08)
+        ax.axhspan(ymin, thr["hr_lo"], alpha=0.08)
+    elif metric == "temp":
+        ax.axhspan(thr["temp_hi"], ymax, alpha=0.08)
+    elif metric == "sugar":
+        ax.axhspan(thr["sugar_very"], ymax, alpha=0.08)
+        ax.axhspan(thr["sugar_hi"], thr["sugar_very"], alpha=0.08)
+        ax.axhspan(ymin, thr["sugar_lo"], alpha=0.08)
+    elif metric == "spo2":
+        ax.axhspan(ymin, thr["spo2_lo"], alpha=0.08)
+    elif metric == "rr":
+        ax.axhspan(thr["rr_hi"], ymax, alpha=0.08)
+        ax.axhspan(ymin, thr["rr_lo"], alpha=0.08)
+    elif metric == "bp_sys":
+        ax.axhspan(thr["bp_sys_very"], ymax, alpha=0.08)
+        ax.axhspan(thr["bp_sys_hi"], thr["bp_sys_very"], alpha=0.08)
+    elif metric == "bp_dia":
+        ax.axhspan(thr["bp_dia_very"], ymax, alpha=0.08)
+        ax.axhspan(thr["bp_dia_hi"], thr["bp_dia_very"], alpha=0.08)
+
+
+# 지표별 음영 경계값 (다운샘플링 시 경계 통과 지점 보존용)
+THRESHOLD_LEVELS = {
+    "hr": ["hr_lo", "hr_hi"], "temp": ["temp_hi"], "sugar": ["sugar_lo", "sugar_hi", "sugar_very"],
+    "spo2": ["spo2_lo"], "rr": ["rr_lo", "rr_hi"],
+    "bp_sys": ["bp_sys_hi", "bp_sys_very"], "bp_dia": ["bp_dia_hi", "bp_dia_very"],
+}
+
+
+def threshold_levels(metric: str, thr: Dict[str, Any]) -> List[float]:
+    return [float(thr[k]) for k in THRESHOLD_LEVELS.get(metric, [])]
+
+
+def thin_series(dd: np.ndarray, vv: np.ndarray, metric: str, thr: Dict[str, Any], width_px: int):
+    # 그래프 폭에 맞춰 점 수를 줄임 (임계치 경계 통과 지점은 유지)
+    keep = downsample(dd.astype(np.int64), vv, max_points_for(width_px), threshold_levels(metric, thr))
+    return dd[keep], vv[keep]
+
+
+def render_report(out, cols: Dict[str, np.ndarray], stats: Dict[str, Dict[str, float]],
+                  rep_start: date, rep_end: date, thr: Dict[str, Any]):
+    """요약 1쪽 + 지표 그래프 3쪽 PDF를 out(경로 또는 파일 객체)에 쓴다.
+
+    요약 수치(stats)는 저장소의 일별 집계(JournalStore.summary)에서 받아 원본을 다시 훑지 않는다.
+
+    pyplot 전역 상태를 쓰지 않고 Figure 객체만 사용하므로 워커 스레드/프로세스에서 안전.
+    """
+    with PdfPages(out) as pdf:
+        # 요약
+        fig = Figure(figsize=(8.27, 11.69))
+        ax = fig.add_subplot()
+        ax.axis('off')
+        lines = ["바디로그 리포트",
+                 f"기간: {rep_start.isoformat()} ~ {rep_end.isoformat()}", ""]
+        for key, title, _ in REPORT_PLOTS:
+            s = stats.get(key)
+            lines.append(f"- {title}: 평균 {s['mean']:.1f}, 최솟값 {s['min']:.1f}, 최댓값 {s['max']:.1f}"
+                         if s else f"- {title}: 데이터 없음")
+        ax.text(0.1, 0.9, "\n".join(lines), fontsize=14, va='top')
+        pdf.savefig(fig)
+
+        for key, title, unit in REPORT_PLOTS:
+            fig = Figure(figsize=(8.27, 4))
+            ax = fig.add_subplot()
+            dd, vv = thin_series(*series(cols, key), key, thr, int(fig.get_figwidth() * fig.dpi))
+            if len(dd):
+                ax.plot(dd, vv, marker='o'); ax.set_title(title); ax.set_ylabel(unit); ax.grid(True, alpha=0.3)
+                shade_thresholds(ax, key, thr)
+            else:
+                ax.text(0.5, 0.5, '데이터 없음', ha='center', va='center'); ax.set_axis_off()
+            pdf.savefig(fig)
+
+
+def render_report_bytes(cols: Dict[str, np.ndarray], stats: Dict[str, Dict[str, float]],
+                        rep_start: date, rep_end: date, thr: Dict[str, Any]) -> bytes:
+    bio = BytesIO()
+    render_report(bio, cols, stats, rep_start, rep_end, thr)
+    return bio.getvalue()
+
+
+class ReportJobs:
+    """PDF 렌더링 프로세스 풀 + (기간, 데이터 버전, 임계치) 키 결과 캐시.
+
+    matplotlib 렌더링은 CPU를 오래 잡으므로 Streamlit 서버 프로세스 밖(spawn 워커)에서 돌린다.
+    같은 키로 다시 요청하면 진행 중이거나 끝난 Future를 그대로 돌려준다.
+    """
+
+    def __init__(self, workers: int | None = None, keep: int = 32):
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.keep = keep
+        self._pool: ProcessPoolExecutor | None = None
+        self._jobs: "OrderedDict[Tuple, Future]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple) -> Future | None:
+        with self._lock:
+            fut = self._jobs.get(key)
+            if fut is not None:
+                self._jobs.move_to_end(key)
+            return fut
+
+    def submit(self, key: Tuple, cols: Dict[str, np.ndarray], stats: Dict[str, Dict[str, float]],
+               rep_start: date, rep_end: date, thr: Dict[str, Any]) -> Future:
+        with self._lock:
+            fut = self._jobs.get(key)
+            if fut is not None and not (fut.done() and fut.exception() is not None):
+                self._jobs.move_to_end(key)
+                return fut
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            fut = self._pool.submit(render_report_bytes, cols, stats, rep_start, rep_end, dict(thr))
+            self._jobs[key] = fut
+            # 오래된 완료 결과부터 정리
+            for k in list(self._jobs):
+                if len(self._jobs) <= self.keep:
+                    break
+                if self._jobs[k].done():
+                    del self._jobs[k]
+            return fut
+
+
+# ---------------- 배치 내보내기 (헤드리스) ----------------
+# 예) python bodylog_report.py clinic/*.json --span month --out reports/
+SPAN_DAYS = {"week": 7, "month": 30}
+
+
+def report_paths(data_files: List[str], out_dir: str, rep_start: date, rep_end: date) -> Dict[str, Path]:
+    """기록 파일 → PDF 경로. 보통은 <파일 이름>_<시작>_<끝>.pdf.
+
+    환자별 폴더에 같은 기본 파일 이름(clinic/*/bodylog_plus.json)을 쓰면 이름이 겹치므로, 겹치는 파일은
+    <폴더>_<파일 이름>_<전체 경로 해시 8자리>로 구분한다. 같은 파일을 두 번 넘기면 한 번만 만든다.
+    """
+    files: Dict[str, Path] = {}  # 절대 경로 → 넘겨받은 경로 (처음 것)
+    for f in data_files:
+        files.setdefault(str(Path(f).resolve()), Path(f))
+    stems: Dict[str, int] = {}
+    for p in files.values():
+        stems[p.stem] = stems.get(p.stem, 0) + 1
+    span = f"{rep_start.isoformat()}_{rep_end.isoformat()}"
+    out = {}
+    for full, p in files.items():
+        name = p.stem
+        if stems[name] > 1:
+            name = f"{Path(full).parent.name}_{p.stem}_{hashlib.sha1(full.encode('utf-8')).hexdigest()[:8]}"
+        out[str(p)] = Path(out_dir) / f"{name}_{span}.pdf"
+    return out
+
+
+def export_one(data_file: str, out: Path, rep_start: date, rep_end: date, thr: Dict[str, Any]) -> Dict[str, Any]:
+    # 워커 프로세스에서 실행: 기록 파일 1개 → PDF 파일 1개 (메모리 버퍼 없이 바로 디스크로)
+    from bodylog_sqlite import open_store_file
+
+    t0 = time.perf_counter()
+    if not Path(data_file).exists():
+        raise FileNotFoundError(data_file)
+    store = open_store_file(data_file, readonly=True)
+    cols = store.columns(datetime.combine(rep_start, datetime.min.time()),
+                         datetime.combine(rep_end, datetime.max.time()))
+    render_report(out, cols, store.summary(rep_start, rep_end), rep_start, rep_end, thr)
+    return {"file": data_file, "out": str(out), "entries": len(cols["ts"]), "secs": time.perf_counter() - t0}
+
+
+def batch_export(data_files: List[str], out_dir: str, span_days: int, thr: Dict[str, Any],
+                 workers: int | None = None, today: date | None = None) -> List[Dict[str, Any]]:
+    rep_end = today or date.today()
+    rep_start = rep_end - timedelta(days=span_days - 1)
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    results = []
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(workers or os.cpu_count()) as pool:
+        futs = {pool.submit(export_one, f, out, rep_start, rep_end, thr): f
+                for f, out in report_paths(data_files, out_dir, rep_start, rep_end).items()}
+        for fut in as_completed(futs):
+            try:
+                res = fut.result()
+            except Exception as e:
+                res = {"file": futs[fut], "error": str(e)}
+                print(f"[실패] {futs[fut]}: {e}")
+            else:
+                print(f"[완료] {res['out']} ({res['entries']}건, {res['secs']:.2f}초)")
+            results.append(res)
+    elapsed = time.perf_counter() - t0
+    ok = [r for r in results if "error" not in r]
+    entries = sum(r["entries"] for r in ok)
+    print(f"리포트 {len(ok)}/{len(results)}개, 기록 {entries}건, {elapsed:.1f}초 "
+          f"({len(ok) / elapsed if elapsed else 0:.2f} 리포트/초, {entries / elapsed if elapsed else 0:.0f} 기록/초)")
+    return results
+
+
+def main(argv: List[str] | None = None):
+    ap = argparse.ArgumentParser(description="바디로그 PLUS 주간/월간 PDF 리포트 일괄 생성")
+    ap.add_argument("data_files", nargs="+", help="환자별 기록 파일 (bodylog_plus.json 형식 또는 .db)")
+    ap.add_argument("--span", choices=list(SPAN_DAYS), default="week")
+    ap.add_argument("--out", default="reports", help="PDF 저장 폴더")
+    ap.add_argument("--config", default="bodylog_plus_config.json", help="임계치 설정 파일")
+    ap.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: CPU 코어 수)")
+    args = ap.parse_args(argv)
+
+    try:
+        thr = json.loads(Path(args.config).read_text(encoding="utf-8")).get("thresholds")
+    except Exception:
+        thr = None
+    thr = {**DEFAULT_CONFIG["thresholds"], **(thr or {})}
+    results = batch_export(args.data_files, args.out, SPAN_DAYS[args.span], thr, args.workers)
+    return 0 if all("error" not in r for r in results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
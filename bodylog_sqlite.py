@@ -0,0 +1,150 @@
+import argparse
+import json
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List
+
+from bodylog_store import JournalStore, journal_path, to_epoch
+
+# SQLite를 쓰는 파일 확장자 (그 외는 JSON 스냅샷+저널)
+SQLITE_SUFFIXES = {".db", ".sqlite", ".sqlite3"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id   TEXT PRIMARY KEY,
+    ts   TEXT,
+    t    REAL,          -- ts의 epoch 초 (파싱 불가면 NULL)
+    body TEXT NOT NULL  -- 기록 전체 JSON
+);
+CREATE INDEX IF NOT EXISTS entries_t ON entries(t);
+"""
+
+
+def _epoch_of(e: Dict[str, Any]) -> float | None:
+    try:
+        return to_epoch(datetime.fromisoformat(e["ts"]))
+    except Exception:
+        return None
+
+
+def _row(e: Dict[str, Any]):
+    return e["id"], e.get("ts"), _epoch_of(e), json.dumps(e, ensure_ascii=False)
+
+
+class SqliteStore(JournalStore):
+    """JournalStore와 같은 인터페이스의 SQLite(WAL) 백엔드.
+
+    메모리 인덱스(시각 배열/컬럼/집계/플래그)는 그대로 공유하고, 영속화만 테이블로 바꾼다.
+    저장은 INSERT OR REPLACE 한 문장, id 삭제는 PRIMARY KEY, 기간 삭제는 t 인덱스를 쓰는
+    DELETE 한 문장이다. 저널/컴팩션이 없고, 다른 연결의 커밋은 PRAGMA data_version으로 감지한다.
+    """
+
+    def __init__(self, path: Path, readonly: bool = False):
+        path = Path(path)
+        if readonly:
+            # 경로의 ?, #, %, 한글 등은 URI로 이스케이프해야 다른 파일을 열지 않는다
+            self._conn = sqlite3.connect(path.resolve().as_uri() + "?mode=ro", uri=True, check_same_thread=False)
+        else:
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+        super().__init__(path, readonly=readonly)
+
+    # ---------------- 읽기 ----------------
+    def _load(self):
+        with self._lock:
+            # JournalStore 스냅샷과 같은 ts 내림차순(같은 시각은 나중 입력이 앞)으로 채움
+            rows = self._conn.execute("SELECT body FROM entries ORDER BY t DESC, rowid DESC").fetchall()
+            self._by_id = {}
+            for (body,) in rows:
+                e = json.loads(body)
+                self._by_id[e["id"]] = e
+            self.migrated = 0
+            self._reindex()
+            self._ops = 0
+            self._seen = self._sig()
+
+    def _sig(self):
+        # 자기 연결의 커밋으로는 바뀌지 않고 다른 연결(프로세스)이 커밋했을 때만 증가
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    # ---------------- 쓰기 ----------------
+    def _log(self, rec: Dict[str, Any]):
+        op = rec.get("op")
+        with self._conn:
+            if op == "put":
+                self._conn.execute("INSERT OR REPLACE INTO entries (id, ts, t, body) VALUES (?, ?, ?, ?)",
+                                   _row(rec["entry"]))
+            elif op in ("restore", "put_many"):
+                self._conn.executemany("INSERT OR REPLACE INTO entries (id, ts, t, body) VALUES (?, ?, ?, ?)",
+                                       (_row(e) for e in rec["entries"]))
+            elif op == "del" and rec.get("range"):
+                lo, hi = rec["range"]
+                self._conn.execute("DELETE FROM entries WHERE t BETWEEN ? AND ?",
+                                   (float("-inf") if lo is None else lo, float("inf") if hi is None else hi))
+            elif op == "del":
+                self._conn.execute("DELETE FROM entries WHERE id IN (SELECT value FROM json_each(?))",
+                                   (json.dumps(rec["ids"]),))
+            elif op == "clear":
+                self._conn.execute("DELETE FROM entries")
+        self._apply(rec)
+
+    def compact_async(self):
+        pass
+
+    def compact(self):
+        pass
+
+    def close(self):
+        self._conn.close()
+
+
+def migrate_json(json_path: Path, db_path: Path) -> int:
+    """JSON 스냅샷+저널의 현재 상태를 SQLite로 한 번에 옮김 → 옮긴 기록 수 (이미 있는 id는 건너뜀)."""
+    src = JournalStore(Path(json_path), readonly=True)
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        with conn:
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO entries (id, ts, t, body) VALUES (?, ?, ?, ?)",
+                             (_row(e) for e in reversed(src.entries())))
+            return conn.total_changes - before
+    finally:
+        conn.close()
+
+
+def open_store_file(path, readonly: bool = False) -> JournalStore:
+    # 확장자로 백엔드 선택 (배치 리포트 등 파일 경로만 받는 곳에서 사용)
+    path = Path(path)
+    if path.suffix.lower() in SQLITE_SUFFIXES:
+        return SqliteStore(path, readonly=readonly)
+    return JournalStore(path, readonly=readonly)
+
+
+def open_backend(storage: Dict[str, Any], json_path: Path) -> JournalStore:
+    """설정의 storage 항목으로 백엔드 선택. sqlite인데 DB가 아직 없으면 기존 JSON을 먼저 옮긴다."""
+    if storage.get("backend") != "sqlite":
+        return JournalStore(json_path)
+    db_path = Path(storage.get("sqlite_path") or json_path.with_suffix(".db"))
+    # 컴팩션 전이면 스냅샷 없이 저널만 있을 수 있다
+    if not db_path.exists() and (json_path.exists() or journal_path(json_path).exists()):
+        migrate_json(json_path, db_path)
+    return SqliteStore(db_path)
+
+
+def main(argv: List[str] | None = None):
+    ap = argparse.ArgumentParser(description="바디로그 PLUS JSON 기록 → SQLite 이전 (1회)")
+    ap.add_argument("json_path", nargs="?", default="bodylog_plus.json")
+    ap.add_argument("db_path", nargs="?", default="bodylog_plus.db")
+    args = ap.parse_args(argv)
+    n = migrate_json(Path(args.json_path), Path(args.db_path))
+    print(f"{args.json_path} → {args.db_path}: {n}건 이전")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
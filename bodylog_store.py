@@ -0,0 +1,432 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Any, List, Iterable, Tuple
+from uuid import uuid4
+
+import numpy as np
+
+from bodylog_columns import COLUMN_KEYS, VitalColumns, entry_values, flag_bits, thresholds_key
+from jsonio import atomic_write_bytes, dumps, file_lock, load_json
+from rollup import Rollup
+
+# 저널 라인이 이만큼 쌓이면 백그라운드에서 스냅샷으로 압축
+COMPACT_EVERY = 500
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def journal_path(path: Path) -> Path:
+    return path.with_name(path.stem + ".journal.jsonl")
+
+
+def to_epoch(dt: datetime) -> float:
+    # 기록 시각은 벽시계(로컬) 기준이라 타임존 없이 초 단위로 환산
+    if dt.tzinfo is not None:
+        dt = dt.astimezone().replace(tzinfo=None)
+    return (dt - _EPOCH).total_seconds()
+
+
+def _stat_sig(path: Path) -> Tuple[int, int]:
+    try:
+        st = path.stat()
+        return st.st_mtime_ns, st.st_size
+    except FileNotFoundError:
+        return 0, 0
+
+
+class JournalStore:
+    """스냅샷(JSON) + 추가 전용 저널(JSONL) 기반 기록 저장소.
+
+    스냅샷은 기존 bodylog_plus.json 형식({"entries": [...]}, ts 내림차순) 그대로라
+    기존 파일은 별도 변환 없이 스냅샷으로 읽힌다. 저장/삭제는 저널에 한 줄씩만 추가한다.
+      {"op": "put", "entry": {...}} / {"op": "del", "ids": [...]} / {"op": "clear"}
+
+    메모리에는 ts를 한 번만 파싱해 오름차순 배열(_ts: epoch 초, _dts, _rows)로 유지하므로
+    기간 조회는 이진 탐색이다. ts를 파싱할 수 없는 기록은 _bad에 따로 보관한다.
+    같은 순서의 지표별 수치 배열(_cols)과 일별/주별 집계(_rollup)도 삽입/삭제 때마다 함께 갱신한다.
+    """
+
+    def __init__(self, path: Path, compact_every: int = COMPACT_EVERY, readonly: bool = False):
+        self.path = Path(path)
+        self.journal = journal_path(self.path)
+        self.compact_every = compact_every
+        self.readonly = readonly  # 배치 리포트 등 읽기 전용 사용 시 파일을 다시 쓰지 않음
+        self.migrated = 0
+        self.version = 0  # 내용이 바뀔 때마다 증가 (리포트 캐시 키 등)
+        self._lock = threading.RLock()
+        self._compacting = False
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._ts: List[float] = []
+        self._dts: List[datetime] = []
+        self._rows: List[Dict[str, Any]] = []
+        self._cols = VitalColumns()
+        self._rollup = Rollup(COLUMN_KEYS, source=self._day_values)
+        self._bad: List[Dict[str, Any]] = []
+        self._desc: List[Dict[str, Any]] | None = None
+        self._flags: Dict[Tuple, np.ndarray] = {}  # 임계치별 전체 기록 플래그 (변경 시 비움)
+        self._seen = (0, 0, 0, 0)
+        self._ops = 0
+        self.load()
+
+    # ---------------- 읽기 ----------------
+    def load(self):
+        self._load()
+        if self.migrated and not self.readonly:
+            self.compact()
+
+    def _load(self):
+        with self._lock:
+            # 스냅샷이 깨졌으면 빈 저장소로 시작하지 않고 CorruptFile을 올림 (다음 컴팩션이 덮어쓰지 않게)
+            snap = load_json(self.path, {"entries": []}, strict=True)
+            self._by_id = {}
+            self.migrated = 0
+            for e in snap.get("entries", []):
+                # id 없는(또는 중복된) 예전 기록은 새 id 부여
+                if not e.get("id") or e["id"] in self._by_id:
+                    e["id"] = uuid4().hex
+                    self.migrated += 1
+                self._by_id[e["id"]] = e
+            self._reindex()
+            self._ops = self._replay()
+            self._seen = self._sig()
+
+    def _sig(self):
+        return _stat_sig(self.path) + _stat_sig(self.journal)
+
+    def refresh(self) -> bool:
+        """다른 프로세스가 파일을 바꿨을 때(mtime/size 변화)만 다시 읽는다."""
+        with self._lock:
+            if self._compacting or self._sig() == self._seen:
+                return False
+            self._load()
+        if self.migrated and not self.readonly:
+            self.compact()
+        return True
+
+    # ---------------- 인덱스 ----------------
+    @staticmethod
+    def _parse(e: Dict[str, Any]) -> datetime | None:
+        try:
+            return datetime.fromisoformat(e["ts"])
+        except Exception:
+            return None
+
+    def _reindex(self):
+        parsed, self._bad = [], []
+        # 스냅샷은 내림차순이므로 뒤집어 넣어야 같은 시각 기록의 순서가 유지됨
+        for e in reversed(self._by_id.values()):
+            dt = self._parse(e)
+            if dt is None:
+                self._bad.append(e)
+            else:
+                parsed.append((to_epoch(dt), dt, e))
+        parsed.sort(key=lambda x: x[0])
+        self._ts = [p[0] for p in parsed]
+        self._dts = [p[1] for p in parsed]
+        self._rows = [p[2] for p in parsed]
+        self._cols.rebuild(self._ts, self._rows)
+        self._rollup.clear()
+        for dt, e in zip(self._dts, self._rows):
+            self._rollup.add(dt.date(), entry_values(e))
+        self._desc = None
+        self._flags = {}
+        self.version += 1
+
+    def _insert(self, e: Dict[str, Any]):
+        dt = self._parse(e)
+        if dt is None:
+            self._bad.append(e)
+            return
+        t = to_epoch(dt)
+        i = bisect_right(self._ts, t)
+        vals = entry_values(e)
+        self._ts.insert(i, t)
+        self._dts.insert(i, dt)
+        self._rows.insert(i, e)
+        self._cols.insert(i, t, vals)
+        self._rollup.add(dt.date(), vals)
+
+    def _drop(self, victims: List[Dict[str, Any]]):
+        for e in victims:
+            dt = self._parse(e)
+            if dt is not None:
+                self._rollup.remove(dt.date(), entry_values(e))
+        if len(victims) * 8 >= len(self._rows):
+            # 대량 삭제는 한 번의 선형 재구성
+            gone = {id(e) for e in victims}
+            keep = [i for i, e in enumerate(self._rows) if id(e) not in gone]
+            self._ts = [self._ts[i] for i in keep]
+            self._dts = [self._dts[i] for i in keep]
+            self._rows = [self._rows[i] for i in keep]
+            self._cols.take(keep)
+            self._bad = [e for e in self._bad if id(e) not in gone]
+            return
+        for e in victims:
+            dt = self._parse(e)
+            if dt is None:
+                self._bad = [b for b in self._bad if b is not e]
+                continue
+            i = bisect_left(self._ts, to_epoch(dt))
+            while i < len(self._rows) and self._rows[i] is not e:
+                i += 1
+            if i < len(self._rows):
+                del self._ts[i], self._dts[i], self._rows[i]
+                self._cols.remove(i)
+
+    def _day_values(self, day: date) -> List[Dict[str, float]]:
+        # 집계 재계산용: 그날 기록의 지표 값들
+        lo, hi = self._bounds(datetime.combine(day, datetime.min.time()), datetime.combine(day, datetime.max.time()))
+        return [entry_values(e) for e in self._rows[lo:hi]]
+
+    def _replay(self) -> int:
+        ops = 0
+        try:
+            f = self.journal.open("r", encoding="utf-8")
+        except FileNotFoundError:
+            return 0
+        with f:
+            for line in f:
+                try:
+                    self._apply(json.loads(line))
+                except Exception:
+                    continue  # 중단된 쓰기로 잘린 줄은 건너뜀
+                ops += 1
+        return ops
+
+    def _put(self, e: Dict[str, Any]):
+        old = self._by_id.get(e["id"])
+        if old is not None:
+            self._drop([old])
+        self._by_id[e["id"]] = e
+        self._insert(e)
+
+    def _apply(self, rec: Dict[str, Any]):
+        op = rec.get("op")
+        if op == "put":
+            self._put(rec["entry"])
+        elif op in ("restore", "put_many"):
+            es = rec.get("entries", [])
+            if len(es) * 8 >= len(self._rows):
+                # 대량 복원은 한 번의 정렬 재구성
+                for e in es:
+                    self._by_id[e["id"]] = e
+                self._reindex()
+            else:
+                for e in es:
+                    self._put(e)
+        elif op == "del":
+            victims = [self._by_id.pop(i) for i in rec.get("ids", []) if i in self._by_id]
+            if victims:
+                self._drop(victims)
+        elif op == "clear":
+            self._by_id = {}
+            self._reindex()
+        self._desc = None
+        self._flags = {}
+        self.version += 1
+
+    def entries(self) -> List[Dict[str, Any]]:
+        # 기존 DB["entries"]와 같은 ts 내림차순 목록
+        with self._lock:
+            if self._desc is None:
+                self._desc = self._rows[::-1] + self._bad
+            return self._desc
+
+    def _bounds(self, start: datetime | None, end: datetime | None) -> Tuple[int, int]:
+        lo = 0 if start is None else bisect_left(self._ts, to_epoch(start))
+        hi = len(self._ts) if end is None else bisect_right(self._ts, to_epoch(end))
+        return lo, hi
+
+    def range(self, start: datetime | None = None, end: datetime | None = None) -> List[Tuple[datetime, Dict[str, Any]]]:
+        """start <= ts <= end 인 (시각, 기록) 목록(오름차순). None 이면 해당 쪽 제한 없음."""
+        with self._lock:
+            lo, hi = self._bounds(start, end)
+            return list(zip(self._dts[lo:hi], self._rows[lo:hi]))
+
+    def columns(self, start: datetime | None = None, end: datetime | None = None) -> Dict[str, np.ndarray]:
+        """range()와 같은 구간의 컬럼 배열 {"ts": int64, "hr": float64, "bp_sys": ...}."""
+        with self._lock:
+            return self._cols.slice(*self._bounds(start, end))
+
+    def summary(self, start: date, end: date) -> Dict[str, Dict[str, float]]:
+        """start~end(날짜 포함) 지표별 {count, mean, min, max, std} — 일별 집계에서 O(일수)."""
+        with self._lock:
+            return self._rollup.summary(start, end)
+
+    def _all_flags(self, thr: Dict[str, Any]) -> np.ndarray:
+        # 전체 기록을 한 번에 벡터 평가, 임계치 조합별로 메모 (기록이 바뀌면 비워짐)
+        key = thresholds_key(thr)
+        bits = self._flags.get(key)
+        if bits is None:
+            if len(self._flags) >= 4:
+                self._flags.clear()
+            bits = self._flags[key] = flag_bits(self._cols.slice(0, self._cols.n), thr)
+        return bits
+
+    def page(self, start: datetime | None, end: datetime | None, size: int,
+             cursor: Tuple[float, str] | None = None, thr: Dict[str, Any] | None = None,
+             keyword: str = "") -> Dict[str, Any]:
+        """start~end 구간을 최신순으로 size건씩 (표 페이지용 — 보이는 행만 꺼냄).
+
+        cursor=(epoch 초, id)는 직전 페이지의 마지막 기록으로, 그보다 오래된 기록부터 이어진다
+        (같은 시각 기록은 id 위치로 구분). keyword가 있으면 메모에 포함된 기록만 센다.
+        → {"dts", "rows", "flags", "next": 다음 cursor 또는 None, "total": 구간 건수(키워드 없을 때)}
+        """
+        with self._lock:
+            lo, hi = self._bounds(start, end)
+            top = hi
+            if cursor is not None:
+                t, cid = cursor
+                top = min(hi, bisect_left(self._ts, t))
+                for j in range(top, min(hi, bisect_right(self._ts, t))):
+                    if self._rows[j]["id"] == cid:
+                        top = j
+                        break
+            bits = self._all_flags(thr) if thr is not None else None
+            # 한 건 더 찾아 보고 다음 페이지 유무를 판단
+            picked = []
+            i = top - 1
+            while i >= lo and len(picked) <= size:
+                if not keyword or keyword in self._rows[i].get("memo", ""):
+                    picked.append(i)
+                i -= 1
+            more = len(picked) > size
+            picked = picked[:size]
+            last = picked[-1] if picked else None
+            return {
+                "dts": [self._dts[j] for j in picked],
+                "rows": [self._rows[j] for j in picked],
+                "flags": bits[picked] if bits is not None else None,
+                "next": (self._ts[last], self._rows[last]["id"]) if more else None,
+                "total": None if keyword else hi - lo,
+            }
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __contains__(self, id_: str) -> bool:
+        return id_ in self._by_id
+
+    # ---------------- 쓰기 ----------------
+    def _log(self, rec: Dict[str, Any]):
+        # 저널 잠금: 다른 프로세스의 컴팩션이 꼬리를 옮기는 도중에 추가한 줄이 유실되지 않게
+        with file_lock(self.journal):
+            # 그 사이 다른 프로세스가 쓴 줄이 있으면 _seen을 남겨 두어 다음 refresh()가 다시 읽게 함
+            stale = self._sig() != self._seen
+            with self.journal.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            if not stale:
+                self._seen = self._sig()
+        self._apply(rec)
+        self._ops += 1
+        if self._ops >= self.compact_every:
+            self.compact_async()
+
+    def append(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        entry.setdefault("id", uuid4().hex)
+        with self._lock:
+            self._log({"op": "put", "entry": entry})
+        return entry
+
+    def append_many(self, entries: List[Dict[str, Any]]) -> int:
+        """여러 건을 저널 한 줄(put_many)로 한 번에 저장 — 대량 가져오기용."""
+        for e in entries:
+            e.setdefault("id", uuid4().hex)
+        with self._lock:
+            if entries:
+                self._log({"op": "put_many", "entries": entries})
+                # 큰 저널 줄은 바로 스냅샷으로 접어 넣도록 건수만큼 센다
+                self._ops += len(entries) - 1
+                if self._ops >= self.compact_every:
+                    self.compact_async()
+        return len(entries)
+
+    # ---------------- 삭제 / 되돌리기 ----------------
+    # 삭제는 id 집합(해시 조회) 또는 정렬 구간(이진 탐색)으로 대상을 정하고 저널 한 줄로 처리한다.
+    # 결과(tombstone)는 {"kind", "count", "secs", "entries": 지워진 기록} — 저장소는 공용(프로세스 하나에 하나)이라
+    # 보관은 호출한 쪽(세션)이 하고, 되돌릴 때 undo_delete(tombstone)으로 넘긴다.
+    def _delete(self, kind: str, victims: List[Dict[str, Any]], rec: Dict[str, Any]) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        if victims:
+            self._log(rec)
+        return {"kind": kind, "count": len(victims), "secs": time.perf_counter() - t0, "entries": victims}
+
+    def delete(self, ids: Iterable[str]) -> Dict[str, Any]:
+        with self._lock:
+            victims = [self._by_id[i] for i in set(ids) if i in self._by_id]
+            return self._delete("ids", victims, {"op": "del", "ids": [e["id"] for e in victims]})
+
+    def delete_range(self, start: datetime | None, end: datetime | None) -> Dict[str, Any]:
+        """start <= ts <= end 기록 삭제 — 이진 탐색한 구간의 id를 모아 한 번에 (O(log n + k))."""
+        with self._lock:
+            lo, hi = self._bounds(start, end)
+            victims = self._rows[lo:hi]
+            # range는 구간 삭제를 한 문장으로 처리할 수 있는 백엔드(SqliteStore)용
+            return self._delete("range", victims, {
+                "op": "del", "ids": [e["id"] for e in victims],
+                "range": [None if start is None else to_epoch(start), None if end is None else to_epoch(end)]})
+
+    def clear(self) -> Dict[str, Any]:
+        with self._lock:
+            return self._delete("clear", list(self._by_id.values()), {"op": "clear"})
+
+    def undo_delete(self, tombstone: Dict[str, Any] | None) -> int:
+        """delete*()가 돌려준 tombstone의 기록을 한 번에 되살림 → 복원 건수."""
+        es = (tombstone or {}).get("entries") or []
+        with self._lock:
+            if es:
+                self._log({"op": "restore", "entries": es})
+            return len(es)
+
+    # ---------------- 컴팩션 ----------------
+    def compact_async(self):
+        if self._compacting:
+            return
+        self._compacting = True
+        threading.Thread(target=self.compact, daemon=True).start()
+
+    def compact(self):
+        """현재 상태를 스냅샷으로 쓰고, 그동안 추가된 저널 꼬리만 남긴다.
+
+        스냅샷 교체와 저널 정리 사이에 중단되어도 저널 재생은 멱등(put/del은 id 기준,
+        clear 이후 기록은 모두 저널에 있음)이라 데이터가 어긋나지 않는다.
+
+        여러 프로세스가 같은 파일을 쓸 수 있으므로 컴팩션 자체는 스냅샷 잠금으로 한 번에 하나만,
+        상태 확정(offset)과 꼬리 교체는 저널 잠금 안에서 한다. 스냅샷을 쓰는 동안은 추가가 막히지 않는다.
+        """
+        try:
+            with file_lock(self.path):
+                self._compact()
+        finally:
+            self._compacting = False
+
+    def _compact(self):
+        with self._lock, file_lock(self.journal):
+            # 다른 프로세스가 추가한 줄까지 반영한 뒤 offset 확정
+            self._load()
+            entries = list(self.entries())
+            try:
+                offset = self.journal.stat().st_size
+            except FileNotFoundError:
+                offset = 0
+        atomic_write_bytes(self.path, dumps({"entries": entries}))
+        with self._lock, file_lock(self.journal):
+            try:
+                with self.journal.open("rb") as f:
+                    f.seek(offset)
+                    tail = f.read()
+            except FileNotFoundError:
+                tail = b""
+            if tail:
+                atomic_write_bytes(self.journal, tail)
+            else:
+                self.journal.unlink(missing_ok=True)
+            self._ops = tail.count(b"\n")
+            self._seen = self._sig()
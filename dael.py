@@ -1,80 +1,100 @@
-import json
 from datetime import datetime, date, timedelta
 from pathlib import Path
 import streamlit as st
 
+import numpy as np
+
+from anthropometrics import bmi, bmr
+from expiry_index import ExpiryIndex
+from jsonio import CorruptFile, VersionConflict, load_versioned, quarantine, save_json, update_json
+from recipe_catalog import current_catalog
+from recipe_index import top_k
+
 USER_DATA_FILE = Path('user_data.json')
 FRIDGE_FILE = Path('fridge.json')
+RECIPE_FILE = Path('dael_recipes.json')  # 레시피 카탈로그 (JSON/CSV, recipe_catalog.py 형식)
 
-# JSON 데이터 입출력
+# JSON 데이터 입출력 (잠금 + 원자적 쓰기) → (데이터, 버전)
 def load_data(path: Path, default):
     try:
-        with path.open('r', encoding='utf-8') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return default
+        return load_versioned(path, default, strict=True)
+    except CorruptFile:
+        backup = quarantine(path)
+        st.warning(f"{path.name} 파일이 손상되어 {backup.name} 로 보관하고 빈 데이터로 시작합니다.")
+        return default, None
+
+def save_data(path: Path, data, expected=False):
+    # expected(읽을 때 버전)가 있으면 그 사이 다른 창/세션이 저장한 경우 VersionConflict
+    return save_json(path, data, expected)
+
+def save_user(user) -> bool:
+    # 신체 정보는 폼 전체를 덮어쓰므로 낙관적 버전 검사 — 충돌 시 최신 내용을 다시 불러옴
+    try:
+        st.session_state.user_ver = save_data(USER_DATA_FILE, user, st.session_state.user_ver)
+    except VersionConflict:
+        st.session_state.user, st.session_state.user_ver = load_data(USER_DATA_FILE, {})
+        st.warning("다른 창에서 먼저 저장된 내용이 있어 최신 정보를 불러왔습니다. 확인 후 다시 저장하세요.")
+        return False
+    st.session_state.user = user
+    return True
 
-def save_data(path: Path, data):
-    with path.open('w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+def update_fridge(fn):
+    # 냉장고는 재료 단위 변경이라 잠금 안에서 최신 파일에 바로 적용 (다른 세션 변경과 병합)
+    st.session_state.fridge = update_json(FRIDGE_FILE, fn, {})
 
 # BMI/BMR 계산
 def calculate_inbody(user):
-    try:
-        height = float(user.get('height', 0))
-        weight = float(user.get('weight', 0))
-        age = int(user.get('age', 0))
-        gender = str(user.get('gender', 'female')).lower()
-        if height <= 0 or weight <= 0 or age <= 0:
-            return None
-        height_m = height / 100
-        bmi = weight / (height_m ** 2)
-        if gender == 'male':
-            bmr = 88.362 + (13.397 * weight) + (4.799 * height) - (5.677 * age)
-        else:
-            bmr = 447.593 + (9.247 * weight) + (3.098 * height) - (4.330 * age)
-        return {"bmi": round(bmi, 2), "bmr": round(bmr, 2)}
-    except Exception:
-        return None
-
-# 레시피 DB
-def get_recipe_db():
-    return {
-        '샐러드': {'ingredients': ['상추', '토마토', '닭가슴살'], 'calories': 320, 'desc': '저칼로리 단백질 샐러드'},
-        '토마토 파스타': {'ingredients': ['토마토', '파스타', '올리브오일'], 'calories': 550, 'desc': '간단 파스타'},
-        '야채 수프': {'ingredients': ['양파', '당근', '감자'], 'calories': 200, 'desc': '따뜻한 수프'},
-    }
-
-# 레시피 매칭
-def match_recipes(fridge, user, target_min=None, target_max=None):
-    recipes = get_recipe_db()
-    user_conditions = set(user.get('conditions', []))
-    fridge_items = set(fridge.keys())
+    # Harris-Benedict (user의 bmr_formula로 "mifflin" 선택 가능), 키/체중/나이 중 하나라도 없으면 None
+    height, weight, age = user.get('height'), user.get('weight'), user.get('age')
+    stats = {"bmi": bmi(weight, height),
+             "bmr": bmr(weight, height, age, user.get('gender', 'female'), user.get('bmr_formula', 'harris'))}
+    return None if any(v != v for v in stats.values()) else stats
+
+EXPIRING_DAYS = 3  # 이 기간 안에 유통기한이 끝나는 재료를 쓰는 레시피 가산점
+
+# 유통기한순 색인 (세션별) — 넘겨받은 냉장고 dict와 비교해 바뀐 재료만 다시 넣으므로 rerun마다 전체 파싱/정렬하지 않음
+def fridge_expiry(fridge):
+    idx = st.session_state.get('fridge_exp')
+    if idx is None:
+        idx = st.session_state.fridge_exp = ExpiryIndex()
+    idx.sync({item: info.get('exp_date') for item, info in fridge.items()})
+    return idx
+
+def expiring_items(fridge, days=EXPIRING_DAYS):
+    return set(fridge_expiry(fridge).within(days))
+
+# 레시피 매칭 (냉장고 재료가 하나라도 들어간 레시피만 일치율 계산) → 종합 점수 상위 k개
+def match_recipes(fridge, user, target_min=None, target_max=None, k=5):
+    catalog = current_catalog(RECIPE_FILE)  # 파일이 바뀔 때만 다시 읽고 역색인 재생성
+    index = catalog.index
+    # 알레르기/기저질환 재료가 들어간 레시피 제외
+    ids, rate = index.partial(fridge.keys(), avoid=user.get('conditions', []), avoid_in_needs=True)
+    rate = (rate * 100).astype(int)
+    # 칼로리 필터
+    if target_min is not None and target_max is not None:
+        kcal = index.kcal[ids]
+        keep = (target_min <= kcal) & (kcal <= target_max)
+        ids, rate = ids[keep], rate[keep]
+    # 일치율 + 목표 범위 중앙 kcal 근접도 + 임박 재료 사용 가산점
+    goal = (target_min + target_max) / 2 if target_min is not None and target_max is not None else None
+    top, scores = top_k(index, ids, rate / 100, goal, expiring_items(fridge), k=k)
+    pos = np.searchsorted(ids, top)
     matched = []
-    for name, info in recipes.items():
-        ingredients = set(info['ingredients'])
-        match_rate = int(len(ingredients & fridge_items) / len(ingredients) * 100)
-        # 알레르기/기저질환 필터
-        if user_conditions & ingredients:
-            continue
-        # 칼로리 필터
-        if target_min is not None and target_max is not None:
-            if not (target_min <= info['calories'] <= target_max):
-                continue
+    for i, j, s in zip(top, pos, scores):
         matched.append({
-            'name': name,
-            'match_rate': match_rate,
-            'calories': info['calories'],
-            'desc': info['desc']
+            'name': catalog.names[i],
+            'match_rate': int(rate[j]),
+            'calories': catalog.kcal_of(i),
+            'desc': catalog.desc[i],
+            'score': round(float(s), 3)
         })
-    matched.sort(key=lambda x: x['match_rate'], reverse=True)
     return matched
 
 # 세션 상태 초기화
 if 'user' not in st.session_state:
-    st.session_state.user = load_data(USER_DATA_FILE, default={})
+    st.session_state.user, st.session_state.user_ver = load_data(USER_DATA_FILE, default={})
 if 'fridge' not in st.session_state:
-    st.session_state.fridge = load_data(FRIDGE_FILE, default={})
+    st.session_state.fridge, _ = load_data(FRIDGE_FILE, default={})
 
 st.set_page_config(page_title="건강/냉장고/솔루션", page_icon="🥗", layout="centered")
 
@@ -95,16 +115,14 @@ if menu == "몸 상태 입력":
         conditions_in = st.text_input("기저질환 (콤마 구분)", value=", ".join(user.get('conditions', [])))
         meds_in = st.text_input("복용중인 약 (콤마 구분)", value=", ".join(user.get('meds', [])))
         submitted = st.form_submit_button("저장")
-    if submitted:
-        st.session_state.user = {
+    if submitted and save_user({
             'height': height,
             'weight': weight,
             'age': int(age),
             'gender': gender,
             'conditions': [s.strip() for s in conditions_in.split(',') if s.strip()],
             'meds': [s.strip() for s in meds_in.split(',') if s.strip()],
-        }
-        save_data(USER_DATA_FILE, st.session_state.user)
+        }):
         st.success("신체 정보 저장 완료!")
     stats = calculate_inbody(st.session_state.user)
     if stats:
@@ -131,9 +149,8 @@ elif menu == "활력징후 입력":
             'condition_score': int(cond),
             'vitals_updated_at': datetime.now().isoformat(timespec='seconds')
         })
-        st.session_state.user = user
-        save_data(USER_DATA_FILE, user)
-        st.success("활력징후 저장 완료!")
+        if save_user(user):
+            st.success("활력징후 저장 완료!")
 
 elif menu == "냉장고 관리":
     st.subheader("🧊 냉장고 재료 관리")
@@ -147,13 +164,12 @@ elif menu == "냉장고 관리":
         action = st.selectbox("작업", ["추가/덮어쓰기", "삭제"])
         submitted = st.form_submit_button("실행")
     if submitted:
-        fridge = st.session_state.fridge.copy()
-        if action == "삭제":
-            fridge.pop(item, None)
-        else:
-            fridge[item] = {'quantity': quantity, 'exp_date': exp.isoformat()}
-        st.session_state.fridge = fridge
-        save_data(FRIDGE_FILE, fridge)
+        def apply(f):
+            if action == "삭제":
+                f.pop(item, None)
+            else:
+                f[item] = {'quantity': quantity, 'exp_date': exp.isoformat()}
+        update_fridge(apply)
         st.success("변경 완료!")
 
 elif menu == "유통기한 체크":
@@ -162,17 +178,22 @@ elif menu == "유통기한 체크":
     if not fridge:
         st.info("등록된 재료가 없습니다.")
     else:
-        today = datetime.now().date()
+        idx = fridge_expiry(fridge)
+        days = st.number_input("임박 기준 (일)", min_value=0, max_value=60, value=EXPIRING_DAYS, step=1)
+        n = idx.counts(days)
+        st.caption(f"만료 {n['expired']}개 · {days}일 이내 {n['soon']}개 · 날짜 오류 {n['undated']}개")
+        show = st.radio("보기", ["전체", "만료", f"{days}일 이내"], horizontal=True)
+        # 색인이 이미 유통기한순 — 만료/임박은 경계 이진 탐색으로 구간만 가져옴
+        keys = idx.ordered() if show == "전체" else (idx.expired() if show == "만료" else idx.within(days))
         rows = []
-        for item, info in fridge.items():
-            try:
-                exp = datetime.strptime(info['exp_date'], '%Y-%m-%d').date()
-                delta = (exp - today).days
-                status = "❌ 만료" if delta < 0 else (f"⚠️ 임박 (D-{delta})" if delta <= 3 else f"✅ 여유 (D+{delta})")
-                rows.append({'재료': item, '양': info['quantity'], '유통기한': exp.isoformat(), '남은일수': delta, '상태': status})
-            except:
-                rows.append({'재료': item, '양': info['quantity'], '유통기한': info['exp_date'], '남은일수': None, '상태': '형식 오류'})
-        rows.sort(key=lambda r: (r['남은일수'] is None, r['남은일수'] if r['남은일수'] is not None else 10**9))
+        for item in keys:
+            info = fridge[item]
+            delta = idx.days_left(item)
+            if delta is None:
+                rows.append({'재료': item, '양': info.get('quantity'), '유통기한': info.get('exp_date'), '남은일수': None, '상태': '형식 오류'})
+                continue
+            status = "❌ 만료" if delta < 0 else (f"⚠️ 임박 (D-{delta})" if delta <= days else f"✅ 여유 (D+{delta})")
+            rows.append({'재료': item, '양': info.get('quantity'), '유통기한': idx.expiry(item).isoformat(), '남은일수': delta, '상태': status})
         st.dataframe(rows, use_container_width=True)
 
 elif menu == "솔루션 추천":
@@ -187,10 +208,11 @@ elif menu == "솔루션 추천":
         target_min = int(stats['bmr'] * (factor - 0.1))
         target_max = int(stats['bmr'] * factor)
         st.write(f"목표 칼로리 범위: {target_min} ~ {target_max} kcal")
-        matches = match_recipes(fridge, user, target_min, target_max)
+        k = st.slider("보여줄 추천 수", min_value=1, max_value=20, value=5)
+        matches = match_recipes(fridge, user, target_min, target_max, k=k)
         if matches:
             for m in matches:
-                st.markdown(f"**{m['name']}** — {m['match_rate']}% 일치, {m['calories']} kcal\n- {m['desc']}")
+                st.markdown(f"**{m['name']}** — {m['match_rate']}% 일치, {m['calories']} kcal, 점수 {m['score']}\n- {m['desc']}")
         else:
             st.info("조건에 맞는 레시피가 없습니다.")
     else:
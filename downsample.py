@@ -0,0 +1,75 @@
+from typing import Iterable
+
+import numpy as np
+
+# 그래프 1개당 점 개수 상한 = 가로 픽셀 × 2 (픽셀 열마다 최솟값/최댓값 한 쌍)
+POINTS_PER_PX = 2
+
+
+def max_points_for(width_px: int) -> int:
+    return max(64, int(width_px) * POINTS_PER_PX)
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: 모양을 가장 잘 보존하는 n_out개 점의 인덱스."""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            nlo, nhi = edges[i + 1], edges[i + 2]
+        else:
+            nlo, nhi = n - 1, n
+        cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def minmax(y: np.ndarray, n_out: int) -> np.ndarray:
+    """구간마다 최솟값/최댓값 인덱스만 남김 — 임계치를 넘은 봉우리가 절대 사라지지 않음."""
+    n = len(y)
+    buckets = max(1, n_out // 2)
+    if n <= n_out:
+        return np.arange(n)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    keep = []
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        if hi > lo:
+            seg = y[lo:hi]
+            keep += [lo + int(np.argmin(seg)), lo + int(np.argmax(seg))]
+    return np.unique(keep)
+
+
+def crossings(y: np.ndarray, levels: Iterable[float]) -> np.ndarray:
+    # 값이 임계치 경계를 넘나드는 지점(전/후 두 점)
+    levels = np.sort(np.asarray(list(levels), dtype=np.float64))
+    if not len(levels) or len(y) < 2:
+        return np.empty(0, dtype=np.int64)
+    band = np.searchsorted(levels, y, side="right")
+    ch = np.nonzero(band[1:] != band[:-1])[0]
+    return np.union1d(ch, ch + 1)
+
+
+def downsample(x: np.ndarray, y: np.ndarray, max_points: int, levels: Iterable[float] = ()) -> np.ndarray:
+    """x 오름차순, y에 NaN 없는 시계열 → 그릴 점 인덱스(오름차순).
+
+    기본은 LTTB에 임계치 경계 통과 지점을 더한 것. 경계 통과가 너무 잦으면(상한의 절반 초과)
+    구간별 최솟값/최댓값으로 대체해 모든 이상 구간이 여전히 보이게 한다.
+    """
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+    y = np.asarray(y, dtype=np.float64)
+    cross = crossings(y, levels)
+    if len(cross) > max_points // 2:
+        return minmax(y, max_points)
+    return np.union1d(lttb(x, y, max_points - len(cross)), cross)
@@ -0,0 +1,107 @@
+from bisect import bisect_left, insort
+from datetime import date, datetime
+from typing import Any, Dict, Hashable, List, Mapping, Tuple
+
+# 날짜가 없거나 형식이 틀린 항목의 정렬 위치 (모든 날짜 뒤)
+NO_DATE = date.max.toordinal() + 1
+
+
+def parse_expiry(v) -> int:
+    """유통기한 값(date/datetime/"YYYY-MM-DD[THH:MM]") → 날짜 ordinal, 알 수 없으면 NO_DATE."""
+    if isinstance(v, datetime):
+        return v.date().toordinal()
+    if isinstance(v, date):
+        return v.toordinal()
+    if not v:
+        return NO_DATE
+    try:
+        return date.fromisoformat(str(v).strip()[:10]).toordinal()
+    except ValueError:
+        return NO_DATE
+
+
+class ExpiryIndex:
+    """유통기한순 재고 색인 — (날짜 ordinal, 순번, key) 정렬 리스트 + key → 위치 정보.
+
+    날짜는 넣을 때 한 번만 파싱한다. 추가/삭제는 이진 탐색으로 자리를 찾고,
+    "이미 만료"/"N일 이내" 조회는 경계 두 개를 이진 탐색해 그 구간만 잘라낸다.
+    key는 재료 이름 등 해시 가능한 값이면 되고 서로 비교하지 않는다(순번으로 구분).
+    """
+
+    def __init__(self, items: Mapping[Hashable, Any] | None = None):
+        self._order: List[Tuple[int, int, Hashable]] = []
+        self._pos: Dict[Hashable, Tuple[int, int, Any]] = {}  # key → (ordinal, 순번, 원래 값)
+        self._seq = 0
+        if items:
+            self.sync(items)
+
+    def __len__(self):
+        return len(self._pos)
+
+    def __contains__(self, key):
+        return key in self._pos
+
+    # ---------------- 갱신 ----------------
+    def add(self, key: Hashable, expiry):
+        """key의 유통기한을 넣거나 바꿈."""
+        self.remove(key)
+        ordinal = parse_expiry(expiry)
+        self._seq += 1
+        insort(self._order, (ordinal, self._seq, key))
+        self._pos[key] = (ordinal, self._seq, expiry)
+
+    def remove(self, key: Hashable) -> bool:
+        hit = self._pos.pop(key, None)
+        if hit is None:
+            return False
+        del self._order[bisect_left(self._order, hit[:2])]
+        return True
+
+    def sync(self, items: Mapping[Hashable, Any]) -> int:
+        """items(key → 유통기한 원래 값)와 같아지도록 바뀐 key만 추가/삭제 → 바뀐 수."""
+        changed = 0
+        for key in [k for k in self._pos if k not in items]:
+            self.remove(key)
+            changed += 1
+        for key, expiry in items.items():
+            hit = self._pos.get(key)
+            if hit is None or hit[2] != expiry:
+                self.add(key, expiry)
+                changed += 1
+        return changed
+
+    # ---------------- 조회 ----------------
+    def ordered(self) -> List[Hashable]:
+        """유통기한이 빠른 순 (날짜 없는 항목은 맨 뒤, 같은 날이면 먼저 넣은 것부터)."""
+        return [k for _, _, k in self._order]
+
+    def _slice(self, lo: int, hi: int) -> List[Hashable]:
+        # ordinal이 [lo, hi) 인 항목
+        i = bisect_left(self._order, (lo,))
+        j = bisect_left(self._order, (hi,))
+        return [k for _, _, k in self._order[i:j]]
+
+    def expired(self, today: date | None = None) -> List[Hashable]:
+        return self._slice(-1, (today or date.today()).toordinal())
+
+    def within(self, days: int, today: date | None = None, include_expired: bool = False) -> List[Hashable]:
+        """오늘부터 days일 안에 만료되는 항목 (include_expired면 이미 만료된 것도)."""
+        t = (today or date.today()).toordinal()
+        return self._slice(-1 if include_expired else t, t + days + 1)
+
+    def undated(self) -> List[Hashable]:
+        return [k for _, _, k in self._order[bisect_left(self._order, (NO_DATE,)):]]
+
+    def expiry(self, key: Hashable) -> date | None:
+        hit = self._pos.get(key)
+        return None if hit is None or hit[0] == NO_DATE else date.fromordinal(hit[0])
+
+    def days_left(self, key: Hashable, today: date | None = None) -> int | None:
+        d = self.expiry(key)
+        return None if d is None else (d - (today or date.today())).days
+
+    def counts(self, days: int, today: date | None = None) -> Dict[str, int]:
+        # 요약용: 만료 / days일 이내 / 날짜 없음 개수 (이진 탐색 세 번)
+        t = (today or date.today()).toordinal()
+        lo, mid, hi = (bisect_left(self._order, (x,)) for x in (t, t + days + 1, NO_DATE))
+        return {"expired": lo, "soon": mid - lo, "undated": len(self._order) - hi}
@@ -3,6 +3,8 @@ from datetime import datetime
 from pathlib import Path
 import streamlit as st
 
+from anthropometrics import bmi as calc_bmi
+
 # 🎨 가독성 개선 + 라운지 배너 예외
 st.markdown("""
     <style>
@@ -129,19 +131,14 @@ def compute_scores(user: dict, fridge: dict):
     life = 70
 
     # BMI
-    try:
-        h = float(user.get('height', 0))
-        w = float(user.get('weight', 0))
-        if h > 0 and w > 0:
-            bmi = w / ((h/100)**2)
-            if 18.5 <= bmi <= 23:
-                body += 10
-            elif bmi < 18.5 or bmi > 27.5:
-                body -= 10
-            else:
-                body -= 5
-    except Exception:
-        pass
+    bmi = calc_bmi(user.get('weight'), user.get('height'))
+    if bmi == bmi:  # 키/체중이 없으면 NaN
+        if 18.5 <= bmi <= 23:
+            body += 10
+        elif bmi < 18.5 or bmi > 27.5:
+            body -= 10
+        else:
+            body -= 5
 
     # 수면/컨디션 → 마음 점수
     sleep = user.get('sleep_hours')
@@ -0,0 +1,202 @@
+import gzip
+from io import BytesIO
+from typing import Dict, Any, List, IO
+
+import numpy as np
+import pandas as pd
+
+# 바디로그.py 기록 컬럼 정의 (앱/저장/가져오기 공용)
+ALL_METRICS = ["혈압", "심박수", "체온", "호흡수", "SPO2", "혈당", "체중", "BMI", "허리둘레"]
+UNIT_COLUMNS = {
+    "체온": "체온_단위",
+    "혈당": "혈당_단위",
+    "체중": "체중_단위",
+    "허리둘레": "허리둘레_단위",
+    "키": "키_단위",
+}
+BASE_COLUMNS = ["날짜", "시간"] + ALL_METRICS + list(UNIT_COLUMNS.values())
+SORT_KEYS = ["날짜", "시간"]
+
+# ---------------- 컬럼 타입 ----------------
+# 날짜/시간은 "YYYY-MM-DD"/"HH:MM:SS" 문자열(정렬 = 시간순), 수치 지표는 float32,
+# 단위 컬럼은 선택지가 고정된 category (청크끼리 이어 붙여도 category 유지)
+UNIT_CHOICES = {
+    "체온_단위": ["℃", "℉"],
+    "혈당_단위": ["mg/dL", "mmol/L"],
+    "체중_단위": ["kg", "lb"],
+    "허리둘레_단위": ["cm", "inch"],
+    "키_단위": ["cm", "inch"],
+}
+NUMERIC_METRICS = [m for m in ALL_METRICS if m != "혈압"]
+# (선택) pyarrow가 있으면 문자열 컬럼을 Arrow 버퍼에 저장 — 행당 파이썬 str 객체가 없어 메모리가 크게 줄어듦
+try:
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = "string[pyarrow]"
+except ImportError:
+    STRING_DTYPE = "string"
+TEXT_COLUMNS = ["날짜", "시간", "혈압"]
+DTYPES = {
+    **{c: STRING_DTYPE for c in TEXT_COLUMNS},
+    **{m: "float32" for m in NUMERIC_METRICS},
+    **{c: pd.CategoricalDtype(UNIT_CHOICES[c]) for c in UNIT_COLUMNS.values()},
+}
+CSV_CHUNK_ROWS = 100_000
+
+
+def _text_value(v) -> str | None:
+    # 폼 입력(date/time 객체)과 CSV 문자열을 같은 표기로
+    if v is None or v != v:
+        return None
+    if hasattr(v, "isoformat"):
+        return v.isoformat(timespec="seconds") if hasattr(v, "hour") and not hasattr(v, "year") else v.isoformat()
+    return str(v).strip() or None
+
+
+def typed(df: pd.DataFrame) -> pd.DataFrame:
+    """BASE_COLUMNS 순서 + DTYPES로 변환 (숫자가 아닌 값은 NaN, 모르는 단위는 빈 값)."""
+    df = df.reindex(columns=BASE_COLUMNS)
+    out = {}
+    for c in BASE_COLUMNS:
+        col = df[c]
+        if c in TEXT_COLUMNS:
+            if pd.api.types.infer_dtype(col, skipna=True) not in ("string", "empty"):
+                col = col.map(_text_value, na_action="ignore")  # date/time 객체가 섞인 경우만 행 단위 변환
+            out[c] = col.astype(STRING_DTYPE).str.strip()
+        elif c in NUMERIC_METRICS:
+            out[c] = pd.to_numeric(col, errors="coerce").astype("float32")
+        else:
+            if col.dtype == object or pd.api.types.is_string_dtype(col):
+                col = col.str.strip()
+            out[c] = pd.Series(pd.Categorical(col, dtype=DTYPES[c]), index=df.index)
+    return pd.DataFrame(out)
+
+
+# ---------------- 단위 정규화 ----------------
+# 지표 → (표준 단위, {다른 단위: (a, b)})  표준 값 = 값 * a + b
+UNIT_CONVERSIONS = {
+    "체온": ("℃", {"℉": (5 / 9, -32 * 5 / 9)}),
+    "혈당": ("mg/dL", {"mmol/L": (18.0, 0.0)}),
+    "체중": ("kg", {"lb": (0.45359237, 0.0)}),
+    "허리둘레": ("cm", {"inch": (2.54, 0.0)}),
+    "키": ("cm", {"inch": (2.54, 0.0)}),
+}
+
+
+def to_canonical(metric: str, value: float | None, unit: str | None) -> float | None:
+    # 값 하나 변환 (폼 입력용) — normalize_units와 같은 계수
+    if value is None:
+        return None
+    a, b = UNIT_CONVERSIONS[metric][1].get(unit, (1.0, 0.0))
+    return value * a + b
+
+
+def normalize_units(df: pd.DataFrame) -> pd.DataFrame:
+    """모든 수치 지표를 표준 단위(℃, mg/dL, kg, cm)로 — 지표마다 단위 category 코드로 계수를 골라 한 번에 계산.
+
+    단위가 비어 있거나 모르는 단위인 값은 이미 표준 단위로 본다. 단위 컬럼은 값이 있는 행만 표준 단위로 바뀐다.
+    """
+    out = df.copy(deep=False)
+    for metric, (canon, conv) in UNIT_CONVERSIONS.items():
+        unit_col = UNIT_COLUMNS[metric]
+        if metric not in df.columns or unit_col not in df.columns:
+            continue
+        units = df[unit_col]
+        if not isinstance(units.dtype, pd.CategoricalDtype):
+            units = pd.Series(pd.Categorical(units, dtype=DTYPES[unit_col]), index=df.index)
+        cats = list(units.cat.categories)
+        # 카테고리 순서대로의 계수 + 마지막 칸은 단위 없음(code -1)
+        a = np.array([conv.get(u, (1.0, 0.0))[0] for u in cats] + [1.0])
+        b = np.array([conv.get(u, (1.0, 0.0))[1] for u in cats] + [0.0])
+        codes = units.cat.codes.to_numpy()
+        vals = pd.to_numeric(df[metric], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        out[metric] = np.round(vals * a[codes] + b[codes], 2).astype("float32")
+        out[unit_col] = pd.Categorical.from_codes(np.where(np.isnan(vals), -1, cats.index(canon)), dtype=units.dtype)
+    return out
+
+
+def read_csv_typed(f: IO, chunksize: int = CSV_CHUNK_ROWS) -> pd.DataFrame:
+    """CSV를 청크 단위로 읽어 타입 변환 후 합침 — 문자열(object) 상태의 전체 파일이 메모리에 올라오지 않는다."""
+    chunks = pd.read_csv(f, dtype=str, usecols=lambda c: c in BASE_COLUMNS, chunksize=chunksize,
+                         encoding="utf-8-sig")
+    parts = [typed(c) for c in chunks]
+    return pd.concat(parts, ignore_index=True) if parts else typed(pd.DataFrame(columns=BASE_COLUMNS))
+
+
+# 내보내기 형식: (라벨, 파일 확장자, MIME)
+EXPORT_FORMATS = {
+    "csv": ("CSV", "csv", "text/csv"),
+    "csv.gz": ("CSV (gzip 압축)", "csv.gz", "application/gzip"),
+    "parquet": ("Parquet", "parquet", "application/octet-stream"),
+}
+
+
+def export_bytes(df: pd.DataFrame, fmt: str) -> bytes:
+    if fmt == "parquet":
+        bio = BytesIO()
+        df.to_parquet(bio, index=False)  # pyarrow 필요
+        return bio.getvalue()
+    data = df.to_csv(index=False).encode("utf-8-sig")
+    return gzip.compress(data, compresslevel=6) if fmt == "csv.gz" else data
+
+
+class HealthLog:
+    """행 버퍼 + 지연 DataFrame.
+
+    append()는 dict를 리스트에 붙이기만 하고(상각 O(1)), DataFrame은 표시/내보내기 때
+    frame()에서 밀린 행을 한 번의 concat으로 합쳐 만든다. 최신순 정렬본은 쓰기 전까지 캐시.
+    """
+
+    def __init__(self, df: pd.DataFrame | None = None):
+        self._frame = self._conform(df if df is not None else pd.DataFrame(columns=BASE_COLUMNS))
+        self._pending: List[Dict[str, Any]] = []
+        self._sorted: pd.DataFrame | None = None
+        self._normalized: pd.DataFrame | None = None
+        self.version = 0
+
+    @staticmethod
+    def _conform(df: pd.DataFrame) -> pd.DataFrame:
+        # 누락 컬럼 보충 + 컬럼 순서/타입 고정 (불러오기/생성 시 한 번만)
+        return typed(df).reset_index(drop=True)
+
+    # ---------------- 쓰기 ----------------
+    def append(self, row: Dict[str, Any]):
+        self._pending.append({c: row.get(c) for c in BASE_COLUMNS})
+        self._touch()
+
+    def replace(self, df: pd.DataFrame):
+        self._frame = self._conform(df)
+        self._pending = []
+        self._touch()
+
+    def _touch(self):
+        self._sorted = None
+        self._normalized = None
+        self.version += 1
+
+    # ---------------- 읽기 ----------------
+    def frame(self) -> pd.DataFrame:
+        """입력 순서 전체 DataFrame (밀린 행이 있으면 이때 한 번에 합침)."""
+        if self._pending:
+            new = typed(pd.DataFrame(self._pending, columns=BASE_COLUMNS))
+            self._frame = new if self._frame.empty else pd.concat([self._frame, new], ignore_index=True)
+            self._pending = []
+        return self._frame
+
+    def sorted_view(self) -> pd.DataFrame:
+        # 최신순 (날짜, 시간 내림차순) — 쓰기가 있을 때만 다시 정렬
+        if self._sorted is None:
+            self._sorted = self.frame().sort_values(SORT_KEYS, ascending=[False, False])
+        return self._sorted
+
+    def normalized(self) -> pd.DataFrame:
+        # 표준 단위 변환본 (입력 순서) — 차트/BMI/내보내기 공용, 쓰기가 있을 때만 다시 계산
+        if self._normalized is None:
+            self._normalized = normalize_units(self.frame())
+        return self._normalized
+
+    def __len__(self):
+        return len(self._frame) + len(self._pending)
+
+    @property
+    def empty(self) -> bool:
+        return len(self) == 0
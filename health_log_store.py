@@ -0,0 +1,240 @@
+import atexit
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Any, List
+
+import pandas as pd
+
+from health_log import BASE_COLUMNS, TEXT_COLUMNS, HealthLog, _text_value
+from jsonio import file_lock, version_of
+
+# (선택) pyarrow가 있으면 스냅샷을 Feather(Arrow IPC)로 — 없으면 pickle (dtype은 둘 다 유지)
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = feather = None
+
+HEALTH_LOG_DIR = Path("health_logs")
+FLUSH_SECS = 5.0       # 밀린 입력을 저널에 덧붙이는 주기
+COMPACT_ROWS = 5000    # 저널이 이 행 수를 넘으면 스냅샷을 새로 씀
+_GEN_KEY = b"health_log_gen"
+
+
+def user_slug(name: str) -> str:
+    # 사용자 이름 → 폴더 이름 (한글 허용, 경로 문자 제거)
+    slug = re.sub(r"[^\w.-]", "_", (name or "").strip())[:64].strip("._")
+    return slug or "default"
+
+
+def _jsonable(row: Dict[str, Any]) -> Dict[str, Any]:
+    # 폼 입력 값(date/time/numpy 수치) → 저널 한 줄
+    out = {}
+    for c, v in row.items():
+        if v is None or v != v:
+            continue
+        out[c] = _text_value(v) if c in TEXT_COLUMNS else (v.item() if hasattr(v, "item") else v)
+    return out
+
+
+class StoredHealthLog(HealthLog):
+    """사용자별 폴더에 저장되는 HealthLog.
+
+    health_logs/<사용자>/
+      log.feather    전체 스냅샷 (pyarrow 없으면 log.pkl) — 압축 없이 써서 읽을 때 memory map
+      journal.jsonl  스냅샷 이후 입력 행 (첫 줄은 {"gen": n} 헤더, 이후 한 줄 = 한 행)
+
+    append()는 메모리 버퍼에만 쌓고, 백그라운드 스레드가 flush_secs마다 밀린 행을 저널에 한 번에 덧붙인다.
+    파일은 처음 읽을 때(frame/len) 연다. 저널이 COMPACT_ROWS행을 넘으면 스냅샷을 gen+1로 새로 쓰고
+    저널을 새 헤더로 비운다 — 그 사이에 멈춰도 gen이 낮은 저널은 무시되므로 행이 두 번 들어가지 않는다.
+    """
+
+    def __init__(self, root, flush_secs: float = FLUSH_SECS):
+        super().__init__()
+        self.root = Path(root)
+        self.snapshot_path = self.root / ("log.feather" if feather else "log.pkl")
+        self.journal_path = self.root / "journal.jsonl"
+        self.flush_secs = flush_secs
+        self.last_error: str | None = None
+        self._lock = threading.RLock()
+        self._unsaved: List[Dict[str, Any]] = []
+        self._loaded = False
+        self._seen = None
+        self._gen = 0
+        self._journal_rows = 0
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    # ---------------- 파일 입출력 ----------------
+    def _sig(self):
+        # 다른 프로세스가 스냅샷/저널을 바꿨는지 감지
+        return version_of(self.snapshot_path), version_of(self.journal_path)
+
+    def _read_snapshot(self):
+        """→ (DataFrame | None, gen)"""
+        if not self.snapshot_path.exists():
+            return None, 0
+        if feather:
+            table = feather.read_table(self.snapshot_path, memory_map=True)
+            return table.to_pandas(), int((table.schema.metadata or {}).get(_GEN_KEY, b"0"))
+        df = pd.read_pickle(self.snapshot_path)
+        return df, int(df.attrs.get("gen", 0))
+
+    def _write_snapshot(self, df: pd.DataFrame, gen: int):
+        tmp = self.snapshot_path.with_name(f".{self.snapshot_path.name}.{os.getpid()}.tmp")
+        if feather:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            table = table.replace_schema_metadata({**(table.schema.metadata or {}), _GEN_KEY: str(gen).encode()})
+            feather.write_feather(table, tmp, compression="uncompressed")
+        else:
+            df = df.copy(deep=False)
+            df.attrs["gen"] = gen
+            df.to_pickle(tmp)
+        with open(tmp, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+
+    def _read_journal(self, gen: int) -> List[Dict[str, Any]]:
+        rows, head = [], 0
+        try:
+            with open(self.journal_path, encoding="utf-8") as f:
+                for i, line in enumerate(f):
+                    try:
+                        rec = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # 쓰다 만 마지막 줄
+                    if i == 0 and set(rec) == {"gen"}:
+                        head = rec["gen"]
+                    else:
+                        rows.append(rec)
+        except FileNotFoundError:
+            return []
+        return rows if head >= gen else []  # 이미 스냅샷에 합쳐진 저널
+
+    def _reset_journal(self, gen: int):
+        with open(self.journal_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"gen": gen}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _load(self):
+        # 호출하는 쪽이 self._lock + 저널 파일 잠금을 쥔 상태
+        base, self._gen = self._read_snapshot()
+        rows = self._read_journal(self._gen)
+        self._frame = self._conform(base if base is not None else pd.DataFrame(columns=BASE_COLUMNS))
+        self._pending = rows + self._unsaved  # 아직 저널에 없는 입력은 메모리에 그대로
+        self._journal_rows = len(rows)
+        self._seen = self._sig()
+        self._loaded = True
+        self._touch()
+
+    def _ensure_loaded(self):
+        with self._lock:
+            if self._loaded and self._sig() == self._seen:
+                return
+            with file_lock(self.journal_path):
+                self._load()
+
+    # ---------------- 쓰기 ----------------
+    def append(self, row: Dict[str, Any]):
+        with self._lock:
+            super().append(row)
+            self._unsaved.append(self._pending[-1])
+
+    def replace(self, df: pd.DataFrame):
+        # 파일 불러오기 = 전체 교체이므로 바로 스냅샷으로 씀 (저장 대기 입력은 버림)
+        with self._lock, file_lock(self.journal_path):
+            self._unsaved = []
+            super().replace(df)
+            self._gen += 1
+            self._write_snapshot(self._frame, self._gen)
+            self._reset_journal(self._gen)
+            self._journal_rows = 0
+            self._seen = self._sig()
+            self._loaded = True
+
+    def flush(self) -> int:
+        """저장 대기 행을 저널에 한 번에 덧붙임 → 쓴 행 수."""
+        with self._lock:
+            if not self._unsaved:
+                return 0
+            rows, self._unsaved = self._unsaved, []
+            data = "".join(json.dumps(_jsonable(r), ensure_ascii=False) + "\n" for r in rows)
+            try:
+                with file_lock(self.journal_path):
+                    fresh = self._sig() == self._seen
+                    if not self.journal_path.exists():
+                        self._reset_journal(self._gen)
+                    with open(self.journal_path, "a", encoding="utf-8") as f:
+                        f.write(data)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    if fresh:  # 다른 프로세스의 변경이 있었다면 다음 읽기에서 다시 불러오도록 둠
+                        self._seen = self._sig()
+            except Exception:
+                self._unsaved = rows + self._unsaved
+                raise
+            self._journal_rows += len(rows)
+            if self._journal_rows >= COMPACT_ROWS:
+                self.compact()
+            return len(rows)
+
+    def compact(self):
+        """디스크 상태(스냅샷 + 저널)를 새 스냅샷 하나로 합치고 저널을 비움."""
+        with self._lock:
+            self.flush()
+            with file_lock(self.journal_path):
+                if not self._loaded or self._sig() != self._seen:
+                    self._load()
+                df = super().frame()
+                self._gen += 1
+                self._write_snapshot(df, self._gen)
+                self._reset_journal(self._gen)
+                self._journal_rows = 0
+                self._seen = self._sig()
+
+    def _loop(self):
+        while not self._wake.wait(self.flush_secs):
+            try:
+                self.flush()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+
+    def close(self):
+        self._wake.set()
+        self.flush()
+
+    @property
+    def unsaved(self) -> int:
+        return len(self._unsaved)
+
+    # ---------------- 읽기 ----------------
+    def frame(self) -> pd.DataFrame:
+        with self._lock:
+            self._ensure_loaded()
+            return super().frame()
+
+    def sorted_view(self) -> pd.DataFrame:
+        with self._lock:
+            self._ensure_loaded()
+            return super().sorted_view()
+
+    def normalized(self) -> pd.DataFrame:
+        with self._lock:
+            self._ensure_loaded()
+            return super().normalized()
+
+    def __len__(self):
+        with self._lock:
+            self._ensure_loaded()
+            return super().__len__()
+
+
+def open_user_log(user: str, root: Path = HEALTH_LOG_DIR) -> StoredHealthLog:
+    return StoredHealthLog(Path(root) / user_slug(user))
@@ -0,0 +1,299 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+import warnings
+from contextlib import contextmanager
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from expiry_index import ExpiryIndex
+from jsonio import CorruptFile, atomic_write_bytes, dumps, file_lock, load_json, quarantine
+
+# 저널 줄이 이만큼 쌓이면 스냅샷으로 합침
+COMPACT_EVERY = 200
+
+# 단위 → (기준 단위, 배수). 같은 기준 단위끼리만 수량을 합친다. 표에 없는 단위는 그 자체가 기준 단위.
+UNITS = {
+    "g": ("g", 1.0), "그램": ("g", 1.0), "kg": ("g", 1000.0), "킬로그램": ("g", 1000.0), "mg": ("g", 0.001),
+    "ml": ("ml", 1.0), "밀리리터": ("ml", 1.0), "l": ("ml", 1000.0), "리터": ("ml", 1000.0),
+    "개": ("개", 1.0), "ea": ("개", 1.0), "pcs": ("개", 1.0), "pc": ("개", 1.0),
+}
+
+
+def normalize_name(name: str) -> str:
+    # 전각/반각·대소문자·공백 차이를 없앤 조회 키
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", name or "")).strip().lower()
+
+
+def lot_id(name: str, expires_on, base: str) -> str:
+    # 로트 = (정규화 이름, 유통기한, 기준 단위) — 결정적 id라 어느 프로세스/재시작에서도 같은 로트는 같은 id
+    return hashlib.sha1(f"{normalize_name(name)}\0{expires_on or ''}\0{base}".encode("utf-8")).hexdigest()[:16]
+
+
+def to_base(quantity, unit: str) -> Tuple[float, str]:
+    """(수량, 단위) → (기준 단위 수량, 기준 단위)."""
+    unit = (unit or "").strip()
+    base, factor = UNITS.get(unit.lower(), (unit, 1.0))
+    try:
+        q = float(quantity or 0)
+    except (TypeError, ValueError):
+        q = 0.0
+    return q * factor, base
+
+
+class IngredientStore:
+    """정규화한 재료 이름 → 로트(유통기한별 묶음) 색인 + 스냅샷(JSON) / 추가 전용 저널(JSONL).
+
+    스냅샷은 기존 ingredients.json과 같은 항목 목록 형식(항목 = 로트, "id" 추가)이라 기존 파일을 그대로 읽는다.
+    같은 이름·같은 유통기한·같은 기준 단위로 다시 넣으면 새 항목 대신 그 로트의 수량을 늘린다.
+    변경은 저널에 한 줄씩만 추가한다 (전체 파일을 다시 쓰지 않음).
+      {"op": "put", "lot": {...}} / {"op": "del", "key": "<정규화 이름>"} / {"op": "clear"}
+    재생은 멱등이라 스냅샷 교체 후 저널 삭제 전에 멈춰도 상태가 어긋나지 않는다.
+    """
+
+    def __init__(self, path, compact_every: int = COMPACT_EVERY):
+        self.path = Path(path)
+        self.journal = self.path.with_name(self.path.stem + ".journal.jsonl")
+        self.compact_every = compact_every
+        self.version = 0
+        self._lock = threading.RLock()
+        self._by_name: Dict[str, Dict[str, Dict[str, Any]]] = {}  # 정규화 이름 → {로트 id → 로트}
+        self._lots: Dict[str, Dict[str, Any]] = {}                # 로트 id → 로트
+        self._totals: Dict[str, Dict[str, List]] = {}             # 정규화 이름 → {기준 단위 → [합계, 로트 수]}
+        self._expiry = ExpiryIndex()                               # 로트 id 유통기한순
+        self._names: frozenset | None = None
+        self._seen = None
+        self._ops = 0
+        with self._lock:
+            self._load()
+
+    # ---------------- 파일 ----------------
+    def _sig(self):
+        try:
+            a = self.path.stat()
+            a = a.st_mtime_ns, a.st_size
+        except FileNotFoundError:
+            a = None
+        try:
+            b = self.journal.stat()
+            b = b.st_mtime_ns, b.st_size
+        except FileNotFoundError:
+            b = None
+        return a, b
+
+    def _load(self):
+        self._by_name, self._lots, self._totals = {}, {}, {}
+        self._expiry = ExpiryIndex()
+        self._names = None
+        try:
+            items = load_json(self.path, [], strict=True)
+        except CorruptFile:
+            # 깨진 스냅샷은 보관해 두고 빈 목록에서 시작 (저널에 남은 변경은 그대로 재생)
+            backup = quarantine(self.path)
+            warnings.warn(str(CorruptFile(self.path, backup)))
+            items = []
+        for item in items:
+            self._merge_legacy(item)
+        self._ops = 0
+        try:
+            with self.journal.open(encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # 쓰다 만 마지막 줄
+                    self._apply(rec)
+                    self._ops += 1
+        except FileNotFoundError:
+            pass
+        self._seen = self._sig()
+        self.version += 1
+
+    def _merge_legacy(self, item: Dict[str, Any]):
+        # 스냅샷 항목: id가 있으면 그대로, 없는(이전 형식) 항목은 같은 로트끼리 합쳐 id 부여
+        if item.get("id"):
+            self._put(item)
+            return
+        lot = self._find_lot(item.get("name", ""), item.get("expires_on"), item.get("quantity"), item.get("unit", ""))
+        if lot["id"] not in self._lots and item.get("added_at"):
+            lot["added_at"] = item["added_at"]
+        if lot.get("name"):
+            self._put(lot)
+
+    def refresh(self) -> bool:
+        """다른 프로세스가 파일을 바꿨으면 다시 읽음 → 다시 읽었는지."""
+        with self._lock:
+            if self._sig() == self._seen:
+                return False
+            with file_lock(self.journal):
+                self._load()
+            return True
+
+    @contextmanager
+    def _locked(self):
+        # 변경 공통: 프로세스 내 잠금 + 저널 파일 잠금, 다른 프로세스의 변경을 먼저 반영
+        with self._lock:
+            with file_lock(self.journal):
+                if self._sig() != self._seen:
+                    self._load()
+                yield
+            if self._ops >= self.compact_every:
+                self.compact()
+
+    def _log(self, rec: Dict[str, Any]):
+        # _locked() 안에서만 호출
+        with self.journal.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._apply(rec)
+        self._seen = self._sig()
+        self._ops += 1
+
+    def compact(self):
+        """현재 상태를 스냅샷으로 쓰고 저널을 비움."""
+        with self._lock, file_lock(self.journal):
+            self._load()
+            atomic_write_bytes(self.path, dumps(self.lots()))
+            self.journal.unlink(missing_ok=True)
+            self._ops = 0
+            self._seen = self._sig()
+
+    # ---------------- 메모리 색인 ----------------
+    def _put(self, lot: Dict[str, Any]):
+        key = normalize_name(lot["name"])
+        old, names = self._lots.get(lot["id"]), self._names
+        self._drop(lot["id"])
+        if old is not None and old["name"] == lot["name"]:
+            self._names = names  # 같은 로트 수량만 바뀜 → 이름 집합 그대로
+        self._lots[lot["id"]] = lot
+        if key not in self._by_name:
+            self._by_name[key] = {}
+            self._names = None
+        self._by_name[key][lot["id"]] = lot
+        q, base = to_base(lot.get("quantity"), lot.get("unit", ""))
+        t = self._totals.setdefault(key, {}).setdefault(base, [0.0, 0])
+        t[0] += q
+        t[1] += 1
+        self._expiry.add(lot["id"], lot.get("expires_on"))
+
+    def _drop(self, lot_id: str):
+        lot = self._lots.pop(lot_id, None)
+        if lot is None:
+            return
+        key = normalize_name(lot["name"])
+        q, base = to_base(lot.get("quantity"), lot.get("unit", ""))
+        t = self._totals[key][base]
+        t[0] -= q
+        t[1] -= 1
+        if not t[1]:
+            del self._totals[key][base]
+        del self._by_name[key][lot_id]
+        if not self._by_name[key]:
+            del self._by_name[key], self._totals[key]
+            self._names = None
+        self._expiry.remove(lot_id)
+
+    def _apply(self, rec: Dict[str, Any]):
+        op = rec.get("op")
+        if op == "put":
+            self._put(rec["lot"])
+        elif op == "del":
+            for lot_id in list(self._by_name.get(rec["key"], ())):
+                self._drop(lot_id)
+        elif op == "clear":
+            self._by_name, self._lots, self._totals = {}, {}, {}
+            self._expiry = ExpiryIndex()
+            self._names = None
+        self.version += 1
+
+    def _find_lot(self, name: str, expires_on, quantity, unit: str) -> Dict[str, Any]:
+        """같은 이름·유통기한·기준 단위 로트가 있으면 수량을 더한 새 로트, 없으면 새 로트 (id 조회 한 번)."""
+        q, base = to_base(quantity, unit)
+        id_ = lot_id(name, expires_on, base)
+        lot = self._lots.get(id_)
+        if lot is not None:
+            lq, _ = to_base(lot.get("quantity"), lot.get("unit", ""))
+            return {**lot, "quantity": lq + q, "unit": base, "updated_at": datetime.now().isoformat(timespec="seconds")}
+        return {"id": id_, "name": (name or "").strip(), "quantity": q, "unit": base,
+                "expires_on": expires_on, "added_at": datetime.now().isoformat(timespec="seconds")}
+
+    # ---------------- 쓰기 ----------------
+    def add(self, name: str, quantity, unit: str, expires_on: str | None = None) -> Dict[str, Any]:
+        """재료 추가 → 저장된 로트 (같은 로트면 수량 합산). 수량은 기준 단위(g/ml/개 등)로 저장."""
+        with self._locked():
+            lot = self._find_lot(name, expires_on or None, quantity, unit)
+            self._log({"op": "put", "lot": lot})
+        return lot
+
+    def remove(self, name: str) -> int:
+        """이름(정규화 비교)이 같은 모든 로트 삭제 → 삭제한 로트 수."""
+        key = normalize_name(name)
+        with self._locked():
+            n = len(self._by_name.get(key, ()))
+            if n:
+                self._log({"op": "del", "key": key})
+        return n
+
+    def clear(self) -> int:
+        with self._locked():
+            n = len(self._lots)
+            self._log({"op": "clear"})
+        return n
+
+    # ---------------- 읽기 ----------------
+    def __len__(self):
+        return len(self._lots)
+
+    def __contains__(self, name: str) -> bool:
+        return normalize_name(name) in self._by_name
+
+    def get(self, name: str) -> List[Dict[str, Any]]:
+        """이름의 로트 목록 (유통기한순은 아님 — 입력 순)."""
+        with self._lock:
+            return [dict(l) for l in self._by_name.get(normalize_name(name), {}).values()]
+
+    def total(self, name: str) -> Dict[str, float]:
+        # 기준 단위별 합계, 예: {"g": 1500.0}
+        with self._lock:
+            return {base: t[0] for base, t in self._totals.get(normalize_name(name), {}).items()}
+
+    def names(self) -> frozenset:
+        """보유 재료 이름 집합 (추천용) — 이름이 새로 생기거나 없어질 때만 다시 만듦."""
+        with self._lock:
+            if self._names is None:
+                self._names = frozenset(next(iter(lots.values()))["name"] for lots in self._by_name.values())
+            return self._names
+
+    # 조회 결과는 잠금 안에서 만든 로트 사본 — 다른 스레드의 변경/다시 읽기와 섞이지 않는다
+    def lots(self, by_expiry: bool = False) -> List[Dict[str, Any]]:
+        with self._lock:
+            ids = self._expiry.ordered() if by_expiry else self._lots
+            return [dict(self._lots[i]) for i in ids]
+
+    def expired(self, today: date | None = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(self._lots[i]) for i in self._expiry.expired(today)]
+
+    def expiring(self, days: int, today: date | None = None) -> List[Dict[str, Any]]:
+        """오늘부터 days일 안에 만료되는 로트, 유통기한순."""
+        with self._lock:
+            return [dict(self._lots[i]) for i in self._expiry.within(days, today)]
+
+    def expiring_names(self, days: int, today: date | None = None) -> set:
+        with self._lock:
+            return {self._lots[i]["name"] for i in self._expiry.within(days, today)}
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        # 이름별 합계/로트 수/가장 빠른 유통기한
+        with self._lock:
+            out = {}
+            for key, lots in self._by_name.items():
+                name = next(iter(lots.values()))["name"]
+                first = min((l["expires_on"] for l in lots.values() if l.get("expires_on")), default=None)
+                out[name] = {"total": self.total(name), "lots": len(lots), "first_expiry": first}
+            return out
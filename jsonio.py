@@ -0,0 +1,153 @@
+import copy
+import json
+import os
+import threading
+import time
+import warnings
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# 잠금 대기 상한(초) — 넘으면 LockTimeout
+LOCK_TIMEOUT = 10.0
+
+Version = Tuple[int, int]
+
+
+class LockTimeout(TimeoutError):
+    pass
+
+
+class VersionConflict(RuntimeError):
+    """읽은 뒤 다른 세션/워커가 파일을 먼저 바꿨을 때."""
+
+
+class CorruptFile(ValueError):
+    def __init__(self, path: Path, backup: Path | None = None):
+        super().__init__(f"{path} 손상" + (f" — {backup.name} 로 보관" if backup else ""))
+        self.path = path
+        self.backup = backup
+
+
+def _lock_path(path: Path) -> Path:
+    return path.with_name(path.name + ".lock")
+
+
+@contextmanager
+def file_lock(path, timeout: float = LOCK_TIMEOUT):
+    """path 옆의 .lock 파일에 대한 배타적 권고 잠금 (프로세스 간). timeout 초까지 재시도."""
+    lock = _lock_path(Path(path))
+    lock.parent.mkdir(parents=True, exist_ok=True)
+    f = open(lock, "a+b")
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            try:
+                if fcntl:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise LockTimeout(f"{path} 잠금 대기 시간 초과({timeout}초)")
+                time.sleep(0.02)
+        yield
+    finally:
+        try:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        except OSError:
+            pass
+        f.close()
+
+
+def version_of(path) -> Version | None:
+    # 낙관적 동시성 검사용 버전 = (mtime_ns, size). 파일이 없으면 None
+    try:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+    except FileNotFoundError:
+        return None
+
+
+def atomic_write_bytes(path, data: bytes):
+    """임시 파일에 쓰고 fsync 후 rename — 읽는 쪽은 항상 이전 또는 새 파일 전체만 본다."""
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    if fcntl:  # 디렉터리 엔트리까지 디스크에 반영 (POSIX)
+        fd = os.open(path.parent, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def dumps(data) -> bytes:
+    return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def quarantine(path) -> Path:
+    # 깨진 파일을 .corrupt-시각 이름으로 옮겨 보관 → 보관 경로
+    path = Path(path)
+    backup = path.with_name(f"{path.name}.corrupt-{datetime.now():%Y%m%d%H%M%S}")
+    os.replace(path, backup)
+    return backup
+
+
+def load_json(path, default, strict: bool = False):
+    """없으면 default.
+
+    깨진 파일을 조용히 default로 바꾸지 않는다: strict면 파일을 그대로 두고 CorruptFile,
+    아니면 .corrupt-시각 이름으로 옮겨 보관(다음 저장이 덮어쓰지 않게)하고 경고 후 default.
+    """
+    path = Path(path)
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return default
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        if strict:
+            raise CorruptFile(path)
+        warnings.warn(str(CorruptFile(path, quarantine(path))))
+        return default
+
+
+def load_versioned(path, default, strict: bool = False) -> Tuple[Any, Version | None]:
+    with file_lock(path):
+        return load_json(path, default, strict), version_of(path)
+
+
+def save_json(path, data, expected: Version | None | bool = False) -> Version | None:
+    """잠금 + 원자적 쓰기. expected를 주면(load_versioned의 버전) 그 사이 바뀐 경우 VersionConflict."""
+    with file_lock(path):
+        if expected is not False and version_of(path) != expected:
+            raise VersionConflict(str(path))
+        atomic_write_bytes(path, dumps(data))
+        return version_of(path)
+
+
+def update_json(path, fn: Callable[[Any], Any], default):
+    """잠금을 쥔 채 읽기→fn(data)→쓰기. fn이 None을 돌려주면 data를 제자리 수정한 것으로 본다."""
+    with file_lock(path):
+        data = load_json(path, copy.deepcopy(default))
+        new = fn(data)
+        data = data if new is None else new
+        atomic_write_bytes(path, dumps(data))
+        return data
@@ -0,0 +1,195 @@
+import csv
+import hashlib
+import io
+import json
+import re
+import shutil
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from jsonio import Version, atomic_write_bytes, dumps, version_of
+from recipe_index import RecipeIndex, to_csr
+
+# 원본 파일의 열/키 이름 → 카탈로그 필드 (FridgeGenie RULES / dael 레시피 DB 형식 모두)
+FIELD_ALIASES = {
+    "name": ["name", "recipe", "이름", "레시피"],
+    "need": ["need", "ingredients", "재료"],
+    "avoid_any": ["avoid_any", "avoid", "피해야할", "제외"],
+    "kcal": ["kcal", "calories", "칼로리"],
+    "desc": ["desc", "description", "설명"],
+}
+# 캐시 형식 버전 — RecipeCatalog의 배열/필드 구성이 바뀌면 올린다 (이전 형식 캐시는 읽지 않고 지움)
+CACHE_FORMAT = 2
+CACHE_ARRAYS = ("need_ptr", "need_ids", "avoid_ptr", "avoid_ids", "kcal")
+
+
+def _field(rec: Dict[str, Any], key: str):
+    for a in FIELD_ALIASES[key]:
+        if a in rec:
+            return rec[a]
+    return None
+
+
+def _items(v) -> List[str]:
+    # 목록 또는 "a;b|c" 문자열 → 공백 정리된 문자열 목록
+    if v is None:
+        return []
+    parts = v if isinstance(v, list) else re.split(r"[;|]", str(v))
+    return [str(p).strip() for p in parts if str(p).strip()]
+
+
+def parse_source(raw: bytes, suffix: str) -> List[Dict[str, Any]]:
+    """JSON(목록 또는 {이름: {...}}) / CSV(재료는 ; 또는 | 로 구분) → 레시피 dict 목록."""
+    if suffix == ".csv":
+        return list(csv.DictReader(io.StringIO(raw.decode("utf-8-sig"))))
+    data = json.loads(raw.decode("utf-8-sig"))
+    if isinstance(data, dict):  # dael 형식: {"샐러드": {"ingredients": [...], ...}}
+        return [{"name": name, **info} for name, info in data.items()]
+    return data
+
+
+class RecipeCatalog:
+    """intern된 레시피 카탈로그.
+
+    재료/제외 조건 문자열은 vocab 안의 int id 하나로 저장하고(같은 문자열은 객체 하나),
+    레시피별 목록은 CSR 배열(ptr, ids), kcal은 float32 배열로 둔다. 이름/설명만 파이썬 문자열 목록.
+    """
+
+    def __init__(self, records: Iterable[Dict[str, Any]]):
+        names, descs, kcal, needs, avoids = [], [], [], [], []
+        for rec in records:
+            name = str(_field(rec, "name") or "").strip()
+            if not name:
+                continue
+            names.append(sys.intern(name))
+            descs.append(str(_field(rec, "desc") or ""))
+            try:
+                kcal.append(float(_field(rec, "kcal")))
+            except (TypeError, ValueError):
+                kcal.append(np.nan)
+            needs.append([sys.intern(s) for s in _items(_field(rec, "need"))])
+            avoids.append([sys.intern(s) for s in _items(_field(rec, "avoid_any"))])
+        vocab: Dict[str, int] = {}
+        self.need_ptr, self.need_ids = to_csr(needs, vocab)
+        self.avoid_ptr, self.avoid_ids = to_csr(avoids, vocab)
+        self.vocab = list(vocab)
+        self.names = names
+        self.desc = descs
+        self.kcal = np.array(kcal, dtype=np.float32)
+        self._index: RecipeIndex | None = None
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_parts(cls, arrays: Dict[str, np.ndarray], vocab: List[str], names: List[str],
+                   desc: List[str]) -> "RecipeCatalog":
+        # 캐시에서 복원 — 역색인은 캐시에 넣지 않고 필요할 때 배열에서 다시 만든다 (정렬 한 번)
+        self = cls.__new__(cls)
+        self.__dict__.update(arrays)
+        self.vocab = [sys.intern(s) for s in vocab]
+        self.names = [sys.intern(s) for s in names]
+        self.desc = desc
+        self._index = None
+        return self
+
+    @property
+    def index(self) -> RecipeIndex:
+        if self._index is None:
+            self._index = RecipeIndex.from_csr(self.vocab, self.need_ptr, self.need_ids,
+                                               self.avoid_ptr, self.avoid_ids, self.kcal)
+        return self._index
+
+    def need(self, i: int) -> List[str]:
+        return [self.vocab[j] for j in self.need_ids[self.need_ptr[i]:self.need_ptr[i + 1]]]
+
+    def avoid(self, i: int) -> List[str]:
+        return [self.vocab[j] for j in self.avoid_ids[self.avoid_ptr[i]:self.avoid_ptr[i + 1]]]
+
+    def kcal_of(self, i: int) -> int | float | None:
+        # 정수면 int, 값이 없으면(NaN) None — json.dumps가 NaN을 쓰지 않도록
+        k = float(self.kcal[i])
+        if k != k:
+            return None
+        return int(k) if k.is_integer() else k
+
+    def recipe(self, i: int) -> Dict[str, Any]:
+        """레시피 i → 기존 RULES 항목과 같은 dict."""
+        return {"name": self.names[i], "need": self.need(i), "avoid_any": self.avoid(i),
+                "kcal": self.kcal_of(i), "desc": self.desc[i]}
+
+
+def _cache_root(path: Path) -> Path:
+    return path.with_name(f".{path.name}.cache")
+
+
+def _cache_dir(path: Path, digest: str) -> Path:
+    return _cache_root(path) / f"{digest}-v{CACHE_FORMAT}"
+
+
+def _read_cache(cache: Path, digest: str) -> RecipeCatalog:
+    # meta.json은 마지막에 쓰므로 있으면 배열도 모두 있다. 배열은 memory map(읽기 전용)으로 연다.
+    meta = json.loads((cache / "meta.json").read_text(encoding="utf-8"))
+    if meta.get("format") != CACHE_FORMAT or meta.get("digest") != digest:
+        raise ValueError("cache format mismatch")
+    arrays = {name: np.load(cache / f"{name}.npy", mmap_mode="r", allow_pickle=False) for name in CACHE_ARRAYS}
+    return RecipeCatalog.from_parts(arrays, meta["vocab"], meta["names"], meta["desc"])
+
+
+def _write_cache(cache: Path, digest: str, cat: RecipeCatalog):
+    cache.mkdir(parents=True, exist_ok=True)
+    for name in CACHE_ARRAYS:
+        buf = io.BytesIO()
+        np.save(buf, np.ascontiguousarray(getattr(cat, name)), allow_pickle=False)
+        atomic_write_bytes(cache / f"{name}.npy", buf.getvalue())
+    atomic_write_bytes(cache / "meta.json", dumps({
+        "format": CACHE_FORMAT, "digest": digest, "vocab": cat.vocab, "names": cat.names, "desc": cat.desc}))
+
+
+def load_catalog(path) -> RecipeCatalog:
+    """원본 파일 → 카탈로그. 원본 내용의 해시 + 캐시 형식 버전으로 이름 붙인 캐시가 있으면 파싱 없이 그것을 읽는다.
+
+    캐시는 배열별 .npy(memory map으로 열어 복사 없이 공유) + 문자열 목록 meta.json이라 pickle을 쓰지 않는다.
+    원본이나 형식 버전이 바뀌면 새로 파싱하고 캐시를 다시 쓴다(이전 캐시는 삭제). 없는 파일은 빈 카탈로그.
+    """
+    path = Path(path)
+    try:
+        raw = path.read_bytes()
+    except FileNotFoundError:
+        return RecipeCatalog([])
+    digest = hashlib.sha256(raw).hexdigest()[:16]
+    cache = _cache_dir(path, digest)
+    try:
+        return _read_cache(cache, digest)
+    except Exception:
+        pass  # 없거나 깨졌거나 예전 형식의 캐시 → 원본에서 다시 만듦
+    cat = RecipeCatalog(parse_source(raw, path.suffix.lower()))
+    try:
+        _write_cache(cache, digest, cat)
+        for old in _cache_root(path).iterdir():
+            if old != cache:
+                shutil.rmtree(old, ignore_errors=True)
+        for old in path.parent.glob(f".{path.name}.*.pkl"):  # 형식 1(pickle) 캐시
+            old.unlink(missing_ok=True)
+    except OSError:
+        pass  # 읽기 전용 위치면 캐시 없이 사용
+    return cat
+
+
+_loaded: Dict[str, Tuple[Version | None, RecipeCatalog]] = {}
+_loaded_lock = threading.Lock()
+
+
+def current_catalog(path) -> RecipeCatalog:
+    """프로세스 공용 카탈로그 — 원본 파일이 바뀐 경우(mtime/크기)에만 다시 불러오고 역색인도 새로 만든다."""
+    key = str(Path(path).resolve())
+    sig = version_of(path)
+    with _loaded_lock:
+        hit = _loaded.get(key)
+        if hit is None or hit[0] != sig:
+            hit = _loaded[key] = (sig, load_catalog(path))
+        return hit[1]
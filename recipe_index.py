@@ -0,0 +1,122 @@
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+_EMPTY = np.zeros(0, dtype=np.int32)
+
+
+def to_csr(lists: Sequence[Iterable[str]], vocab: Dict[str, int]) -> Tuple[np.ndarray, np.ndarray]:
+    """문자열 목록의 목록 → (ptr, ids) — 레시피 i의 항목은 ids[ptr[i]:ptr[i+1]] (중복 제거, vocab에 intern)."""
+    ptr, ids = [0], []
+    for items in lists:
+        ids.extend(vocab.setdefault(s, len(vocab)) for s in dict.fromkeys(items))
+        ptr.append(len(ids))
+    return np.array(ptr, dtype=np.int32), np.array(ids, dtype=np.int32)
+
+
+def _postings(vocab: Sequence[str], ptr: np.ndarray, ids: np.ndarray) -> Dict[str, np.ndarray]:
+    # 항목 id → 그 항목이 들어간 레시피 id (오름차순 int32) — 정렬 한 번으로 모든 posting list
+    rid = np.repeat(np.arange(len(ptr) - 1, dtype=np.int32), np.diff(ptr))
+    order = np.argsort(ids, kind="stable")
+    keys, starts = np.unique(ids[order], return_index=True)
+    return {vocab[k]: p for k, p in zip(keys.tolist(), np.split(rid[order], starts[1:]))}
+
+
+class RecipeIndex:
+    """레시피 목록의 역색인 — 재료 → posting list(레시피 id), 레시피별 필요 재료 수, kcal 배열.
+
+    레시피 id는 생성 때 넘긴 목록의 위치. 조회는 사용자가 가진 재료의 posting list만 이어 붙여
+    레시피별 일치 수를 세므로, 카탈로그 크기가 아니라 가진 재료가 들어간 레시피 수에 비례한다.
+    "전부 있음" = 일치 수 == 필요 재료 수, "부분 일치" = 일치 수 / 필요 재료 수.
+    """
+
+    def __init__(self, needs: Sequence[Iterable[str]], avoids: Sequence[Iterable[str]] | None = None,
+                 kcal: Sequence[float] | None = None):
+        vocab: Dict[str, int] = {}
+        ptr, ids = to_csr(needs, vocab)
+        avoid_ptr, avoid_ids = to_csr(avoids or [[] for _ in needs], vocab)
+        self._build(list(vocab), ptr, ids, avoid_ptr, avoid_ids, kcal)
+
+    @classmethod
+    def from_csr(cls, vocab: Sequence[str], need_ptr: np.ndarray, need_ids: np.ndarray,
+                 avoid_ptr: np.ndarray, avoid_ids: np.ndarray, kcal: Sequence[float] | None = None) -> "RecipeIndex":
+        # 이미 intern된 카탈로그(RecipeCatalog)에서 바로 생성
+        self = cls.__new__(cls)
+        self._build(vocab, need_ptr, need_ids, avoid_ptr, avoid_ids, kcal)
+        return self
+
+    def _build(self, vocab, need_ptr, need_ids, avoid_ptr, avoid_ids, kcal):
+        self.size = len(need_ptr) - 1
+        self.postings = _postings(vocab, need_ptr, need_ids)
+        self.avoid_postings = _postings(vocab, avoid_ptr, avoid_ids)
+        self.need_count = np.diff(need_ptr).astype(np.int32)
+        self.no_need = np.flatnonzero(self.need_count == 0).astype(np.int32)  # 재료 없이 되는 레시피
+        self.kcal = np.asarray(kcal if kcal is not None else np.full(self.size, np.nan), dtype=np.float64)
+
+    @staticmethod
+    def _union(post: Dict[str, np.ndarray], keys: Iterable[str]) -> List[np.ndarray]:
+        return [post[k] for k in set(keys) if k in post]
+
+    def hits(self, have: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """→ (레시피 id, 가진 재료 수) — 가진 재료가 하나라도 들어간 레시피만, id 오름차순."""
+        lists = self._union(self.postings, have)
+        if not lists:
+            return _EMPTY, _EMPTY
+        return np.unique(np.concatenate(lists), return_counts=True)
+
+    def blocked(self, keys: Iterable[str], in_needs: bool = False) -> np.ndarray:
+        """avoid 목록(또는 in_needs면 재료 자체)에 keys 중 하나라도 있는 레시피 id."""
+        keys = set(keys)
+        lists = self._union(self.avoid_postings, keys) + (self._union(self.postings, keys) if in_needs else [])
+        return np.unique(np.concatenate(lists)) if lists else _EMPTY
+
+    def complete(self, have: Iterable[str], avoid: Iterable[str] = (), avoid_in_needs: bool = False) -> np.ndarray:
+        """필요 재료를 모두 가진 레시피 id (오름차순)."""
+        ids, n = self.hits(have)
+        ids = np.union1d(ids[n == self.need_count[ids]], self.no_need)
+        return ids[~np.isin(ids, self.blocked(avoid, avoid_in_needs))]
+
+    def partial(self, have: Iterable[str], avoid: Iterable[str] = (),
+                avoid_in_needs: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """→ (레시피 id, 일치율 0~1) — 가진 재료가 하나라도 들어간 레시피."""
+        ids, n = self.hits(have)
+        keep = ~np.isin(ids, self.blocked(avoid, avoid_in_needs))
+        ids, n = ids[keep], n[keep]
+        return ids, n / self.need_count[ids]
+
+
+# ---------------- 순위 ----------------
+# 종합 점수 = 가중합 (각 항목 0~1): 재료 일치율, 목표 kcal 근접도, 임박 재료 사용 수(EXPIRING_CAP개에서 포화)
+SCORE_WEIGHTS = {"coverage": 0.5, "kcal": 0.3, "expiring": 0.2}
+EXPIRING_CAP = 3
+
+
+def top_k(index: RecipeIndex, ids: np.ndarray, coverage: np.ndarray | float = 1.0, goal_kcal: float | None = None,
+          expiring: Iterable[str] = (), k: int = 5,
+          weights: Dict[str, float] | None = None) -> Tuple[np.ndarray, np.ndarray]:
+    """후보 레시피(ids, 오름차순)의 종합 점수를 배열로 한 번에 계산해 상위 k개 → (id, 점수) 점수 내림차순.
+
+    전체 정렬 대신 partition으로 k번째 점수를 구하고, 그 점수 이상인 후보(경계 동점 포함)만 정렬한다
+    (O(n + m log m), m = 경계 이상 후보 수). 동점이면 id 순 — 전체 정렬 결과의 앞 k개와 같다.
+    """
+    w = {**SCORE_WEIGHTS, **(weights or {})}
+    ids = np.asarray(ids, dtype=np.int32)
+    if not len(ids) or k <= 0:
+        return _EMPTY, np.zeros(0)
+    score = w["coverage"] * np.broadcast_to(np.asarray(coverage, dtype=np.float64), ids.shape)
+    if goal_kcal:
+        gap = np.abs(index.kcal[ids] - goal_kcal) / goal_kcal
+        score = score + w["kcal"] * np.nan_to_num(1.0 - np.minimum(gap, 1.0), nan=0.0)
+    exp_ids, exp_n = index.hits(expiring)
+    if len(exp_ids):
+        pos = np.searchsorted(exp_ids, ids)
+        pos[pos == len(exp_ids)] = 0
+        n = np.where(exp_ids[pos] == ids, exp_n[pos], 0)
+        score = score + w["expiring"] * np.minimum(n, EXPIRING_CAP) / EXPIRING_CAP
+    if k < len(ids):
+        # argpartition의 앞 k개는 경계 동점 중 아무거나 고르므로 k번째 점수 이상을 모두 남김
+        part = np.flatnonzero(score >= np.partition(score, len(ids) - k)[len(ids) - k])
+    else:
+        part = np.arange(len(ids))
+    part = part[np.lexsort((ids[part], -score[part]))[:k]]
+    return ids[part], score[part]
@@ -0,0 +1,157 @@
+import math
+from datetime import date, timedelta
+from typing import Dict, Any, List, Iterable, Callable, Tuple
+
+# 셀 = [count, sum, min, max, sumsq]
+Cell = List[float]
+
+
+def _empty() -> Cell:
+    return [0, 0.0, math.inf, -math.inf, 0.0]
+
+
+def week_of(day: date) -> date:
+    # ISO 주의 월요일
+    return day - timedelta(days=day.weekday())
+
+
+def _is_missing(v) -> bool:
+    return v is None or not isinstance(v, (int, float)) or v != v
+
+
+def cell_stats(a: Cell) -> Dict[str, float]:
+    n, s, mn, mx, ss = a
+    mean = s / n
+    return {"count": int(n), "mean": mean, "min": mn, "max": mx,
+            "std": math.sqrt(max(0.0, ss / n - mean * mean))}
+
+
+def merge(cells: Iterable[Cell]) -> Cell | None:
+    out = None
+    for a in cells:
+        if out is None:
+            out = list(a)
+        else:
+            out[0] += a[0]; out[1] += a[1]; out[4] += a[4]
+            out[2] = min(out[2], a[2]); out[3] = max(out[3], a[3])
+    return out
+
+
+class Rollup:
+    """일별/ISO 주별 지표 집계(count/sum/min/max/sumsq)를 삽입·삭제 때마다 증분 갱신.
+
+    count/sum/sumsq는 그대로 빼면 되지만 min/max는 뺄 수 없으므로, 삭제 값이 경계값이었던
+    날(과 그 주)은 dirty로 표시해 두었다가 조회 시 source(day)로 그날 기록만 다시 집계한다.
+    """
+
+    def __init__(self, keys: Iterable[str], source: Callable[[date], Iterable[Dict[str, Any]]] | None = None):
+        self.keys = list(keys)
+        self.source = source
+        self.clear()
+
+    def clear(self):
+        self.days: Dict[date, Dict[str, Cell]] = {}
+        self.weeks: Dict[date, Dict[str, Cell]] = {}
+        self._dirty_days = set()
+        self._dirty_weeks = set()
+
+    # ---------------- 갱신 ----------------
+    @staticmethod
+    def _add_cell(cell: Dict[str, Cell], k: str, v: float):
+        a = cell.get(k)
+        if a is None:
+            a = cell[k] = _empty()
+        a[0] += 1; a[1] += v; a[4] += v * v
+        if v < a[2]: a[2] = v
+        if v > a[3]: a[3] = v
+
+    def add(self, day: date, values: Dict[str, Any]):
+        dcell = self.days.setdefault(day, {})
+        wcell = self.weeks.setdefault(week_of(day), {})
+        for k in self.keys:
+            v = values.get(k)
+            if _is_missing(v):
+                continue
+            v = float(v)
+            self._add_cell(dcell, k, v)
+            self._add_cell(wcell, k, v)
+
+    def remove(self, day: date, values: Dict[str, Any]):
+        wk = week_of(day)
+        for table, key, dirty in ((self.days, day, self._dirty_days), (self.weeks, wk, self._dirty_weeks)):
+            cell = table.get(key)
+            if cell is None:
+                continue
+            for k in self.keys:
+                v = values.get(k)
+                a = cell.get(k)
+                if _is_missing(v) or a is None:
+                    continue
+                v = float(v)
+                a[0] -= 1; a[1] -= v; a[4] -= v * v
+                if a[0] <= 0:
+                    del cell[k]
+                elif v <= a[2] or v >= a[3]:
+                    dirty.add(key)
+            if not cell:
+                del table[key]
+
+    # ---------------- dirty 재계산 ----------------
+    def _fix_day(self, day: date):
+        if day not in self._dirty_days:
+            return
+        self._dirty_days.discard(day)
+        cell: Dict[str, Cell] = {}
+        for values in (self.source(day) if self.source else []):
+            for k in self.keys:
+                v = values.get(k)
+                if not _is_missing(v):
+                    self._add_cell(cell, k, float(v))
+        if cell:
+            self.days[day] = cell
+        else:
+            self.days.pop(day, None)
+
+    def _fix_week(self, wk: date):
+        if wk not in self._dirty_weeks:
+            return
+        self._dirty_weeks.discard(wk)
+        cell = {}
+        for k in self.keys:
+            m = merge(c[k] for c in self._day_cells(wk, wk + timedelta(days=6)) if k in c)
+            if m is not None:
+                cell[k] = m
+        if cell:
+            self.weeks[wk] = cell
+        else:
+            self.weeks.pop(wk, None)
+
+    def _day_cells(self, start: date, end: date):
+        d = start
+        while d <= end:
+            self._fix_day(d)
+            if d in self.days:
+                yield self.days[d]
+            d += timedelta(days=1)
+
+    # ---------------- 조회 (O(일수)) ----------------
+    def summary(self, start: date, end: date) -> Dict[str, Dict[str, float]]:
+        """start~end(포함) 지표별 {count, mean, min, max, std}. 값이 없는 지표는 빠짐."""
+        cells = list(self._day_cells(start, end))
+        out = {}
+        for k in self.keys:
+            m = merge(c[k] for c in cells if k in c)
+            if m is not None:
+                out[k] = cell_stats(m)
+        return out
+
+    def weekly(self, start: date, end: date) -> List[Tuple[date, Dict[str, Dict[str, float]]]]:
+        """start~end에 걸친 ISO 주(월요일 날짜)별 통계."""
+        out = []
+        wk = week_of(start)
+        while wk <= end:
+            self._fix_week(wk)
+            if wk in self.weeks:
+                out.append((wk, {k: cell_stats(a) for k, a in self.weeks[wk].items()}))
+            wk += timedelta(days=7)
+        return out
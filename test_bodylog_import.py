@@ -0,0 +1,51 @@
+import io
+import json
+
+from bodylog_import import import_file, normalize, header_map
+from bodylog_meta import DEFAULT_CONFIG
+from bodylog_store import JournalStore
+
+THR = DEFAULT_CONFIG["thresholds"]
+
+
+def _store(tmp_path):
+    return JournalStore(tmp_path / "bodylog_plus.json")
+
+
+def _csv(text):
+    return io.BytesIO(text.encode("utf-8"))
+
+
+def test_unit_conversion_and_aliases():
+    row = {"측정시각": "2026-10-01 08:00", "Temp(°F)": "98.6", "glucose(mmol/L)": "5.5", "hr": "70", "weight": "150", "weight_unit": "lb"}
+    e = normalize(row, header_map(row))
+    assert e["ts"] == "2026-10-01T08:00:00"
+    assert e["temp"] == 37.0 and e["sugar"] == 99 and e["weight"] == 68.04 and e["hr"] == 70
+
+
+def test_dedupe_within_file_and_against_store(tmp_path):
+    s = _store(tmp_path)
+    src = "ts,hr,sys,dia\n2026-10-01 08:00,70,120,80\n2026-10-01 08:00,70,120,80\n2026-10-02 08:00,71,,\n"
+    res = import_file(s, _csv(src), "csv", THR, chunk=1)
+    assert (res["imported"], res["duplicates"], res["skipped"]) == (2, 1, 0)
+    assert s.entries()[1]["bp"] == "120/80"
+    res = import_file(s, _csv(src), "csv", THR)
+    assert (res["imported"], res["duplicates"]) == (0, 3)
+    assert len(_store(tmp_path)) == 2
+
+
+def test_malformed_jsonl_lines_are_skipped(tmp_path):
+    s = _store(tmp_path)
+    lines = [json.dumps({"ts": "2026-10-01T08:00:00", "hr": 70}), '{"ts": "2026-10-01T09',
+             "[1, 2]", json.dumps({"ts": "2026-10-02T08:00:00", "hr": 71}), "", "42"]
+    res = import_file(s, io.BytesIO("\n".join(lines).encode("utf-8")), "jsonl", THR, chunk=1)
+    assert (res["rows"], res["imported"], res["skipped"]) == (5, 2, 3)
+    assert len(s) == 2
+
+
+def test_undecodable_csv_bytes_skip_only_that_row(tmp_path):
+    s = _store(tmp_path)
+    raw = b"ts,hr,memo\n2026-10-01 08:00,70,ok\n2026-10-02 08:00,71,\xff\xfe\n2026-10-03 08:00,72,ok\n"
+    res = import_file(s, io.BytesIO(raw), "csv", THR)
+    assert (res["imported"], res["skipped"]) == (2, 1)
+    assert [e["hr"] for e in s.entries()] == [72, 70]
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from bodylog_sqlite import SqliteStore, migrate_json, open_backend, open_store_file
+from bodylog_store import JournalStore
+
+
+def _json_store(tmp_path, n=3):
+    s = JournalStore(tmp_path / "bodylog_plus.json")
+    for d in range(1, n + 1):
+        s.append({"ts": f"2026-10-{d:02d}T08:00:00", "hr": 60 + d})
+    return s
+
+
+def test_migrate_json_copies_snapshot_and_journal(tmp_path):
+    src = _json_store(tmp_path)
+    src.compact()
+    src.append({"ts": "2026-10-09T08:00:00", "hr": 90})  # 저널에만 있는 기록
+    db = tmp_path / "bodylog_plus.db"
+    assert migrate_json(src.path, db) == 4
+    assert migrate_json(src.path, db) == 0  # 이미 있는 id는 건너뜀
+    s = SqliteStore(db)
+    assert [e["hr"] for e in s.entries()] == [90, 63, 62, 61]
+    s.close()
+
+
+def test_open_backend_migrates_once(tmp_path):
+    _json_store(tmp_path)
+    s = open_backend({"backend": "sqlite"}, tmp_path / "bodylog_plus.json")
+    assert isinstance(s, SqliteStore) and len(s) == 3
+    s.close()
+
+
+def test_delete_range_and_undo_persist(tmp_path):
+    db = tmp_path / "x.db"
+    s = SqliteStore(db)
+    for d in range(1, 6):
+        s.append({"ts": f"2026-10-{d:02d}T08:00:00", "hr": 60 + d})
+    from datetime import datetime
+    t = s.delete_range(datetime(2026, 10, 2), datetime(2026, 10, 3, 23, 59))
+    assert t["count"] == 2 and len(SqliteStore(db)) == 3
+    assert s.undo_delete(t) == 2
+    assert [e["hr"] for e in SqliteStore(db).entries()] == [65, 64, 63, 62, 61]
+    s.close()
+
+
+@pytest.mark.parametrize("folder", ["환자 김?#%", "plain"])
+def test_readonly_open_escapes_path(tmp_path, folder):
+    d = tmp_path / folder
+    d.mkdir()
+    s = SqliteStore(d / "bodylog_plus.db")
+    s.append({"ts": "2026-10-01T08:00:00", "hr": 70})
+    s.close()
+    ro = open_store_file(d / "bodylog_plus.db", readonly=True)
+    assert [e["hr"] for e in ro.entries()] == [70]
+    with pytest.raises(Exception):
+        ro.append({"ts": "2026-10-02T08:00:00", "hr": 71})
+    ro.close()
@@ -0,0 +1,91 @@
+import json
+from datetime import datetime
+
+from bodylog_store import JournalStore, journal_path
+
+
+def _store(tmp_path, **kw):
+    return JournalStore(tmp_path / "bodylog_plus.json", **kw)
+
+
+def _fill(store, n):
+    return [store.append({"ts": f"2026-10-{d:02d}T08:00:00", "hr": 60 + d}) for d in range(1, n + 1)]
+
+
+def test_journal_replay_restores_state(tmp_path):
+    s = _store(tmp_path)
+    es = _fill(s, 5)
+    s.delete([es[0]["id"]])
+    s.append({**es[1], "hr": 99})
+    assert not s.path.exists() and journal_path(s.path).exists()
+
+    again = _store(tmp_path)
+    assert len(again) == 4
+    assert [e["hr"] for _, e in again.range()] == [99, 63, 64, 65]
+
+
+def test_truncated_journal_line_is_skipped(tmp_path):
+    s = _store(tmp_path)
+    _fill(s, 3)
+    with journal_path(s.path).open("a", encoding="utf-8") as f:
+        f.write('{"op": "put", "entry": {"id": "x", "ts": "2026-')
+    assert len(_store(tmp_path)) == 3
+
+
+def test_compact_writes_snapshot_and_drops_journal(tmp_path):
+    s = _store(tmp_path)
+    _fill(s, 4)
+    s.compact()
+    assert not journal_path(s.path).exists()
+    snap = json.loads(s.path.read_text(encoding="utf-8"))
+    assert [e["hr"] for e in snap["entries"]] == [64, 63, 62, 61]  # ts 내림차순
+    assert len(_store(tmp_path)) == 4
+
+
+def test_legacy_snapshot_without_ids_is_migrated(tmp_path):
+    path = tmp_path / "bodylog_plus.json"
+    path.write_text(json.dumps({"entries": [{"ts": "2026-10-02T08:00:00", "hr": 70},
+                                            {"ts": "2026-10-01T08:00:00", "hr": 71}]}), encoding="utf-8")
+    s = JournalStore(path)
+    assert s.migrated == 2
+    ids = [e["id"] for e in json.loads(path.read_text(encoding="utf-8"))["entries"]]
+    assert all(ids) and len(set(ids)) == 2
+    assert [e["hr"] for _, e in s.range(datetime(2026, 10, 2))] == [70]
+
+
+def test_other_instance_sees_appends(tmp_path):
+    a, b = _store(tmp_path), _store(tmp_path)
+    _fill(a, 2)
+    assert b.refresh() and len(b) == 2
+    assert not b.refresh()
+
+
+def test_delete_returns_tombstone_and_undo_restores(tmp_path):
+    s = _store(tmp_path)
+    es = _fill(s, 5)
+    t = s.delete([es[0]["id"], es[3]["id"], "missing"])
+    assert t["kind"] == "ids" and t["count"] == 2 and len(s) == 3
+    assert {e["id"] for e in t["entries"]} == {es[0]["id"], es[3]["id"]}
+    assert s.undo_delete(t) == 2
+    assert [e["hr"] for _, e in _store(tmp_path).range()] == [61, 62, 63, 64, 65]
+
+
+def test_delete_range_and_clear_undo(tmp_path):
+    s = _store(tmp_path)
+    _fill(s, 5)
+    t = s.delete_range(datetime(2026, 10, 2), datetime(2026, 10, 3, 23, 59))
+    assert t["count"] == 2 and [e["hr"] for _, e in s.range()] == [61, 64, 65]
+    t = s.clear()
+    assert t["count"] == 3 and len(_store(tmp_path)) == 0
+    assert s.undo_delete(t) == 3 and len(_store(tmp_path)) == 3
+
+
+def test_undo_is_per_tombstone(tmp_path):
+    # 세션마다 자기 tombstone만 되돌림 — 저장소에는 마지막 삭제 상태가 없다
+    s = _store(tmp_path)
+    es = _fill(s, 3)
+    mine = s.delete([es[0]["id"]])
+    s.delete([es[1]["id"]])  # 다른 세션의 삭제
+    assert s.undo_delete(mine) == 1
+    assert s.undo_delete(None) == 0
+    assert sorted(e["hr"] for _, e in s.range()) == [61, 63]
@@ -0,0 +1,80 @@
+import json
+import warnings
+from datetime import date, timedelta
+
+from ingredient_store import IngredientStore, normalize_name
+
+
+def _store(tmp_path, **kw):
+    return IngredientStore(tmp_path / "ingredients.json", **kw)
+
+
+def test_same_lot_merges_in_base_units(tmp_path):
+    s = _store(tmp_path)
+    s.add("Milk", 1, "L", "2026-10-20")
+    lot = s.add(" milk ", 500, "ml", "2026-10-20")
+    assert (lot["quantity"], lot["unit"]) == (1500.0, "ml")
+    s.add("MILK", 2, "개", "2026-10-20")       # 다른 기준 단위 → 다른 로트
+    s.add("milk", 200, "ml", "2026-10-25")     # 다른 유통기한 → 다른 로트
+    assert len(s) == 3 and "Ｍｉｌｋ" in s      # 전각/대소문자 무시
+    assert s.total("milk") == {"ml": 1700.0, "개": 2.0}
+    assert s.names() == frozenset({"Milk"})
+
+
+def test_legacy_file_rows_are_merged(tmp_path):
+    (tmp_path / "ingredients.json").write_text(json.dumps([
+        {"name": "토마토", "quantity": 1, "unit": "개", "expires_on": "2026-10-20"},
+        {"name": "토마토", "quantity": 2, "unit": "개", "expires_on": "2026-10-20"},
+        {"name": "Milk", "quantity": 1, "unit": "L", "expires_on": None},
+    ], ensure_ascii=False), encoding="utf-8")
+    s = _store(tmp_path)
+    assert s.total("토마토") == {"개": 3.0} and s.total("milk") == {"ml": 1000.0}
+    assert [l["id"] for l in s.lots()] == [l["id"] for l in _store(tmp_path).lots()]  # id는 결정적
+
+
+def test_changes_are_seen_by_another_instance(tmp_path):
+    a, b = _store(tmp_path), _store(tmp_path)
+    a.add("계란", 6, "개")
+    assert b.refresh() and b.total("계란") == {"개": 6.0}
+    b.add("계란", 4, "개")
+    assert a.remove("계란") == 1
+    assert b.refresh() and len(b) == 0
+
+
+def test_compaction_folds_journal_into_snapshot(tmp_path):
+    s = _store(tmp_path, compact_every=5)
+    for i in range(5):
+        s.add(f"item{i}", 1, "개")
+    assert not s.journal.exists()
+    assert len(json.loads(s.path.read_text(encoding="utf-8"))) == 5
+    assert s.clear() == 5 and len(_store(tmp_path)) == 0
+
+
+def test_expiry_queries(tmp_path):
+    s = _store(tmp_path)
+    today = date.today()
+    s.add("old", 1, "개", (today - timedelta(days=1)).isoformat())
+    s.add("soon", 1, "개", (today + timedelta(days=2)).isoformat())
+    s.add("later", 1, "개", (today + timedelta(days=9)).isoformat())
+    s.add("undated", 1, "개")
+    assert [l["name"] for l in s.expired()] == ["old"]
+    assert [l["name"] for l in s.expiring(3)] == ["soon"]
+    assert s.expiring_names(10) == {"soon", "later"}
+    assert [l["name"] for l in s.lots(by_expiry=True)] == ["old", "soon", "later", "undated"]
+    s.expired()[0]["quantity"] = 99  # 사본이라 저장소에 영향 없음
+    assert s.get("old")[0]["quantity"] == 1.0
+
+
+def test_corrupt_snapshot_is_quarantined(tmp_path):
+    (tmp_path / "ingredients.json").write_text('[{"name": "토마토",', encoding="utf-8")
+    with warnings.catch_warnings(record=True) as w:
+        warnings.simplefilter("always")
+        s = _store(tmp_path)
+    assert len(s) == 0 and w
+    assert list(tmp_path.glob("ingredients.json.corrupt-*"))
+    s.add("토마토", 1, "개")
+    assert len(_store(tmp_path)) == 1
+
+
+def test_normalize_name():
+    assert normalize_name("  Green   Onion ") == normalize_name("ｇｒｅｅｎ onion") == "green onion"
@@ -0,0 +1,42 @@
+import numpy as np
+
+from recipe_index import EXPIRING_CAP, SCORE_WEIGHTS, RecipeIndex, top_k
+
+
+def _expected(needs, kcal, ids, coverage, goal, expiring, k):
+    # 점수 공식과 동점 규칙(점수 내림차순, 같으면 id 오름차순)을 순수 파이썬으로 — top_k를 쓰지 않는 기준값
+    w = SCORE_WEIGHTS
+    scored = []
+    for i, c in zip(ids, coverage):
+        s = w["coverage"] * c
+        gap = abs(kcal[i] - goal) / goal
+        s += w["kcal"] * (0.0 if gap != gap else 1.0 - min(gap, 1.0))
+        n = len(set(needs[i]) & set(expiring))
+        s += w["expiring"] * min(n, EXPIRING_CAP) / EXPIRING_CAP
+        scored.append((-s, int(i)))
+    return [i for _, i in sorted(scored)[:k]]
+
+
+def test_top_k_ties_match_plain_sort():
+    rng = np.random.default_rng(0)
+    items = ["a", "b", "c", "d"]
+    for trial in range(200):
+        n = 300
+        kcal = rng.choice([500.0, 600.0, 700.0, np.nan], size=n)
+        needs = [list(rng.choice(items, size=rng.integers(1, 4), replace=False)) for _ in range(n)]
+        index = RecipeIndex(needs, kcal=kcal)
+        ids = np.sort(rng.choice(n, size=200, replace=False)).astype(np.int32)
+        coverage = rng.choice([0.5, 1.0], size=len(ids))
+        expiring = list(rng.choice(items, size=rng.integers(0, 3), replace=False))
+        k = int(rng.integers(1, 10))
+        top, scores = top_k(index, ids, coverage, 600.0, expiring, k=k)
+        assert top.tolist() == _expected(needs, kcal, ids, coverage, 600.0, expiring, k), trial
+        assert np.all(np.diff(scores) <= 0)
+
+
+def test_top_k_example_lowest_tied_ids():
+    kcal = np.full(300, 700.0)
+    kcal[[1, 2, 10, 12, 40]] = 600.0
+    index = RecipeIndex([["x"]] * 300, kcal=kcal)
+    top, _ = top_k(index, np.arange(300), 1.0, 600.0, (), k=3)
+    assert top.tolist() == [1, 2, 10]
@@ -0,0 +1,237 @@
+import json
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, List, Tuple
+
+from jsonio import atomic_write_bytes, dumps, file_lock, load_json
+
+
+def month_of(date_str: str) -> str:
+    return date_str[:7]  # "YYYY-MM-DD" → "YYYY-MM"
+
+
+class PartitionedStore:
+    """월별 파티션 파일 + manifest.json 으로 나눈 바이탈 저장소.
+
+    vital_data/
+      manifest.json   {"partitions": {"2025-08": {"days": 3, "entries": 7, "first": ..., "last": ...}}}
+      2025-08.json    {"2025-08-01": [entry, ...], ...}  (기존 vital_data.json과 같은 형식의 한 달치)
+
+    조회는 기간과 겹치는 달의 파일만 열고, 입력은 해당 달 파일 하나만 다시 쓴다.
+    기존 단일 파일(legacy)이 있으면 처음 열 때 월별로 나눠 옮기고 .migrated 로 이름을 바꿔 둔다.
+    변경(읽기→수정→쓰기)은 manifest 잠금 안에서 하므로 여러 프로세스가 같은 폴더를 써도 입력이 유실되지 않는다.
+    """
+
+    def __init__(self, root: str, legacy: str | None = None):
+        self.root = Path(root)
+        self.manifest_path = self.root / "manifest.json"
+        self._lock = threading.RLock()
+        self._cache: Dict[str, Tuple[Tuple[int, int], Dict[str, List[Dict[str, Any]]]]] = {}
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.manifest = self._read_json(self.manifest_path, {"partitions": {}})
+        if legacy and os.path.exists(legacy) and not self.manifest_path.exists():
+            with file_lock(self.manifest_path):
+                if not self.manifest_path.exists():
+                    self._migrate(Path(legacy))
+
+    # ---------------- 파일 입출력 ----------------
+    @staticmethod
+    def _read_json(path: Path, default):
+        # 깨진 파티션을 빈 달로 취급하면 다음 입력이 그 달을 덮어쓰므로 CorruptFile을 올린다
+        return load_json(path, default, strict=True)
+
+    @staticmethod
+    def _write_json(path: Path, data):
+        atomic_write_bytes(path, dumps(data))
+
+    def _part_path(self, month: str) -> Path:
+        return self.root / f"{month}.json"
+
+    def _migrate(self, legacy: Path):
+        try:
+            data = json.loads(legacy.read_text(encoding="utf-8"))
+        except json.JSONDecodeError:
+            return  # 깨진 파일은 건드리지 않음
+        months: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        for date_str, entries in data.items():
+            months.setdefault(month_of(date_str), {})[date_str] = entries
+        for month, part in months.items():
+            self._save_partition(month, part, write_manifest=False)
+        self._write_json(self.manifest_path, self.manifest)
+        os.replace(legacy, legacy.with_name(legacy.name + ".migrated"))
+
+    def signature(self) -> Tuple[int, int] | None:
+        # 파티션이 바뀔 때마다 manifest도 다시 쓰이므로 변경 감지는 manifest 하나로 충분
+        try:
+            st = self.manifest_path.stat()
+            return st.st_mtime_ns, st.st_size
+        except FileNotFoundError:
+            return None
+
+    # ---------------- 파티션 ----------------
+    def load_partition(self, month: str) -> Dict[str, List[Dict[str, Any]]]:
+        path = self._part_path(month)
+        with self._lock:
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                self._cache.pop(month, None)
+                return {}
+            sig = (st.st_mtime_ns, st.st_size)
+            hit = self._cache.get(month)
+            if hit and hit[0] == sig:
+                return hit[1]
+            part = self._read_json(path, {})
+            self._cache[month] = (sig, part)
+            return part
+
+    def _save_partition(self, month: str, part: Dict[str, List[Dict[str, Any]]], write_manifest: bool = True):
+        path = self._part_path(month)
+        if part:
+            self._write_json(path, part)
+            days = sorted(part)
+            self.manifest["partitions"][month] = {
+                "days": len(days), "entries": sum(len(v) for v in part.values()),
+                "first": days[0], "last": days[-1],
+            }
+        else:
+            path.unlink(missing_ok=True)
+            self.manifest["partitions"].pop(month, None)
+        self._cache.pop(month, None)
+        if write_manifest:
+            self._write_json(self.manifest_path, self.manifest)
+
+    def _refresh_manifest(self):
+        self.manifest = self._read_json(self.manifest_path, {"partitions": {}})
+
+    def months(self) -> List[str]:
+        with self._lock:
+            self._refresh_manifest()
+            return sorted(self.manifest["partitions"])
+
+    # ---------------- 조회 ----------------
+    def load_range(self, start: date, end: date) -> Dict[str, List[Dict[str, Any]]]:
+        s, e = start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')
+        out = {}
+        for month in self.months():
+            if month < s[:7] or month > e[:7]:
+                continue
+            for date_str, entries in sorted(self.load_partition(month).items()):
+                if s <= date_str <= e:
+                    out[date_str] = entries
+        return out
+
+    def load_all(self) -> Dict[str, List[Dict[str, Any]]]:
+        out = {}
+        for month in self.months():
+            out.update(self.load_partition(month))
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        # 관리 화면용 현황 — manifest만 읽음
+        parts = [self.manifest["partitions"][m] for m in self.months()]
+        return {
+            "days": sum(p["days"] for p in parts),
+            "entries": sum(p["entries"] for p in parts),
+            "first": parts[0]["first"] if parts else None,
+            "last": parts[-1]["last"] if parts else None,
+        }
+
+    # ---------------- 변경 ----------------
+    def add(self, date_str: str, entry: Dict[str, Any]) -> Tuple[Tuple[int, int] | None, Tuple[int, int] | None]:
+        """기록 1건 추가 → (쓰기 직전 signature, 직후 signature).
+
+        둘 다 manifest 잠금 안에서 읽으므로, 호출한 쪽이 가진 signature가 '직전'과 같으면
+        그 사이 다른 프로세스의 쓰기가 없었고 이 1건만 반영하면 '직후' 상태와 같다.
+        """
+        month = month_of(date_str)
+        with self._lock, file_lock(self.manifest_path):
+            before = self.signature()
+            self._refresh_manifest()
+            part = dict(self.load_partition(month))
+            part[date_str] = part.get(date_str, []) + [entry]
+            self._save_partition(month, part)
+            return before, self.signature()
+
+    def drop_before(self, cutoff: str) -> Tuple[int, int]:
+        """cutoff(YYYY-MM-DD)보다 이전 날짜 삭제 → (삭제 일수, 삭제 기록 수).
+
+        통째로 지난 달은 파일만 지우고, cutoff가 걸친 달 하나만 다시 쓴다.
+        """
+        days = entries = 0
+        with self._lock, file_lock(self.manifest_path):
+            self._refresh_manifest()
+            for month in sorted(self.manifest["partitions"]):
+                if month > cutoff[:7]:
+                    break
+                meta = self.manifest["partitions"][month]
+                if meta["last"] < cutoff:
+                    days += meta["days"]; entries += meta["entries"]
+                    self._save_partition(month, {}, write_manifest=False)
+                elif meta["first"] < cutoff:
+                    part = self.load_partition(month)
+                    old = {k: v for k, v in part.items() if k < cutoff}
+                    days += len(old); entries += sum(len(v) for v in old.values())
+                    self._save_partition(month, {k: v for k, v in part.items() if k >= cutoff}, write_manifest=False)
+            if days:
+                self._write_json(self.manifest_path, self.manifest)
+        return days, entries
+
+    def clear(self):
+        with self._lock, file_lock(self.manifest_path):
+            self._refresh_manifest()
+            for month in list(self.manifest["partitions"]):
+                self._part_path(month).unlink(missing_ok=True)
+            self.manifest = {"partitions": {}}
+            self._cache.clear()
+            self._write_json(self.manifest_path, self.manifest)
+
+
+class RetentionJob:
+    """보관 기간 정리를 요청 경로 밖에서 주기적으로 실행하는 백그라운드 작업.
+
+    입력 경로는 더 이상 정리를 하지 않으므로 기록 수와 무관하게 해당 달 파티션만 다시 쓴다.
+    마지막 실행 결과(last)에 삭제 일수/기록 수와 소요 시간을 남긴다.
+    """
+
+    def __init__(self, store: PartitionedStore, retention_days: int = 730, interval_hours: float = 24.0):
+        self.store = store
+        self.retention_days = retention_days
+        self.interval_hours = interval_hours
+        self.last: Dict[str, Any] | None = None
+        self.next_run: datetime | None = None
+        self._run_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def configure(self, retention_days: int, interval_hours: float):
+        self.retention_days = int(retention_days)
+        self.interval_hours = float(interval_hours)
+        self._wake.set()  # 새 설정으로 바로 한 번 실행 후 주기 재설정
+
+    def run_now(self) -> Dict[str, Any]:
+        with self._run_lock:
+            t0 = time.perf_counter()
+            cutoff = (date.today() - timedelta(days=self.retention_days)).strftime('%Y-%m-%d')
+            try:
+                days, entries = self.store.drop_before(cutoff)
+                self.last = {"days": days, "entries": entries}
+            except Exception as e:
+                self.last = {"days": 0, "entries": 0, "error": str(e)}
+            self.last.update({
+                "cutoff": cutoff,
+                "ran_at": datetime.now().isoformat(timespec="seconds"),
+                "secs": time.perf_counter() - t0,
+            })
+            return self.last
+
+    def _loop(self):
+        while True:
+            self.run_now()
+            self.next_run = datetime.now() + timedelta(hours=self.interval_hours)
+            self._wake.wait(self.interval_hours * 3600)
+            self._wake.clear()
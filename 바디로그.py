@@ -3,21 +3,17 @@ import pandas as pd
 from datetime import datetime
 from typing import Optional
 
+from health_log import ALL_METRICS, UNIT_COLUMNS, EXPORT_FORMATS, NUMERIC_METRICS, export_bytes, \
+    read_csv_typed, to_canonical
+from health_log_store import open_user_log, user_slug
+from anthropometrics import bmi
+
 st.set_page_config(page_title="개인 건강기록 로그", page_icon="🩺", layout="centered")
 
 # -----------------------------
 # 기본 정의
 # -----------------------------
-ALL_METRICS = ["혈압", "심박수", "체온", "호흡수", "SPO2", "혈당", "체중", "BMI", "허리둘레"]
-UNIT_COLUMNS = {
-    "체온": "체온_단위",
-    "혈당": "혈당_단위",
-    "체중": "체중_단위",
-    "허리둘레": "허리둘레_단위",
-    "키": "키_단위",
-}
-BASE_COLUMNS = ["날짜", "시간"] + ALL_METRICS + list(UNIT_COLUMNS.values())
-
+# (지표/단위 컬럼 정의는 health_log.py)
 LABELS = {
     "혈압": "혈압(수축/이완) — mmHg",
     "심박수": "심박수(bpm)",
@@ -30,8 +26,11 @@ LABELS = {
     "BMI": "BMI(kg/m²)"
 }
 
-if "health_log" not in st.session_state:
-    st.session_state.health_log = pd.DataFrame(columns=BASE_COLUMNS)
+# 사용자별 기록 (health_logs/<사용자>/ — 프로세스 안에서 같은 사용자의 세션끼리 공유)
+@st.cache_resource
+def open_log(user: str):
+    return open_user_log(user)
+
 if "selected_metrics" not in st.session_state:
     st.session_state.selected_metrics = ["체중", "허리둘레", "BMI"]
 if "view" not in st.session_state:
@@ -53,6 +52,8 @@ with nav2:
 # 사이드바: '추적 지표 설정' (이미지처럼)
 # -----------------------------
 with st.sidebar:
+    user = user_slug(st.text_input("👤 사용자", value=st.query_params.get("user", "default")))
+    st.query_params["user"] = user  # 새로고침/북마크해도 같은 기록을 열도록
     st.markdown("### 🧭 추적 지표 설정")
 
     with st.form("metric_prefs", clear_on_submit=False):
@@ -86,6 +87,8 @@ with st.sidebar:
             st.session_state.selected_metrics = sel
             st.success("지표 설정이 저장됐습니다 ✅")
 
+LOG = open_log(user)  # 파일은 처음 읽을 때 열림, 입력은 몇 초마다 모아서 저장
+
 # -----------------------------
 # 도우미: BMI 계산(단위 변환)
 # -----------------------------
@@ -93,9 +96,7 @@ def compute_bmi(height_val: Optional[float], height_unit: str,
                 weight_val: Optional[float], weight_unit: str) -> Optional[float]:
     if not height_val or not weight_val or height_val <= 0 or weight_val <= 0:
         return None
-    h_m = height_val/100.0 if height_unit == "cm" else height_val*0.0254
-    w_kg = weight_val if weight_unit == "kg" else weight_val*0.45359237
-    return round(w_kg/(h_m*h_m), 2)
+    return bmi(to_canonical("체중", weight_val, weight_unit), to_canonical("키", height_val, height_unit))
 
 # ============================================================
 # 뷰 1) 기록하기
@@ -196,16 +197,8 @@ if st.session_state.view == "record":
                 else:
                     new_row[unit_col] = None
 
-            # 누락 컬럼 정합성
-            for m in ALL_METRICS:
-                new_row.setdefault(m, None)
-            for uc in UNIT_COLUMNS.values():
-                new_row.setdefault(uc, None)
-
-            st.session_state.health_log = pd.concat(
-                [st.session_state.health_log, pd.DataFrame([new_row])],
-                ignore_index=True
-            )
+            # 누락 컬럼은 HealthLog가 None으로 채움
+            LOG.append(new_row)
             st.success("✅ 기록이 저장되었습니다!")
 
     # 미리보기
@@ -214,13 +207,7 @@ if st.session_state.view == "record":
     for m in ["체온","혈당","체중","허리둘레"]:
         if m in st.session_state.selected_metrics:
             disp.append(UNIT_COLUMNS[m])
-    for c in disp:
-        if c not in st.session_state.health_log.columns:
-            st.session_state.health_log[c] = None
-    st.dataframe(
-        st.session_state.health_log[disp].sort_values(["날짜","시간"], ascending=[False,False]),
-        use_container_width=True
-    )
+    st.dataframe(LOG.sorted_view()[disp], use_container_width=True)
 
 # ============================================================
 # 뷰 2) 데이터 관리실
@@ -228,32 +215,52 @@ if st.session_state.view == "record":
 if st.session_state.view == "data":
     st.header("📦 데이터 관리실")
     st.subheader("전체 데이터")
-    for c in BASE_COLUMNS:
-        if c not in st.session_state.health_log.columns:
-            st.session_state.health_log[c] = None
-    st.dataframe(
-        st.session_state.health_log[BASE_COLUMNS].sort_values(["날짜","시간"], ascending=[False,False]),
-        use_container_width=True
-    )
+    st.dataframe(LOG.sorted_view(), use_container_width=True)
+    st.caption(f"저장 위치: {LOG.root} · 저장 대기 {LOG.unsaved}행 (몇 초 안에 자동 저장)")
+    if LOG.last_error:
+        st.error(f"자동 저장 실패: {LOG.last_error}")
+
+    # 추이 차트 — 단위가 섞여 있어도 표준 단위(℃·mg/dL·kg·cm)로 변환한 값으로 그림
+    chart_metrics = [m for m in NUMERIC_METRICS if m in st.session_state.selected_metrics]
+    if chart_metrics and not LOG.empty:
+        st.subheader("📈 추이 (표준 단위)")
+        norm = LOG.normalized()
+        when = pd.to_datetime(norm["날짜"] + " " + norm["시간"].fillna("00:00:00"), errors="coerce")
+        st.line_chart(norm.loc[when.notna(), chart_metrics].set_index(when.dropna()).sort_index(),
+                      use_container_width=True)
     st.markdown("---")
     cdl, cul = st.columns(2)
     with cdl:
-        if not st.session_state.health_log.empty:
-            st.download_button(
-                "⬇️ CSV로 내려받기",
-                st.session_state.health_log.to_csv(index=False).encode("utf-8-sig"),
-                file_name="health_log.csv",
-                mime="text/csv",
-                use_container_width=True
-            )
+        if not LOG.empty:
+            fmt = st.selectbox("내보내기 형식", list(EXPORT_FORMATS), format_func=lambda k: EXPORT_FORMATS[k][0])
+            canonical = st.checkbox("표준 단위로 변환해 내보내기 (℃·mg/dL·kg·cm)", value=False)
+            # 파일 생성은 버튼을 눌렀을 때만 — 같은 (사용자, 기록 버전, 형식)이면 만들어 둔 바이트 재사용
+            key = (user, LOG.version, fmt, canonical)
+            if st.session_state.get("export_key") != key:
+                st.session_state.pop("export_data", None)
+            if st.button("📦 내보내기 준비", use_container_width=True):
+                try:
+                    st.session_state.export_data = export_bytes(LOG.normalized() if canonical else LOG.frame(), fmt)
+                    st.session_state.export_key = key
+                except ImportError:
+                    st.error("Parquet 내보내기에는 pyarrow가 필요합니다 (pip install pyarrow).")
+            if st.session_state.get("export_data") is not None:
+                _, ext, mime = EXPORT_FORMATS[fmt]
+                st.download_button(
+                    f"⬇️ 내려받기 ({len(st.session_state.export_data) / 1e6:.1f} MB)",
+                    st.session_state.export_data,
+                    file_name=f"health_log.{ext}",
+                    mime=mime,
+                    use_container_width=True
+                )
     with cul:
         up = st.file_uploader("⬆️ CSV 불러오기", type=["csv"])
-        if up is not None:
+        if up is not None and st.session_state.get("uploaded_id") != up.file_id:
             try:
-                df = pd.read_csv(up)
-                for c in BASE_COLUMNS:
-                    if c not in df.columns: df[c] = None
-                st.session_state.health_log = df[BASE_COLUMNS]
-                st.success("CSV 불러오기 완료!")
+                # 청크 단위 + 고정 타입으로 읽음 (단위 컬럼 category, 수치 float32)
+                LOG.replace(read_csv_typed(up))
+                st.session_state.uploaded_id = up.file_id
+                df = LOG.frame()
+                st.success(f"CSV 불러오기 완료! {len(df):,}행 · 메모리 {df.memory_usage(deep=True).sum() / 1e6:.1f} MB")
             except Exception as e:
                 st.error(f"불러오는 중 오류: {e}")